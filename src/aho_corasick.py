@@ -0,0 +1,67 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    An Aho-Corasick automaton that finds every occurrence of a set of words in one pass over a text.
+    - goto: goto[node] maps a character to the child node in the trie
+    - fail: fail[node] is the node of the longest proper suffix of `node` that is also in the trie
+    - output: output[node] lists the indices of the words that end at `node`, including through fail links
+    """
+    def __init__(self, words: list[str]):
+        self.words = list(words)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for i, word in enumerate(self.words):
+            if not word:
+                raise ValueError("Cannot search for the empty word!")
+
+            node = 0
+            for c in word:
+                nxt = self.goto[node].get(c)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[node][c] = nxt
+                node = nxt
+            self.output[node].append(i)
+
+        queue = deque(self.goto[0].values())
+        while queue:  # BFS, so fail links always point to shallower nodes that are already done
+            node = queue.popleft()
+            for c, child in self.goto[node].items():
+                queue.append(child)
+
+                f = self.fail[node]
+                while f and c not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(c, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def __len__(self):
+        return len(self.words)
+
+    def iter(self, text: str):
+        """
+        Yields (end, word index) for every occurrence of every word in `text`, ordered by end position.
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+
+        node = 0
+        for i, c in enumerate(text):
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+
+            for w in output[node]:
+                yield i + 1, w
+
+    def find_words(self, text: str) -> set[int]:
+        """
+        Returns the indices of the words that occur in `text`.
+        """
+        return set(w for _, w in self.iter(text))
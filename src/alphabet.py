@@ -0,0 +1,120 @@
+from bisect import bisect_right
+
+from src.nfa_state import State, LiteralState, CharClassState, CounterState, SaveState, SplitState
+
+MAX_CODE_POINT = 0x10FFFF
+MAX_MEMO_SIZE = 1 << 16  # Max number of characters whose class is memoized
+
+
+class CharClasses:
+    """
+    A partition of all code points into equivalence classes: two characters share a class iff no state of the NFA
+    tells them apart. Class 0 holds the characters that no state consumes.
+    - boundaries: sorted code points, `boundaries[i]` is where interval `i` starts (`boundaries[0] == 0`)
+    - interval_class: the class of each interval
+    - n_classes: number of classes
+    - memo: character -> class, filled on demand
+    """
+    def __init__(self, boundaries: list[int], interval_class: list[int]):
+        self.boundaries = boundaries
+        self.interval_class = interval_class
+        self.n_classes = max(interval_class) + 1
+        self.memo = {}
+
+    def __len__(self):
+        return self.n_classes
+
+    def classify(self, c: str) -> int:
+        k = self.memo.get(c)
+        if k is None:
+            k = self.interval_class[bisect_right(self.boundaries, ord(c)) - 1]
+            if len(self.memo) < MAX_MEMO_SIZE:
+                self.memo[c] = k
+
+        return k
+
+    def representatives(self) -> list[str]:
+        """
+        Returns one character of each class, indexed by class.
+        """
+        reps = [None] * self.n_classes
+        for start, k in zip(self.boundaries, self.interval_class):
+            if reps[k] is None:
+                reps[k] = chr(start)
+
+        return reps
+
+
+def _char_sets(start_state: State) -> dict[object, list[tuple[int, int]]]:
+    """
+    Collects the character sets consumed by the states of the NFA, as sorted, inclusive code point ranges.
+    Keys identify distinct sets; states consuming the same set share a key.
+    """
+    sets = {}
+
+    visited = set()
+    stack = [start_state]
+    while stack:  # DFS
+        s = stack.pop()
+        if s in visited:
+            continue
+        visited.add(s)
+
+        if isinstance(s, LiteralState):
+            code = ord(s.literal)
+            sets[s.literal] = [(code, code)]
+            stack.append(s.next_state)
+        elif isinstance(s, (CharClassState, CounterState)):
+            sets[s.chars] = list(s.chars.ranges)
+            stack.append(s.next_state)
+        elif isinstance(s, SaveState):
+            stack.append(s.next_state)
+        elif isinstance(s, SplitState):
+            stack.append(s.next_state_1)
+            stack.append(s.next_state_2)
+
+    return sets
+
+
+def char_classes(start_state: State) -> CharClasses:
+    """
+    Partitions the alphabet of the NFA starting from `start_state` into equivalence classes.
+    """
+    if start_state is None:
+        raise ValueError("Invalid NFA!")
+
+    sets = _char_sets(start_state)
+
+    points = {0}
+    for ranges in sets.values():
+        for lo, hi in ranges:
+            points.add(lo)
+            if hi < MAX_CODE_POINT:
+                points.add(hi + 1)
+    boundaries = sorted(points)
+
+    # The signature of an interval is the set of character sets containing it
+    signatures = [set() for _ in boundaries]
+    for key, ranges in sets.items():
+        for lo, hi in ranges:
+            i = bisect_right(boundaries, lo) - 1
+            while i < len(boundaries) and boundaries[i] <= hi:
+                signatures[i].add(key)
+                i += 1
+
+    class_of = {frozenset(): 0}
+    interval_class = []
+    for signature in signatures:
+        signature = frozenset(signature)
+        if signature not in class_of:
+            class_of[signature] = len(class_of)
+        interval_class.append(class_of[signature])
+
+    # Merge adjacent intervals of the same class
+    merged_boundaries, merged_class = [], []
+    for start, k in zip(boundaries, interval_class):
+        if not merged_class or merged_class[-1] != k:
+            merged_boundaries.append(start)
+            merged_class.append(k)
+
+    return CharClasses(merged_boundaries, merged_class)
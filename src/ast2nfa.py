@@ -0,0 +1,71 @@
+from src.nfa_state import SplitState, LiteralState, CharClassState, AcceptState, State
+from src.nfa_fragment import Fragment, PatchList, StateBudget, concat, repeat, capture
+from src.re2ast import Literal, CharClass, Concat, Alternate, Repeat, Group, children, postorder
+
+
+def _combine(node, fragments: list[Fragment], captures: bool, counters: bool, budget: StateBudget) -> Fragment:
+    """
+    Builds the fragment of `node` from the fragments of its children.
+    """
+    if isinstance(node, Literal):
+        s = LiteralState(node.char, None)
+        return Fragment(s, PatchList(s))
+
+    if isinstance(node, CharClass):
+        s = CharClassState(node.chars, None)
+        return Fragment(s, PatchList(s))
+
+    if isinstance(node, Concat):
+        nfa = fragments[0]
+        for fragment in fragments[1:]:
+            nfa = concat(nfa, fragment)
+        return nfa
+
+    if isinstance(node, Alternate):
+        # A chain of split states, a|b|c becomes split(a, split(b, c)), with the open ends of every alternative
+        head = fragments[-1].start
+        for fragment in reversed(fragments[:-1]):
+            head = SplitState(fragment.start, head)
+
+        open_ends = fragments[0].open_ends
+        for fragment in fragments[1:]:
+            open_ends.splice(fragment.open_ends)
+        return Fragment(head, open_ends)
+
+    if isinstance(node, Repeat):
+        return repeat(fragments[0], node.m, node.n, budget, counters)
+
+    if isinstance(node, Group):
+        return capture(fragments[0], node.index) if captures else fragments[0]
+
+    raise ValueError("Cannot recognize AST node {!r}!".format(node))
+
+
+def _build(node, captures: bool, counters: bool, budget: StateBudget) -> Fragment:
+    fragments = []
+    for n in postorder(node):
+        k = len(children(n))
+        fragment = _combine(n, fragments[len(fragments) - k:], captures, counters, budget)
+        del fragments[len(fragments) - k:]
+        fragments.append(fragment)
+
+    return fragments[0]
+
+
+def ast2nfa(node, captures: bool = False, counters: bool = False) -> State | None:
+    """
+    Builds a Thompson NFA directly from an AST (see `re2ast`). Returns the starting state of the NFA.
+    With `captures`, every capturing group k is wrapped between save states for slots 2k and 2k + 1.
+    Raises ValueError if counted repetitions would add more than `nfa_fragment.MAX_CLONED_STATES` states.
+    With `counters`, large counted repetitions of a single character become counter states (see `nfa_fragment.repeat`).
+    """
+    if node is None:
+        return None
+
+    nfa = _build(node, captures, counters, StateBudget())
+
+    accept_state = AcceptState()
+    for end_state in nfa.open_ends:
+        end_state.transition_to(accept_state)
+
+    return nfa.start
@@ -0,0 +1,67 @@
+import numpy as np
+
+from src.re2ast import re2ast
+from src.ast2nfa import ast2nfa
+from src.dfa import Dfa, compile_dfa
+
+
+def _compile(pattern: str | Dfa) -> Dfa:
+    if isinstance(pattern, Dfa):
+        return pattern
+
+    return compile_dfa(ast2nfa(re2ast(pattern)))
+
+
+def _columns(dfa: Dfa, code_points: np.ndarray) -> np.ndarray:
+    """
+    Maps an array of code points to DFA columns, i.e. character classes.
+    """
+    boundaries = np.array(dfa.classes.boundaries, dtype=np.uint32)
+    interval_class = np.array(dfa.classes.interval_class, dtype=np.intp)
+
+    return interval_class[np.searchsorted(boundaries, code_points, side='right') - 1]
+
+
+def match_many(pattern: str | Dfa, strings) -> np.ndarray:
+    """
+    Tells, for each string in `strings`, if the whole string matches `pattern`. Returns a boolean array.
+
+    `pattern` is compiled to a DFA, then all strings are stepped in lockstep: at position `j`, the next state of every
+    string still longer than `j` is gathered from the transition table in one vectorized operation.
+    Strings are sorted by length, so the strings still running at position `j` are always a prefix of the batch.
+    """
+    dfa = _compile(pattern)
+
+    strings = list(strings)
+    if not all(isinstance(s, str) for s in strings):
+        raise ValueError("Expected a one-dimensional sequence of strings!")
+
+    n = len(strings)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+
+    # NumPy's '<Uk' strings drop trailing NULs, so the code point matrix is built from the real lengths instead:
+    # the UTF-32 code points of all strings, one after the other, fill the first `length` cells of each row
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.intp, count=n)
+    order = np.argsort(-lengths, kind='stable')
+    lengths = lengths[order]
+
+    width = int(lengths[0])
+    flat = np.frombuffer(''.join(strings[i] for i in order).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    code_points = np.zeros((n, width), dtype=np.uint32)
+    code_points[np.arange(width) < lengths[:, None]] = flat
+    columns = _columns(dfa, code_points)
+
+    table = np.frombuffer(dfa.table, dtype=np.int32).reshape(dfa.n_states, dfa.n_columns)
+    accepting = np.array(dfa.accepting, dtype=bool)
+
+    states = np.full(n, dfa.start, dtype=np.intp)
+    # n_running[j] is the number of strings longer than j
+    n_running = np.searchsorted(-lengths, -np.arange(width), side='left')
+    for j in range(width):
+        k = n_running[j]
+        states[:k] = table[states[:k], columns[:k, j]]
+
+    result = np.empty(n, dtype=bool)
+    result[order] = accepting[states]
+    return result
@@ -0,0 +1,117 @@
+from collections import deque
+
+from src.nfa_state import State, LiteralState, CharClassState, Count, AcceptState, epsilon_closure
+from src.alphabet import MAX_MEMO_SIZE
+
+
+class ClosureIndex:
+    """
+    Epsilon closures and character dispatch tables, precomputed once per NFA.
+
+    Only "kernel" states are indexed: the start state and every state entered by consuming a character.
+    A set of kernel states stands for the union of their epsilon closures.
+    - start: the start state
+    - closures: kernel state -> its epsilon closure
+    - dispatch: kernel state -> {character: kernel states reached from its closure by consuming that character}
+    - class_dispatch: kernel state -> ((CharSet, kernel state), ...) for the class states of its closure
+    - accepting: the kernel states whose closure contains an accept state
+    - n_memoized: number of characters `resolve` has added to the dispatch tables
+
+    Characters consumed by class states are resolved on first use by `resolve` and then memoized in `dispatch`, up to
+    MAX_MEMO_SIZE characters over all kernel states; after that they are resolved on every use.
+    NFAs with counter states (see `nfa_fragment.repeat`) are rejected with a ValueError: a kernel state cannot carry
+    the run lengths of a counter.
+    """
+    def __init__(self, start_state: State):
+        if start_state is None:
+            raise ValueError("Invalid NFA!")
+
+        self.start = start_state
+        self.closures = {}
+        self.dispatch = {}
+        self.class_dispatch = {}
+        self.accepting = set()
+        self.n_memoized = 0
+
+        queue = deque([start_state])
+        while queue:  # BFS over kernel states
+            kernel = queue.popleft()
+            if kernel in self.closures:
+                continue
+
+            closure = frozenset(epsilon_closure([kernel]))
+            table = {}
+            classes = []
+            for s in closure:
+                if isinstance(s, LiteralState):
+                    table.setdefault(s.literal, set()).add(s.next_state)
+                    queue.append(s.next_state)
+                elif isinstance(s, CharClassState):
+                    classes.append((s.chars, s.next_state))
+                    queue.append(s.next_state)
+                elif isinstance(s, AcceptState):
+                    self.accepting.add(kernel)
+                elif isinstance(s, Count):
+                    raise ValueError("Counter states are not supported, build the NFA without counters!")
+
+            self.closures[kernel] = closure
+            self.dispatch[kernel] = {c: frozenset(targets) for c, targets in table.items()}
+            if classes:
+                self.class_dispatch[kernel] = tuple(classes)
+                # literals also consumed by a class state must dispatch to both
+                for c, targets in self.dispatch[kernel].items():
+                    self.dispatch[kernel][c] = targets | {nxt for chars, nxt in classes if c in chars}
+
+    def resolve(self, kernel: State, c: str) -> frozenset[State]:
+        """
+        Returns the kernel states reached from `kernel` on a character missing from its dispatch table.
+        """
+        classes = self.class_dispatch.get(kernel)
+        if classes is None:
+            return frozenset()
+
+        targets = frozenset(nxt for chars, nxt in classes if c in chars)
+        if self.n_memoized < MAX_MEMO_SIZE:
+            self.dispatch[kernel][c] = targets
+            self.n_memoized += 1
+        return targets
+
+
+def match_indexed(index: ClosureIndex, _input: str) -> bool:
+    """
+    Simulates the NFA with precomputed closures. Each step is one dict lookup per active kernel state plus a union.
+    """
+    if index is None:
+        raise ValueError("Invalid NFA!")
+
+    if not _input:
+        raise ValueError("Invalid input!")
+
+    dispatch = index.dispatch
+    resolve = index.resolve
+
+    current = (index.start,)
+    for c in _input:
+        if len(current) == 1:
+            kernel = current[0]
+            current = dispatch[kernel].get(c)
+            if current is None:
+                current = resolve(kernel, c)
+            if not current:
+                return False
+            current = tuple(current)
+            continue
+
+        following = set()
+        for kernel in current:
+            targets = dispatch[kernel].get(c)
+            if targets is None:
+                targets = resolve(kernel, c)
+            if targets:
+                following |= targets
+
+        if not following:
+            return False
+        current = tuple(following)
+
+    return not index.accepting.isdisjoint(current)
@@ -0,0 +1,197 @@
+from array import array
+from collections import deque
+
+from src.nfa_state import State, epsilon_closure
+from src.nfa_simulation import step, is_accepting
+from src.alphabet import CharClasses, char_classes
+
+DEFAULT_MAX_STATES = 10000  # Subset construction aborts beyond this many DFA states
+
+
+class StateLimitExceeded(ValueError):
+    pass
+
+
+class Dfa:
+    """
+    A complete DFA with a dense transition table, with one column per character class.
+    - classes: the character classes of the alphabet; class 0 (characters no state consumes) always leads to `dead`
+    - n_columns: number of columns in a row of `table`
+    - table: `table[state * n_columns + column]` is the next state
+    - accepting: `accepting[state]` tells if `state` is an accept state
+    - start: the start state
+    - dead: the state that can never reach an accept state, or -1 if there is none
+    """
+    def __init__(self, classes: CharClasses, table: array, accepting: list[bool], start: int, dead: int):
+        self.classes = classes
+        self.n_columns = classes.n_classes
+        self.table = table
+        self.accepting = accepting
+        self.start = start
+        self.dead = dead
+
+    @property
+    def n_states(self) -> int:
+        return len(self.accepting)
+
+    def match(self, _input: str) -> bool:
+        if not _input:
+            raise ValueError("Invalid input!")
+
+        table = self.table
+        n_columns = self.n_columns
+        memo = self.classes.memo
+        classify = self.classes.classify
+        dead = self.dead
+
+        s = self.start
+        for c in _input:
+            column = memo.get(c)
+            if column is None:
+                column = classify(c)
+
+            s = table[s * n_columns + column]
+            if s == dead:
+                return False
+
+        return self.accepting[s]
+
+
+def _subset_construction(start_state: State, classes: CharClasses, max_states: int):
+    """
+    Returns (table, accepting, dead) of the unminimized DFA. State 0 is the start state.
+    """
+    n_columns = classes.n_classes
+    representatives = classes.representatives()
+
+    empty = frozenset()
+    start = frozenset(epsilon_closure([start_state]))
+    state_ids = {start: 0, empty: 1}
+    subsets = [start, empty]
+    table = array('i')
+
+    i = 0
+    while i < len(subsets):
+        subset = subsets[i]
+        row = [1] * n_columns  # column 0 (characters no state consumes) always leads to the dead state
+
+        if subset:
+            for column in range(1, n_columns):
+                c = representatives[column]
+                closure = step(subset, c)
+                nxt = frozenset(closure) if closure is not None else empty
+
+                _id = state_ids.get(nxt)
+                if _id is None:
+                    if len(subsets) >= max_states:
+                        raise StateLimitExceeded("DFA exceeds {} states!".format(max_states))
+
+                    _id = len(subsets)
+                    state_ids[nxt] = _id
+                    subsets.append(nxt)
+
+                row[column] = _id
+
+        table.extend(row)
+        i += 1
+
+    accepting = [is_accepting(subset) for subset in subsets]
+    return table, accepting, 1
+
+
+def _hopcroft(table: array, accepting: list[bool], n_columns: int) -> list[int]:
+    """
+    Hopcroft's partition refinement. Returns the block index of each state.
+    """
+    n_states = len(accepting)
+
+    # inverse[column][target] lists the states that go to `target` on `column`
+    inverse = [[[] for _ in range(n_states)] for _ in range(n_columns)]
+    for s in range(n_states):
+        base = s * n_columns
+        for column in range(n_columns):
+            inverse[column][table[base + column]].append(s)
+
+    blocks = [set(s for s in range(n_states) if accepting[s]),
+              set(s for s in range(n_states) if not accepting[s])]
+    blocks = [b for b in blocks if b]
+
+    block_of = [0] * n_states
+    for b, states in enumerate(blocks):
+        for s in states:
+            block_of[s] = b
+
+    worklist = set(range(len(blocks)))
+    while worklist:
+        splitter = list(blocks[worklist.pop()])
+
+        for column in range(n_columns):
+            # States that go into the splitter on `column`, grouped by their current block
+            touched = {}
+            for t in splitter:
+                for s in inverse[column][t]:
+                    touched.setdefault(block_of[s], []).append(s)
+
+            for b, states in touched.items():
+                if len(states) == len(blocks[b]):
+                    continue
+
+                new_block = set(states)
+                blocks[b] -= new_block
+                new_b = len(blocks)
+                blocks.append(new_block)
+                for s in new_block:
+                    block_of[s] = new_b
+
+                if b in worklist:
+                    worklist.add(new_b)
+                else:
+                    worklist.add(new_b if len(new_block) <= len(blocks[b]) else b)
+
+    return block_of
+
+
+def minimize(dfa: Dfa) -> Dfa:
+    """
+    Minimizes `dfa` with Hopcroft's algorithm. States of the result are numbered in BFS order from the start state.
+    """
+    n_columns = dfa.n_columns
+    block_of = _hopcroft(dfa.table, dfa.accepting, n_columns)
+
+    # Pick one representative per block and renumber blocks in BFS order
+    representative = {}
+    for s in range(dfa.n_states):
+        representative.setdefault(block_of[s], s)
+
+    new_ids = {block_of[dfa.start]: 0}
+    queue = deque([block_of[dfa.start]])
+    table = array('i')
+    accepting = []
+    while queue:
+        b = queue.popleft()
+        s = representative[b]
+        base = s * n_columns
+        for column in range(n_columns):
+            nb = block_of[dfa.table[base + column]]
+            if nb not in new_ids:
+                new_ids[nb] = len(new_ids)
+                queue.append(nb)
+            table.append(new_ids[nb])
+        accepting.append(dfa.accepting[s])
+
+    dead = new_ids.get(block_of[dfa.dead], -1) if dfa.dead >= 0 else -1
+    return Dfa(dfa.classes, table, accepting, 0, dead)
+
+
+def compile_dfa(start_state: State, max_states: int = DEFAULT_MAX_STATES) -> Dfa:
+    """
+    Compiles the NFA starting from `start_state` into a minimal DFA.
+    Raises StateLimitExceeded if subset construction produces more than `max_states` states.
+    """
+    if start_state is None:
+        raise ValueError("Invalid NFA!")
+
+    classes = char_classes(start_state)
+    table, accepting, dead = _subset_construction(start_state, classes, max_states)
+
+    return minimize(Dfa(classes, table, accepting, 0, dead))
@@ -0,0 +1,256 @@
+from src.nfa_state import (State, LiteralState, CharClassState, CounterState, SaveState, SplitState, AcceptState,
+                           epsilon_closure, reachable_states)
+from src.nfa_simulation import step, is_accepting, search
+from src.nfa_optimize import optimize
+from src.prefilter import next_candidate
+from src.lazy_dfa import LazyDfa
+
+DEFAULT_CACHE_SIZE = 1024  # Max number of forward DFA states kept in memory
+DEFAULT_MAX_FLUSHES = 8  # Max cache flushes per search before falling back to NFA simulation
+
+
+def reverse_nfa(start_state: State) -> State:
+    """
+    Builds an NFA accepting the reverse of every string accepted by the NFA, by reversing its transitions: the
+    reversed NFA starts where the accept state was and accepts where the start state was. Save states become plain
+    epsilon edges. Returns the starting state of the reversed NFA.
+    """
+    if start_state is None:
+        raise ValueError("Invalid NFA!")
+
+    states = reachable_states(start_state)
+
+    # Every state gets a split state in the reversed NFA; its edges are filled in once all of them exist
+    hubs = {s: SplitState() for s in states}
+    targets = {s: [] for s in states}  # state -> the reversed edges leaving its hub
+    targets[start_state].append(AcceptState())
+
+    accept_state = None
+    for s in states:
+        if isinstance(s, LiteralState):
+            targets[s.next_state].append(LiteralState(s.literal, hubs[s]))
+        elif isinstance(s, CharClassState):
+            targets[s.next_state].append(CharClassState(s.chars, hubs[s]))
+        elif isinstance(s, CounterState):
+            # a run of m to n characters of a set reads the same backward
+            targets[s.next_state].append(CounterState(s.chars, s.m, s.n, hubs[s]))
+        elif isinstance(s, SaveState):
+            targets[s.next_state].append(hubs[s])
+        elif isinstance(s, SplitState):
+            targets[s.next_state_1].append(hubs[s])
+            targets[s.next_state_2].append(hubs[s])
+        elif isinstance(s, AcceptState):
+            accept_state = s
+
+    if accept_state is None:
+        raise ValueError("NFA has no accept state!")
+
+    # A hub with k edges becomes a chain of splits; a hub with a single edge is a split with two identical edges,
+    # which `optimize` bypasses. Every state but the start has an incoming edge, and the start has the accept edge.
+    for s in states:
+        edges = targets[s]
+        hub = hubs[s]
+        for edge in edges[:-2]:
+            hub.next_state_1 = edge
+            hub.next_state_2 = SplitState()
+            hub = hub.next_state_2
+        hub.next_state_1 = edges[0] if len(edges) == 1 else edges[-2]
+        hub.next_state_2 = edges[-1]
+
+    return optimize(hubs[accept_state])
+
+
+class _SearchState:
+    """
+    A state of the forward search DFA.
+    - classes: epsilon-closed sets of NFA states, one per match start still alive, earliest start first; an NFA state
+      only belongs to the earliest start that reaches it
+    - matched: whether a match has ended already; no new starts are added after that
+    - accepting: whether a match ends here
+    - transitions: memoized transitions, character -> _SearchState
+    """
+    __slots__ = ('classes', 'matched', 'accepting', 'transitions')
+
+    def __init__(self, classes: tuple[frozenset[State], ...], matched: bool, accepting: bool):
+        self.classes = classes
+        self.matched = matched
+        self.accepting = accepting
+        self.transitions = {}
+
+
+class DfaSearch:
+    """
+    Leftmost-longest search in two DFA passes, with the same results as `nfa_simulation.search`.
+
+    A forward lazy DFA finds where the leftmost-longest match ends. Its states keep the NFA threads grouped by start
+    position, in start order, which is enough to drop later starts once an earlier one matches without tracking the
+    positions themselves. A lazy DFA over the reversed NFA then runs backward from that end, and the last position
+    where it accepts is the start of the match.
+
+    The forward DFA keeps at most `cache_size` states; when a single search flushes its cache more than
+    `max_flushes` times, the search falls back to NFA simulation. The reversed NFA is only built once a match is found.
+    """
+    def __init__(self, start_state: State, prefixes: list[str] | None = None, cache_size: int = DEFAULT_CACHE_SIZE,
+                 max_flushes: int = DEFAULT_MAX_FLUSHES):
+        if start_state is None:
+            raise ValueError("Invalid NFA!")
+
+        if cache_size < 2:
+            raise ValueError("Cache size must be at least 2!")
+
+        self.start_state = start_state
+        self.prefixes = prefixes
+        self.cache_size = cache_size
+        self.max_flushes = max_flushes
+        self.flushes = 0
+
+        self._start_closure = frozenset(epsilon_closure([start_state]))
+        self._cache = {}
+        self._dead = _SearchState((), True, False)  # never cached, so it survives flushes
+        self._start = self._intern((), False)
+        self._reverse = None
+
+    @property
+    def reverse(self) -> LazyDfa:
+        """
+        The lazy DFA of the reversed NFA, built on first use.
+        """
+        if self._reverse is None:
+            self._reverse = LazyDfa(reverse_nfa(self.start_state))
+
+        return self._reverse
+
+    def search(self, text: str, pos: int = 0) -> tuple[int, int] | None:
+        """
+        Finds the leftmost-longest substring of `text[pos:]` accepted by the NFA.
+        Returns its span as (start, end), or None if there is no match.
+        """
+        end = self._find_end(text, pos)
+        if end is None:
+            return None
+        if end < 0:
+            return search(self.start_state, text, pos, self.prefixes)
+
+        return self._find_start(text, pos, end), end
+
+    def finditer(self, text: str, pos: int = 0):
+        """
+        Yields the spans of all non-overlapping leftmost-longest matches in `text[pos:]`.
+        """
+        while pos <= len(text):
+            span = self.search(text, pos)
+            if span is None:
+                return
+
+            yield span
+
+            start, end = span
+            pos = end if end > start else end + 1
+
+    def _find_end(self, text: str, pos: int) -> int | None:
+        """
+        Returns where the leftmost-longest match in `text[pos:]` ends, None if there is no match, or -1 if the cache
+        is thrashing.
+        """
+        flush_limit = self.flushes + self.max_flushes
+        prefixes = self.prefixes
+        dead = self._dead
+
+        d = self._start
+        end = pos if d.accepting else None
+        i = pos
+        while i < len(text):
+            if d is self._start and prefixes is not None:
+                # only fresh starts are alive, and every match starts with a prefix
+                i = next_candidate(text, prefixes, i)
+                if i < 0:
+                    break
+
+            c = text[i]
+            nxt = d.transitions.get(c)
+            if nxt is None:
+                nxt = self._compute(d, c)
+                if self.flushes > flush_limit:
+                    return -1
+
+            d = nxt
+            i += 1
+            if d.accepting:
+                end = i
+            elif d is dead:
+                break
+
+        return end
+
+    def _find_start(self, text: str, pos: int, end: int) -> int:
+        reverse = self.reverse
+
+        d = reverse.start
+        start = end if d.accepting else None
+        j = end
+        while j > pos:
+            j -= 1
+            d = reverse.next_state(d, text[j])
+            if reverse.is_dead(d):
+                break
+            if d.accepting:
+                start = j
+
+        return start
+
+    def _compute(self, d: _SearchState, c: str) -> _SearchState:
+        classes = []
+        seen = set()
+        for states in d.classes:
+            closure = step(states, c)
+            if closure:
+                closure -= seen
+                if closure:
+                    seen |= closure
+                    classes.append(frozenset(closure))
+
+        nxt = self._intern(tuple(classes), d.matched, seen)
+
+        # `d` may have been dropped by a flush inside `_intern`; memoizing on it is harmless either way
+        d.transitions[c] = nxt
+        return nxt
+
+    def _intern(self, classes: tuple[frozenset[State], ...], matched: bool, seen: set[State] = frozenset()):
+        """
+        Adds a new start unless a match was found, then drops every start after the first one that accepts.
+        """
+        if not matched:
+            fresh = self._start_closure - seen
+            if fresh:
+                classes += (frozenset(fresh),)
+
+        accepting = False
+        for k, states in enumerate(classes):
+            if is_accepting(states):
+                classes = classes[:k + 1]
+                matched = accepting = True
+                break
+
+        if not classes and matched:
+            return self._dead
+
+        key = (classes, matched)
+        d = self._cache.get(key)
+        if d is not None:
+            return d
+
+        if len(self._cache) >= self.cache_size:
+            self._flush()
+
+        d = _SearchState(classes, matched, accepting)
+        self._cache[key] = d
+        return d
+
+    def _flush(self):
+        self.flushes += 1
+        self._cache.clear()
+
+        # Re-create the start state so that no stale transitions keep the old states alive
+        start = _SearchState(self._start.classes, self._start.matched, self._start.accepting)
+        self._cache[(start.classes, start.matched)] = start
+        self._start = start
@@ -0,0 +1,174 @@
+"""
+Prints the lines of files that contain a match of a regular expression.
+
+    python -m src.grep [-c] [-n] [-j JOBS] PATTERN FILE...
+"""
+import argparse
+import io
+import mmap
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from src.pattern import Pattern, compile
+
+
+def _candidate_lines(mm: mmap.mmap, prefixes: list[bytes] | None):
+    """
+    Yields (start, end) of the lines that may contain a match. Without prefixes, that is every line.
+    With prefixes, `mmap.find` jumps straight to the lines that contain one of them.
+    """
+    size = len(mm)
+
+    pos = 0
+    while pos < size:
+        if prefixes is not None:
+            hit = -1
+            for p in prefixes:
+                i = mm.find(p, pos, size if hit < 0 else hit + len(p))
+                if i >= 0 and (hit < 0 or i < hit):
+                    hit = i
+            if hit < 0:
+                return
+            # back up to the start of the line that contains the hit
+            newline = mm.rfind(b'\n', pos, hit)
+            if newline >= 0:
+                pos = newline + 1
+
+        end = mm.find(b'\n', pos)
+        if end < 0:
+            end = size
+
+        yield pos, end
+        pos = end + 1
+
+
+def _count_newlines(mm: mmap.mmap, start: int, end: int) -> int:
+    """
+    Counts the newlines in `mm[start:end]` with `mmap.find`, without copying the region.
+    """
+    n = 0
+    newline = mm.find(b'\n', start, end)
+    while newline >= 0:
+        n += 1
+        newline = mm.find(b'\n', newline + 1, end)
+
+    return n
+
+
+def grep_file(pattern: Pattern, path: str, write=None, line_numbers: bool = False) -> int:
+    """
+    Scans the file at `path` through mmap. Returns the number of matching lines.
+
+    Unless `write` is None, calls `write(line number or None, line)` for each matching line as soon as it is found,
+    where `line` is a memoryview of the mapped bytes, without the newline, that is only valid during the call.
+    """
+    prefixes = None
+    if pattern.prefixes is not None:
+        prefixes = [p.encode('utf-8') for p in pattern.prefixes]
+
+    count = 0
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return 0
+
+        with mm:
+            view = memoryview(mm)
+            try:
+                line_number, counted_to = 1, 0
+                for start, end in _candidate_lines(mm, prefixes):
+                    # decode straight from the mapped buffer, without an intermediate bytes copy
+                    line = str(view[start:end], 'utf-8', 'replace')
+                    if pattern.search(line) is None:
+                        continue
+
+                    count += 1
+                    if write is None:
+                        continue
+
+                    number = None
+                    if line_numbers:
+                        line_number += _count_newlines(mm, counted_to, start)
+                        counted_to = start
+                        number = line_number
+                    with view[start:end] as raw:
+                        write(number, raw)
+            finally:
+                view.release()
+
+    return count
+
+
+def main(argv: list[str] | None = None, out=None) -> int:
+    """
+    Returns 0 if any line matched, 1 if none did and 2 on error, like grep.
+
+    Matching lines are written as they are found. With several jobs, each file's output is buffered until the files
+    before it are written, so that the output stays in argument order.
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.grep', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pattern')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('-c', '--count', action='store_true', help="only print the number of matching lines")
+    parser.add_argument('-n', '--line-number', action='store_true', help="prefix each line with its line number")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="number of files scanned concurrently")
+    args = parser.parse_args(argv)
+
+    if out is None:
+        out = sys.stdout.buffer
+
+    try:
+        pattern = compile(args.pattern)
+    except ValueError as e:
+        print("Invalid pattern {!r}: {}".format(args.pattern, e), file=sys.stderr)
+        return 2
+
+    with_filename = len(args.files) > 1
+
+    def scan(path, dest):
+        """
+        Greps the file at `path` into `dest`. Returns the number of matching lines, or the OSError.
+        """
+        name = path.encode('utf-8') + b':' if with_filename else b''
+
+        def write(number, line):
+            number = str(number).encode('ascii') + b':' if number is not None else b''
+            dest.write(b''.join((name, number, line, b'\n')))
+
+        try:
+            count = grep_file(pattern, path, None if args.count else write, args.line_number)
+        except OSError as e:
+            return e
+
+        if args.count:
+            dest.write(name + str(count).encode('ascii') + b'\n')
+        return count
+
+    def scan_buffered(path):
+        buffer = io.BytesIO()
+        return scan(path, buffer), buffer
+
+    status = 1
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        if args.jobs > 1:
+            results = pool.map(scan_buffered, args.files)
+        else:
+            results = ((scan(path, out), None) for path in args.files)
+
+        for path, (result, buffer) in zip(args.files, results):
+            if buffer is not None:
+                out.write(buffer.getbuffer())
+
+            if isinstance(result, OSError):
+                print("{}: {}".format(path, result.strerror), file=sys.stderr)
+                status = 2
+            elif result and status == 1:
+                status = 0
+
+    out.flush()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Opt-in instrumentation of the matching hot path.
+
+Engines check the module-level `enabled` flag once per call and only then switch to an instrumented code path,
+so nothing is counted or allocated while no callback is registered.
+"""
+from contextlib import contextmanager
+from time import perf_counter
+
+enabled = False
+_callbacks = []
+
+
+class MatchStats:
+    """
+    Counters of one match call.
+    - engine: name of the engine that did the work
+    - chars: number of characters consumed
+    - active_states: number of active NFA states after each step
+    - peak_closure: size of the largest epsilon closure seen
+    - cache_hits, cache_misses: lazy DFA transition lookups that were / were not memoized
+    - seconds: wall time of the call
+    """
+    __slots__ = ('engine', 'chars', 'active_states', 'peak_closure', 'cache_hits', 'cache_misses', 'seconds')
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.chars = 0
+        self.active_states = []
+        self.peak_closure = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.seconds = 0.0
+
+    def record_closure(self, closure):
+        size = len(closure) if closure else 0
+        self.active_states.append(size)
+        if size > self.peak_closure:
+            self.peak_closure = size
+
+
+class StageTiming:
+    """
+    Wall time of one pipeline stage, e.g. 'parse', 'ast2nfa', 'optimize' or 'simulation'.
+    """
+    __slots__ = ('stage', 'seconds')
+
+    def __init__(self, stage: str, seconds: float):
+        self.stage = stage
+        self.seconds = seconds
+
+
+def add_callback(callback):
+    """
+    Registers `callback`, which is then called with every MatchStats and StageTiming produced.
+    """
+    global enabled
+
+    _callbacks.append(callback)
+    enabled = True
+
+
+def remove_callback(callback):
+    global enabled
+
+    _callbacks.remove(callback)
+    enabled = bool(_callbacks)
+
+
+def emit(event: MatchStats | StageTiming):
+    for callback in list(_callbacks):
+        callback(event)
+
+
+@contextmanager
+def collect():
+    """
+    Collects every event produced inside the `with` block into a list.
+    """
+    events = []
+    add_callback(events.append)
+    try:
+        yield events
+    finally:
+        remove_callback(events.append)
+
+
+@contextmanager
+def timed(stage: str):
+    """
+    Emits a StageTiming for the `with` block, if instrumentation is enabled.
+    """
+    if not enabled:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        emit(StageTiming(stage, perf_counter() - start))
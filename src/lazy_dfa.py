@@ -0,0 +1,167 @@
+from time import perf_counter
+
+from src import instrument
+from src.nfa_state import State, epsilon_closure
+from src.nfa_simulation import step, is_accepting
+
+DEFAULT_CACHE_SIZE = 1024  # Max number of DFA states kept in memory
+DEFAULT_MAX_FLUSHES = 8  # Max cache flushes per match before falling back to NFA simulation
+
+
+class _DfaState:
+    """
+    A DFA state built by subset construction.
+    - nfa_states: the epsilon-closed set of NFA states this DFA state stands for
+    - accepting: whether `nfa_states` contains an accept state
+    - transitions: memoized transitions, character -> _DfaState
+    """
+    __slots__ = ('nfa_states', 'accepting', 'transitions')
+
+    def __init__(self, nfa_states: frozenset[State]):
+        self.nfa_states = nfa_states
+        self.accepting = is_accepting(nfa_states)
+        self.transitions = {}
+
+
+class LazyDfa:
+    """
+    A DFA built on demand from a Thompson NFA.
+
+    DFA states are created the first time they are reached and transitions are memoized per (DFA state, character),
+    so matching a hot pattern costs one dict lookup per character.
+
+    At most `cache_size` DFA states are kept. When the budget is exceeded, the whole cache is flushed and rebuilt
+    from the current state. If a single `match` call flushes more than `max_flushes` times, the cache is thrashing
+    and the rest of the input is handled by plain NFA simulation.
+    """
+    def __init__(self, start_state: State, cache_size: int = DEFAULT_CACHE_SIZE,
+                 max_flushes: int = DEFAULT_MAX_FLUSHES):
+        if start_state is None:
+            raise ValueError("Invalid NFA!")
+
+        if cache_size < 2:
+            raise ValueError("Cache size must be at least 2!")
+
+        self.start_state = start_state
+        self.cache_size = cache_size
+        self.max_flushes = max_flushes
+        self.flushes = 0
+
+        self._start_closure = frozenset(epsilon_closure([start_state]))
+        self._dead = _DfaState(frozenset())  # never cached, so it survives flushes
+        self._cache = {}
+        self._start = self._intern(self._start_closure)
+
+    @property
+    def start(self) -> _DfaState:
+        return self._start
+
+    def is_dead(self, d: _DfaState) -> bool:
+        return d is self._dead
+
+    def next_state(self, d: _DfaState, c: str) -> _DfaState:
+        """
+        Returns the DFA state reached from `d` on character `c`, building it if necessary.
+        """
+        nxt = d.transitions.get(c)
+        if nxt is None:
+            nxt = self._compute(d, c)
+
+        return nxt
+
+    def match(self, _input: str) -> bool:
+        if not _input:
+            raise ValueError("Invalid input!")
+
+        if instrument.enabled:
+            return self._match_instrumented(_input)
+
+        flush_limit = self.flushes + self.max_flushes
+        dead = self._dead
+
+        d = self._start
+        for i, c in enumerate(_input):
+            nxt = d.transitions.get(c)
+            if nxt is None:
+                nxt = self._compute(d, c)
+                if self.flushes > flush_limit:
+                    return self._match_nfa(nxt.nfa_states, _input[i + 1:])
+
+            d = nxt
+            if d is dead:
+                return False
+
+        return d.accepting
+
+    def _match_instrumented(self, _input: str) -> bool:
+        stats = instrument.MatchStats('lazy_dfa')
+        start = perf_counter()
+        try:
+            flush_limit = self.flushes + self.max_flushes
+
+            d = self._start
+            stats.record_closure(d.nfa_states)
+            for i, c in enumerate(_input):
+                stats.chars += 1
+                nxt = d.transitions.get(c)
+                if nxt is None:
+                    stats.cache_misses += 1
+                    nxt = self._compute(d, c)
+                    if self.flushes > flush_limit:
+                        stats.engine = 'lazy_dfa+nfa_simulation'
+                        return self._match_nfa(nxt.nfa_states, _input[i + 1:])
+                else:
+                    stats.cache_hits += 1
+
+                d = nxt
+                stats.record_closure(d.nfa_states)
+                if d is self._dead:
+                    return False
+
+            return d.accepting
+        finally:
+            stats.seconds = perf_counter() - start
+            instrument.emit(stats)
+
+    def _compute(self, d: _DfaState, c: str) -> _DfaState:
+        closure = step(d.nfa_states, c)
+        if closure is None:
+            nxt = self._dead
+        else:
+            nxt = self._intern(frozenset(closure))
+
+        # `d` may have been dropped by a flush inside `_intern`; memoizing on it is harmless either way
+        d.transitions[c] = nxt
+        return nxt
+
+    def _intern(self, nfa_states: frozenset[State]) -> _DfaState:
+        d = self._cache.get(nfa_states)
+        if d is not None:
+            return d
+
+        if len(self._cache) >= self.cache_size:
+            self._flush()
+
+        d = _DfaState(nfa_states)
+        self._cache[nfa_states] = d
+        return d
+
+    def _flush(self):
+        self.flushes += 1
+        self._cache.clear()
+
+        # Re-create the start state so that no stale transitions keep the old states alive
+        self._start = _DfaState(self._start_closure)
+        self._cache[self._start_closure] = self._start
+
+    @staticmethod
+    def _match_nfa(closure: frozenset[State], rest: str) -> bool:
+        if not closure:
+            return False
+
+        for c in rest:
+            closure = step(closure, c)
+            if closure is None:
+                return False
+
+        return is_accepting(closure)
@@ -0,0 +1,195 @@
+from array import array
+
+from src.nfa_state import (State, LiteralState, CharClassState, CharSet, CounterState, SplitState, AcceptState,
+                           assign_state_ids, counter_masks)
+from src.post2nfa import post2nfa
+
+OP_LITERAL = 0
+OP_SPLIT = 1
+OP_ACCEPT = 2
+OP_CLASS = 3
+OP_COUNTER = 4
+
+
+class FlatNfa:
+    """
+    An NFA stored as parallel integer arrays, indexed by state ID.
+    - opcode: OP_LITERAL, OP_CLASS, OP_COUNTER, OP_SPLIT or OP_ACCEPT
+    - literal: code point of the literal, -1 if the state is not a literal state
+    - out1: next state of a literal, class or counter state, or the first next state of a split state; -1 if none
+    - out2: the second next state of a split state; -1 if none
+    - start: ID of the start state
+    - char_set: index in `char_sets` of the characters consumed by a class or counter state, -1 for other states
+    - char_sets: the distinct CharSets of the class and counter states
+    - counter: index in `counters` of the bounds of a counter state, -1 if the state is not a counter state
+    - counters: the distinct (m, n) bounds of the counter states, n is None if unbounded (see `CounterState`)
+    """
+    def __init__(self, opcode: array, literal: array, out1: array, out2: array, start: int = 0,
+                 char_set: array = None, char_sets: list[CharSet] = (), counter: array = None,
+                 counters: list[tuple[int, int | None]] = ()):
+        self.opcode = opcode
+        self.literal = literal
+        self.out1 = out1
+        self.out2 = out2
+        self.start = start
+        self.char_set = char_set if char_set is not None else array('i', [-1] * len(opcode))
+        self.char_sets = list(char_sets)
+        self.counter = counter if counter is not None else array('i', [-1] * len(opcode))
+        self.counters = list(counters)
+        self.counter_masks = [counter_masks(m, n) for m, n in self.counters]
+
+    def __len__(self):
+        return len(self.opcode)
+
+
+def flatten(start_state: State) -> FlatNfa:
+    """
+    Converts the NFA starting from `start_state` into a FlatNfa. State IDs are (re-)assigned by `assign_state_ids`,
+    so the start state gets ID 0.
+    """
+    if start_state is None:
+        raise ValueError("Invalid NFA!")
+
+    assign_state_ids(start_state)
+
+    states = {}
+    stack = [start_state]
+    while stack:
+        s = stack.pop()
+        if s.id in states:
+            continue
+        states[s.id] = s
+
+        if isinstance(s, (LiteralState, CharClassState, CounterState)):
+            stack.append(s.next_state)
+        elif isinstance(s, SplitState):
+            stack.append(s.next_state_1)
+            stack.append(s.next_state_2)
+
+    n = len(states)
+    opcode = array('i', [0] * n)
+    literal = array('i', [-1] * n)
+    out1 = array('i', [-1] * n)
+    out2 = array('i', [-1] * n)
+    char_set = array('i', [-1] * n)
+    char_set_ids = {}
+    counter = array('i', [-1] * n)
+    counter_ids = {}
+
+    for _id, s in states.items():
+        if isinstance(s, LiteralState):
+            opcode[_id] = OP_LITERAL
+            literal[_id] = ord(s.literal)
+            out1[_id] = s.next_state.id
+        elif isinstance(s, CharClassState):
+            opcode[_id] = OP_CLASS
+            char_set[_id] = char_set_ids.setdefault(s.chars, len(char_set_ids))
+            out1[_id] = s.next_state.id
+        elif isinstance(s, CounterState):
+            opcode[_id] = OP_COUNTER
+            char_set[_id] = char_set_ids.setdefault(s.chars, len(char_set_ids))
+            counter[_id] = counter_ids.setdefault((s.m, s.n), len(counter_ids))
+            out1[_id] = s.next_state.id
+        elif isinstance(s, SplitState):
+            opcode[_id] = OP_SPLIT
+            out1[_id] = s.next_state_1.id
+            out2[_id] = s.next_state_2.id
+        elif isinstance(s, AcceptState):
+            opcode[_id] = OP_ACCEPT
+        else:
+            raise ValueError("Cannot recognize State class!")
+
+    return FlatNfa(opcode, literal, out1, out2, start_state.id, char_set, list(char_set_ids), counter,
+                   list(counter_ids))
+
+
+def post2flat(postfix: str | None, counters: bool = False) -> FlatNfa | None:
+    """
+    Converts a postfix regular expression directly to a FlatNfa. Returns None for an invalid postfix expression.
+    """
+    start_state = post2nfa(postfix, counters)
+    if start_state is None:
+        return None
+
+    return flatten(start_state)
+
+
+def epsilon_closure_flat(nfa: FlatNfa, states, masks: dict[int, int] | None = None) -> set[int]:
+    """
+    Returns the states reachable from `states` through split states.
+    `masks` maps counter states to the lengths of their runs (see `CounterState`); the counters already in it belong
+    to the closure, and it is updated in place: entering a counter starts an empty run, and a counter whose runs may
+    end adds the state after it.
+    """
+    opcode, out1, out2 = nfa.opcode, nfa.out1, nfa.out2
+    counter, counter_masks = nfa.counter, nfa.counter_masks
+
+    if masks is None:
+        masks = {}
+
+    closure = set()
+    stack = list(states)
+    for s, mask in masks.items():
+        closure.add(s)
+        if mask & counter_masks[counter[s]][1]:
+            stack.append(out1[s])
+
+    while stack:
+        s = stack.pop()
+        if opcode[s] == OP_COUNTER:
+            mask = masks.get(s, 0)
+            if mask & 1:
+                continue
+            masks[s] = mask | 1
+            closure.add(s)
+            if counter_masks[counter[s]][1] & 1:
+                stack.append(out1[s])
+            continue
+
+        if s in closure:
+            continue
+        closure.add(s)
+
+        if opcode[s] == OP_SPLIT:
+            stack.append(out1[s])
+            stack.append(out2[s])
+
+    return closure
+
+
+def match_flat(nfa: FlatNfa, _input: str) -> bool:
+    if nfa is None:
+        raise ValueError("Invalid NFA!")
+
+    if not _input:
+        raise ValueError("Invalid input!")
+
+    opcode, literal, out1 = nfa.opcode, nfa.literal, nfa.out1
+    char_set, char_sets = nfa.char_set, nfa.char_sets
+    counter, counter_masks = nfa.counter, nfa.counter_masks
+
+    masks = {}
+    current = epsilon_closure_flat(nfa, [nfa.start], masks)
+    for c in _input:
+        code = ord(c)
+        next_states = []
+        next_masks = {}
+        for s in current:
+            if literal[s] == code or opcode[s] == OP_CLASS and c in char_sets[char_set[s]]:
+                next_states.append(out1[s])
+            elif opcode[s] == OP_COUNTER and c in char_sets[char_set[s]]:
+                full, _, saturate = counter_masks[counter[s]]
+                mask = (masks[s] << 1 | masks[s] & saturate) & full
+                if mask:
+                    next_masks[s] = mask
+
+        if not next_states and not next_masks:
+            return False
+        masks = next_masks
+        current = epsilon_closure_flat(nfa, next_states, masks)
+
+    for s in current:
+        if opcode[s] == OP_ACCEPT:
+            return True
+
+    return False
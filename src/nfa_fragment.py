@@ -0,0 +1,198 @@
+"""
+Partial NFAs, and the operations that combine them, shared by the Thompson constructions of `post2nfa` and `ast2nfa`.
+"""
+from src.nfa_state import State, LiteralState, CharClassState, CharSet, CounterState, SaveState, SplitState
+
+MAX_CLONED_STATES = 100000  # Most states counted repetitions may add to one NFA; the linear part is not counted
+MIN_COUNTER_BOUND = 8  # Smallest bound of a single-character repetition that `repeat` turns into a counter state
+
+
+class StateBudget:
+    """
+    The number of states counted repetitions may still clone while building one NFA. Nested bounds like
+    '(a{1000}){1000}' multiply the NFA size, so construction gives up instead of building millions of states.
+    """
+    __slots__ = ('remaining',)
+
+    def __init__(self, remaining: int = MAX_CLONED_STATES):
+        self.remaining = remaining
+
+
+class PatchList:
+    """
+    The open ends of a partial NFA, as a singly linked list with a tail pointer, so that two lists are spliced in O(1)
+    (the `Ptrlist` of Russ Cox's implementation, without walking to the end of the first list).
+    Nodes are [state, next node] pairs. A list that was spliced into another must not be used on its own any more.
+    """
+    __slots__ = ('head', 'tail')
+
+    def __init__(self, state: State):
+        self.head = self.tail = [state, None]
+
+    def splice(self, other: 'PatchList') -> 'PatchList':
+        self.tail[1] = other.head
+        self.tail = other.tail
+        return self
+
+    def __iter__(self):
+        node = self.head
+        while node is not None:
+            yield node[0]
+            node = node[1]
+
+
+class Fragment:
+    """
+    A partially built NFA without an accept state.
+    - start: starting state of the nfa
+    - ends: PatchList of open States that need to be connected
+    """
+    def __init__(self, start: State, open_ends: PatchList, accept: State = None):
+        self.start = start
+        self.open_ends = open_ends
+        self.accept = accept
+
+    def is_open(self):
+        return self.open_ends and (self.accept is None)
+
+    def is_closed(self):
+        return not self.is_open()
+
+
+def clone(nfa: Fragment, budget: StateBudget) -> Fragment:
+    """
+    Copies an open NFA fragment. All states reachable from `nfa.start` belong to the fragment.
+    Raises ValueError once the copies exceed `budget`.
+    """
+    copies = {}
+    stack = [nfa.start]
+    while stack:
+        s = stack.pop()
+        if s is None or s in copies:
+            continue
+        if len(copies) == budget.remaining:
+            raise ValueError("NFA too large: more than {} states from counted repetition".format(MAX_CLONED_STATES))
+
+        if isinstance(s, LiteralState):
+            copies[s] = LiteralState(s.literal)
+            stack.append(s.next_state)
+        elif isinstance(s, CharClassState):
+            copies[s] = CharClassState(s.chars)
+            stack.append(s.next_state)
+        elif isinstance(s, CounterState):
+            copies[s] = CounterState(s.chars, s.m, s.n)
+            stack.append(s.next_state)
+        elif isinstance(s, SaveState):
+            copies[s] = SaveState(s.slot)
+            stack.append(s.next_state)
+        elif isinstance(s, SplitState):
+            copies[s] = SplitState()
+            stack.append(s.next_state_1)
+            stack.append(s.next_state_2)
+        else:
+            raise ValueError("Cannot clone a closed NFA!")
+
+    budget.remaining -= len(copies)
+    for s, copy in copies.items():
+        if isinstance(s, (LiteralState, CharClassState, CounterState, SaveState)):
+            copy.next_state = copies.get(s.next_state)
+        else:
+            copy.next_state_1 = copies.get(s.next_state_1)
+            copy.next_state_2 = copies.get(s.next_state_2)
+
+    open_ends = None
+    for s in nfa.open_ends:
+        open_ends = PatchList(copies[s]) if open_ends is None else open_ends.splice(PatchList(copies[s]))
+
+    return Fragment(copies[nfa.start], open_ends)
+
+
+def concat(nfa1: Fragment, nfa2: Fragment) -> Fragment:
+    for end_state in nfa1.open_ends:
+        end_state.transition_to(nfa2.start)
+    nfa1.open_ends = nfa2.open_ends
+    return nfa1
+
+
+def _atom_chars(nfa: Fragment) -> CharSet | None:
+    """
+    Returns the characters consumed by `nfa` if it is a single literal or class state, None otherwise.
+    """
+    s = nfa.start
+    if isinstance(s, LiteralState) and s.next_state is None:
+        return CharSet([(ord(s.literal), ord(s.literal))])
+    if isinstance(s, CharClassState) and s.next_state is None:
+        return s.chars
+
+    return None
+
+
+def repeat(nfa: Fragment, m: int, n: int | None, budget: StateBudget, counters: bool = False) -> Fragment:
+    """
+    Builds nfa{m,n} (n is None for nfa{m,}) from m mandatory copies followed by either a loop, or n - m optional
+    copies whose skip edges all lead to the same exit: nfa{2,4} is built as nfa nfa (nfa (nfa)?)?.
+    The copies are charged to `budget`; they share the CharSets of the original.
+
+    With `counters`, a single literal or class state repeated up to at least MIN_COUNTER_BOUND times becomes one
+    counter state instead, so 'a{1,1000}' costs one state and a bitmask per thread rather than 1000 states. Every
+    engine runs counter states except `onepass`, which declines them, and `closure_index`, which rejects them.
+    """
+    if n == 0:
+        # Matches only the empty string: a split state whose both edges lead to the exit
+        s = SplitState()
+        return Fragment(s, PatchList(s).splice(PatchList(s)))
+
+    chars = _atom_chars(nfa) if counters and (m if n is None else n) >= MIN_COUNTER_BOUND else None
+    if chars is not None:
+        s = CounterState(chars, m, n)
+        return Fragment(s, PatchList(s))
+
+    n_copies = max(m, 1) if n is None else n
+    copies = [nfa] + [clone(nfa, budget) for _ in range(n_copies - 1)]
+
+    # mandatory part
+    result = None
+    for copy in copies[:m]:
+        result = copy if result is None else concat(result, copy)
+
+    if n is None:
+        # the last mandatory copy loops, as in '+'; with m == 0 the only copy loops as in '*'
+        if m == 0:
+            s = SplitState(copies[0].start, None)
+            for end_state in copies[0].open_ends:
+                end_state.transition_to(s)
+            return Fragment(s, PatchList(s))
+
+        last = copies[m - 1]
+        s = SplitState(last.start, None)
+        for end_state in result.open_ends:
+            end_state.transition_to(s)
+        result.open_ends = PatchList(s)
+        return result
+
+    # optional part, innermost copy first
+    optional = None
+    for copy in reversed(copies[m:]):
+        if optional is not None:
+            copy = concat(copy, optional)
+        s = SplitState(copy.start, None)
+        optional = Fragment(s, copy.open_ends.splice(PatchList(s)))
+
+    if optional is None:
+        return result
+    if result is None:
+        return optional
+
+    return concat(result, optional)
+
+
+def capture(nfa: Fragment, group: int) -> Fragment:
+    """
+    Wraps `nfa` between the save states of capturing group `group`.
+    """
+    start = SaveState(2 * group, nfa.start)
+    end = SaveState(2 * group + 1)
+    for end_state in nfa.open_ends:
+        end_state.transition_to(end)
+
+    return Fragment(start, PatchList(end))
@@ -0,0 +1,163 @@
+from src.nfa_state import State, LiteralState, CharClassState, CounterState, SaveState, SplitState, reachable_states
+
+MAX_RUN_LENGTH = 64  # Longest literal run stored on a state; longer chains are consumed in several runs
+
+
+def _redirect(start_state: State, target) -> State:
+    """
+    Replaces every edge to a state `s` with an edge to `target(s)`, and returns `target(start_state)`.
+    """
+    for s in reachable_states(start_state):
+        if isinstance(s, (LiteralState, CharClassState, CounterState, SaveState)):
+            s.next_state = target(s.next_state)
+        elif isinstance(s, SplitState):
+            s.next_state_1 = target(s.next_state_1)
+            s.next_state_2 = target(s.next_state_2)
+
+    return target(start_state)
+
+
+def remove_redundant_splits(start_state: State) -> State:
+    """
+    Bypasses split states that offer no choice: both edges lead to the same state, or one edge loops back to the
+    split itself. Such splits come from e.g. 'a{0}' and '(a{0})*'.
+    """
+    def target(s: State) -> State:
+        seen = set()
+        while isinstance(s, SplitState) and s not in seen:
+            seen.add(s)
+            if s.next_state_1 is s.next_state_2 or s.next_state_1 is s:
+                s = s.next_state_2
+            elif s.next_state_2 is s:
+                s = s.next_state_1
+            else:
+                break
+
+        return s
+
+    return _redirect(start_state, target)
+
+
+def _frontier(s: State) -> tuple[State, ...]:
+    """
+    Returns the non-split states of the epsilon closure of `s`, in priority order (`next_state_1` first).
+    """
+    frontier = []
+    visited = set()
+    stack = [s]
+    while stack:
+        s = stack.pop()
+        if s in visited:
+            continue
+        visited.add(s)
+
+        if isinstance(s, SplitState):
+            stack.append(s.next_state_2)
+            stack.append(s.next_state_1)
+        else:
+            frontier.append(s)
+
+    return tuple(frontier)
+
+
+def merge_epsilon_chains(start_state: State) -> State:
+    """
+    Replaces every tree, chain or cycle of split states by a single chain of k - 1 split states leading to the k
+    non-split states it can reach, shared by all edges that reach the same states. Epsilon cycles like '(a*)*' and
+    nested optionals like 'a??' disappear.
+
+    The pass leaves the NFA unchanged if merging would need more split states than there are, which can happen when
+    many overlapping closures (e.g. 'a?b?c?d?') share split states.
+    """
+    states = reachable_states(start_state)
+    n_splits = sum(isinstance(s, SplitState) for s in states)
+
+    chains = {}  # frontier -> head of its split chain
+
+    def chain(frontier: tuple[State, ...]) -> State:
+        head = chains.get(frontier)
+        if head is None:
+            head = frontier[-1]
+            for s in reversed(frontier[:-1]):
+                head = SplitState(s, head)
+            chains[frontier] = head
+
+        return head
+
+    # Edges into split states: the start state itself, and the out edges of every state
+    edges = [start_state]
+    for s in states:
+        if isinstance(s, (LiteralState, CharClassState, CounterState, SaveState)):
+            edges.append(s.next_state)
+        elif isinstance(s, SplitState):
+            edges.extend((s.next_state_1, s.next_state_2))
+
+    targets = {}  # split state -> its frontier
+    frontiers = set()
+    n_new_splits = 0
+    for nxt in edges:
+        if not isinstance(nxt, SplitState) or nxt in targets:
+            continue
+
+        frontier = _frontier(nxt)
+        if not frontier:
+            return start_state  # an epsilon cycle that leads nowhere; not produced by post2nfa
+
+        if frontier not in frontiers:
+            frontiers.add(frontier)
+            n_new_splits += len(frontier) - 1
+            if n_new_splits > n_splits:
+                return start_state
+        targets[nxt] = frontier
+
+    # Only consuming states need new edges; the old split states become unreachable
+    for s in states:
+        if isinstance(s, (LiteralState, CharClassState, CounterState, SaveState)) and isinstance(s.next_state, SplitState):
+            s.next_state = chain(targets[s.next_state])
+
+    if isinstance(start_state, SplitState):
+        return chain(targets[start_state])
+
+    return start_state
+
+
+def collapse_literal_runs(start_state: State) -> State:
+    """
+    Annotates each literal state followed by more literal states with `run = (text, exit_state)`, where `text` is
+    the string spelled by the chain (at most MAX_RUN_LENGTH characters) and `exit_state` the state after it. When the
+    literal state is the only active state, `nfa_simulation.match` consumes the whole run with one `str.startswith`.
+
+    States keep consuming one character each, so engines that ignore `run` are not affected.
+    """
+    for s in reachable_states(start_state):
+        if not isinstance(s, LiteralState):
+            continue
+
+        text = []
+        seen = set()
+        t = s
+        while isinstance(t, LiteralState) and t not in seen and len(text) < MAX_RUN_LENGTH:
+            seen.add(t)
+            text.append(t.literal)
+            t = t.next_state
+
+        s.run = (''.join(text), t) if len(text) > 1 and t not in seen else None
+
+    return start_state
+
+
+DEFAULT_PASSES = (remove_redundant_splits, merge_epsilon_chains, collapse_literal_runs)
+
+
+def optimize(start_state: State | None, passes=DEFAULT_PASSES) -> State | None:
+    """
+    Runs the optimization `passes` in order over the NFA starting from `start_state`, and returns the new start state.
+    The NFA is rewritten in place and accepts the same language; the accept state is preserved.
+    """
+    if start_state is None:
+        return None
+
+    for p in passes:
+        start_state = p(start_state)
+
+    return start_state
@@ -1,4 +1,56 @@
-from src.nfa_state import State, LiteralState, AcceptState, epsilon_closure
+from time import perf_counter
+from typing import Iterable
+
+from src import instrument
+from src.nfa_state import (State, LiteralState, CharClassState, CounterState, Count, SaveState, SplitState, AcceptState,
+                           epsilon_closure)
+from src.prefilter import next_candidate
+
+
+def step(closure: Iterable[State], c: str) -> set[State] | None:
+    """
+    Consumes character `c` from every state in `closure`.
+    Returns the epsilon closure of the states reached, or None if no state can consume `c`.
+    The runs of every counter state are advanced together, as one mask.
+    """
+    counts = []  # the counts that consume `c`, collected by the same pass (`append` returns None)
+    next_states = [s.next_state for s in closure
+                   if isinstance(s, LiteralState) and s.literal == c or isinstance(s, CharClassState) and c in s.chars
+                   or type(s) is Count and c in s.counter.chars and counts.append(s)]
+
+    if counts:
+        masks = {}  # counter state -> lengths of the runs that consume `c`
+        for s in counts:
+            masks[s.counter] = masks.get(s.counter, 0) | s.mask
+        for counter, mask in masks.items():
+            mask = counter.advance(mask)
+            if mask:
+                next_states.append(Count(counter, mask))
+
+    return epsilon_closure(next_states)
+
+
+def _consume(s: State, c: str) -> State | None:
+    """
+    Returns the state a thread in `s` moves to on character `c`, or None if `s` cannot consume `c`.
+    """
+    if isinstance(s, LiteralState):
+        return s.next_state if s.literal == c else None
+    if isinstance(s, CharClassState):
+        return s.next_state if c in s.chars else None
+    if isinstance(s, Count) and c in s.counter.chars:
+        mask = s.counter.advance(s.mask)
+        return Count(s.counter, mask) if mask else None
+
+    return None
+
+
+def is_accepting(closure: Iterable[State]) -> bool:
+    for s in closure:
+        if isinstance(s, AcceptState):
+            return True
+
+    return False
 
 
 def match(start_state: State, _input: str) -> bool:
@@ -8,15 +60,236 @@ def match(start_state: State, _input: str) -> bool:
     if not _input:
         raise ValueError("Invalid input!")
 
-    current_closure = epsilon_closure(start_state)
-    for c in _input:
-        valid_states = [s for s in current_closure if isinstance(s, LiteralState) and s.literal == c]
-        current_closure = epsilon_closure(valid_states)
+    if instrument.enabled:
+        return _match_instrumented(start_state, _input)
+
+    current_closure = epsilon_closure([start_state])
+    i = 0
+    while i < len(_input):
+        if len(current_closure) == 1:
+            # A lone literal state heading a run (see `nfa_optimize.collapse_literal_runs`) consumes it at once
+            s, = current_closure
+            run = s.run if isinstance(s, LiteralState) else None
+            if run is not None:
+                text, exit_state = run
+                if not _input.startswith(text, i):
+                    return False
+                i += len(text)
+                current_closure = epsilon_closure([exit_state])
+                continue
+
+        current_closure = step(current_closure, _input[i])
         if current_closure is None:
             return False
+        i += 1
 
-    for s in current_closure:
-        if isinstance(s, AcceptState):
-            return True
+    return is_accepting(current_closure)
 
-    return False
+
+def _match_instrumented(start_state: State, _input: str) -> bool:
+    stats = instrument.MatchStats('nfa_simulation')
+    start = perf_counter()
+    try:
+        current_closure = epsilon_closure([start_state])
+        stats.record_closure(current_closure)
+        for c in _input:
+            stats.chars += 1
+            current_closure = step(current_closure, c)
+            stats.record_closure(current_closure)
+            if current_closure is None:
+                return False
+
+        return is_accepting(current_closure)
+    finally:
+        stats.seconds = perf_counter() - start
+        instrument.emit(stats)
+
+
+def search(start_state: State, text: str, pos: int = 0, prefixes: list[str] | None = None) -> tuple[int, int] | None:
+    """
+    Finds the leftmost-longest substring of `text[pos:]` accepted by the NFA.
+    Returns its span as (start, end), or None if there is no match.
+
+    Each active state carries the earliest position its thread started at. New threads are started at every position
+    until a match is found; after that, only threads that started no later than the match are kept alive.
+
+    If `prefixes` is given (see `prefilter.required_prefixes`), every match must start with one of them, so whenever no
+    thread is alive the scan jumps straight to the next occurrence of a prefix.
+    """
+    if start_state is None:
+        raise ValueError("Invalid NFA!")
+
+    start_closure = epsilon_closure([start_state])
+    threads = {}  # state -> start position
+    best = None
+
+    i = pos
+    while i <= len(text):
+        if not threads and best is None and prefixes is not None:
+            i = next_candidate(text, prefixes, i)
+            if i < 0:
+                break
+
+        if best is None:
+            for s in start_closure:
+                threads.setdefault(s, i)
+
+        for s, start in threads.items():
+            if isinstance(s, AcceptState) and (best is None or start <= best[0]):
+                best = (start, i)
+
+        if best is not None:
+            threads = {s: start for s, start in threads.items() if start <= best[0]}
+            if not threads:
+                break
+
+        if i == len(text):
+            break
+
+        c = text[i]
+        next_threads = {}
+        masks = {}  # (counter state, start) -> lengths of the runs that consume `c`
+        for s, start in threads.items():
+            if type(s) is Count:
+                if c in s.counter.chars:
+                    masks[s.counter, start] = masks.get((s.counter, start), 0) | s.mask
+                continue
+
+            nxt = _consume(s, c)
+            if nxt is not None:
+                for t in epsilon_closure([nxt]):
+                    if t not in next_threads or start < next_threads[t]:
+                        next_threads[t] = start
+
+        # the runs of a counter that share a start advance together, as one mask
+        for (counter, start), mask in masks.items():
+            mask = counter.advance(mask)
+            if mask:
+                for t in epsilon_closure([Count(counter, mask)]):
+                    if t not in next_threads or start < next_threads[t]:
+                        next_threads[t] = start
+        threads = next_threads
+        i += 1
+
+    return best
+
+
+def finditer(start_state: State, text: str, pos: int = 0, prefixes: list[str] | None = None):
+    """
+    Yields the spans of all non-overlapping leftmost-longest matches in `text[pos:]`.
+    """
+    while pos <= len(text):
+        span = search(start_state, text, pos, prefixes)
+        if span is None:
+            return
+
+        yield span
+
+        start, end = span
+        pos = end if end > start else end + 1
+
+
+def _add_thread(threads: list, seen: set[State], state: State, slots: tuple, i: int):
+    """
+    Follows the epsilon edges from `state` in priority order (`next_state_1` first) and appends (s, slots) to
+    `threads` for every consuming or accept state `s` reached, unless a higher priority thread already reached it.
+
+    Slot tuples are shared between threads and copied only when a save state writes position `i` into one.
+    A thread inside a counter state stays there before it tries to leave, so counted repetitions are greedy.
+    """
+    stack = [(state, slots)]
+    while stack:
+        s, slots = stack.pop()
+        if s in seen:
+            continue
+        seen.add(s)
+
+        if isinstance(s, SplitState):
+            stack.append((s.next_state_2, slots))
+            stack.append((s.next_state_1, slots))
+        elif isinstance(s, SaveState):
+            if s.slot < len(slots):
+                slots = slots[:s.slot] + (i,) + slots[s.slot + 1:]
+            stack.append((s.next_state, slots))
+        elif isinstance(s, CounterState):
+            stack.append((Count(s, 1), slots))
+        else:
+            threads.append((s, slots))
+            if isinstance(s, Count) and s.mask & s.counter.exits:
+                stack.append((s.counter.next_state, slots))
+
+
+def _pike(start_state: State, text: str, n_groups: int, pos: int, anchored: bool) -> tuple | None:
+    """
+    Runs a Pike VM over `text[pos:]`: threads are kept in priority order and each one carries its capture slots.
+    Returns the slots of the leftmost-first match, or None. An anchored run must match the whole of `text[pos:]`.
+    """
+    threads = []
+    seen = set()
+    best = None
+
+    i = pos
+    while True:
+        if best is None and (i == pos or not anchored):
+            # a thread started here has a lower priority than every thread started earlier
+            _add_thread(threads, seen, start_state, (i,) + (None,) * (2 * n_groups + 1), i)
+
+        if not threads:
+            break
+
+        c = text[i] if i < len(text) else None
+        next_threads = []
+        next_seen = set()
+        for s, slots in threads:
+            if isinstance(s, AcceptState):
+                if not anchored or c is None:
+                    best = slots[:1] + (i,) + slots[2:]
+                    break  # the remaining threads have a lower priority
+            elif c is not None:
+                nxt = _consume(s, c)
+                if nxt is not None:
+                    _add_thread(next_threads, next_seen, nxt, slots, i + 1)
+
+        if c is None:
+            break
+        threads = next_threads
+        seen = next_seen
+        i += 1
+
+    return best
+
+
+def slot_spans(slots: tuple | None) -> list[tuple[int, int] | None] | None:
+    """
+    Turns capture slots into the span of each group, None for a group that did not take part.
+    """
+    if slots is None:
+        return None
+
+    return [(slots[k], slots[k + 1]) if slots[k + 1] is not None else None for k in range(0, len(slots), 2)]
+
+
+def capture_match(start_state: State, text: str, n_groups: int) -> list[tuple[int, int] | None] | None:
+    """
+    Matches the whole of `text` against an NFA built with capture save states (see `ast2nfa`).
+    Returns the span of every group, with the whole match as group 0 and None for a group that did not take part,
+    or None if `text` does not match. Like Python's `re`, alternatives and repetitions are leftmost-first.
+    Unlike `re`, a repeated group whose body can match the empty string does not get an extra empty last iteration:
+    on 'cc', '((.){0,2})+' gives group 1 the span (0, 2) where `re` gives (2, 2).
+    """
+    if start_state is None:
+        raise ValueError("Invalid NFA!")
+
+    return slot_spans(_pike(start_state, text, n_groups, 0, anchored=True))
+
+
+def capture_search(start_state: State, text: str, n_groups: int,
+                   pos: int = 0) -> list[tuple[int, int] | None] | None:
+    """
+    Finds the leftmost-first match in `text[pos:]` and returns the spans of its groups, as `capture_match` does.
+    The time is O(len(text) * number of states), whatever the pattern.
+    """
+    if start_state is None:
+        raise ValueError("Invalid NFA!")
+
+    return slot_spans(_pike(start_state, text, n_groups, pos, anchored=False))
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_right
 from typing import Iterable
 from collections import deque
 
@@ -18,6 +19,7 @@ class LiteralState(State):
         self.literal = literal
         self.next_state = next_state
         self.id = _id
+        self.run = None  # (text, exit_state) of the chain of literal states starting here, see `collapse_literal_runs`
 
     def transition_to(self, s: State):
         if self.next_state is None:
@@ -27,6 +29,146 @@ class LiteralState(State):
         raise ValueError("Transition to {} already exists!".format(self.next_state))
 
 
+class CharSet:
+    """
+    An immutable set of characters given as code point ranges.
+    - ranges: sorted, disjoint and non-adjacent (lo, hi) pairs, both bounds inclusive
+    ASCII characters are tested against a bitmap, others by bisecting the range starts.
+    """
+    __slots__ = ('ranges', '_starts', '_ascii')
+
+    def __init__(self, ranges: Iterable[tuple[int, int]]):
+        self.ranges = tuple(ranges)
+        self._starts = [lo for lo, _ in self.ranges]
+
+        bitmap = 0
+        for lo, hi in self.ranges:
+            for code in range(lo, min(hi, 127) + 1):
+                bitmap |= 1 << code
+        self._ascii = bitmap
+
+    def __contains__(self, c: str) -> bool:
+        code = ord(c)
+        if code < 128:
+            return (self._ascii >> code) & 1 == 1
+
+        i = bisect_right(self._starts, code) - 1
+        return i >= 0 and code <= self.ranges[i][1]
+
+    def __len__(self) -> int:
+        return sum(hi - lo + 1 for lo, hi in self.ranges)
+
+    def __eq__(self, other):
+        return isinstance(other, CharSet) and self.ranges == other.ranges
+
+    def __hash__(self):
+        return hash(self.ranges)
+
+    def __repr__(self):
+        return "CharSet({!r})".format(self.ranges)
+
+
+class CharClassState(State):
+    """
+    Consumes one character of `chars`, e.g. for '[a-z0-9]', '[^,]' or '.'.
+    """
+    def __init__(self, chars: CharSet, next_state: State = None, _id=None):
+        super().__init__()
+        self.chars = chars
+        self.next_state = next_state
+        self.id = _id
+
+    def transition_to(self, s: State):
+        if self.next_state is None:
+            self.next_state = s
+            return
+
+        raise ValueError("Transition to {} already exists!".format(self.next_state))
+
+
+def counter_masks(m: int, n: int | None) -> tuple[int, int, int]:
+    """
+    Returns the masks of a counter of m to n characters (at least m if n is None), see `CounterState`:
+    - full: every length worth tracking, 0 to n, or 0 to m without an upper bound
+    - exits: the lengths after which the run may end
+    - saturate: bit m without an upper bound, where runs of m or more stay after one more character; 0 otherwise
+    One more character turns `mask` into `(mask << 1 | mask & saturate) & full`.
+    """
+    top = m if n is None else n
+    full = (1 << (top + 1)) - 1
+    return full, full >> m << m, 1 << m if n is None else 0
+
+
+class CounterState(State):
+    """
+    Consumes a run of m to n characters of `chars` (at least m if n is None), e.g. for '[0-9]{2,200}', with one state
+    instead of n copies. The lengths a thread may have consumed so far are tracked as a bitmask (see `Count`): bit k
+    is set for a run of k characters, and without an upper bound bit m stands for m or more.
+    """
+    def __init__(self, chars: CharSet, m: int, n: int | None, next_state: State = None, _id=None):
+        super().__init__()
+        self.chars = chars
+        self.m = m
+        self.n = n
+        self.next_state = next_state
+        self.id = _id
+        self.full, self.exits, self.saturate = counter_masks(m, n)
+
+    def advance(self, mask: int) -> int:
+        """
+        Returns the lengths of the runs in `mask` after consuming one more character; 0 if every run is too long.
+        """
+        return (mask << 1 | mask & self.saturate) & self.full
+
+    def transition_to(self, s: State):
+        if self.next_state is None:
+            self.next_state = s
+            return
+
+        raise ValueError("Transition to {} already exists!".format(self.next_state))
+
+
+class Count:
+    """
+    A thread inside a counter state: `mask` holds the lengths of the runs it may have consumed so far.
+    Counts are values, so threads with the same lengths are merged like threads in the same state.
+    Engines find them in epsilon closures next to ordinary states; they are never part of the NFA itself.
+    """
+    __slots__ = ('counter', 'mask')
+
+    def __init__(self, counter: CounterState, mask: int):
+        self.counter = counter
+        self.mask = mask
+
+    def __eq__(self, other):
+        return isinstance(other, Count) and self.counter is other.counter and self.mask == other.mask
+
+    def __hash__(self):
+        return hash((id(self.counter), self.mask))
+
+    def __repr__(self):
+        return "Count({!r}, {:b})".format(self.counter, self.mask)
+
+
+class SaveState(State):
+    """
+    An epsilon transition that records the current input position in capture slot `slot`.
+    Group k starts at slot 2k and ends at slot 2k + 1; engines without captures treat it like a split with one edge.
+    """
+    def __init__(self, slot: int, next_state: State = None, _id=None):
+        super().__init__()
+        self.slot = slot
+        self.next_state = next_state
+        self.id = _id
+
+    def transition_to(self, s: State):
+        if self.next_state is None:
+            self.next_state = s
+            return
+
+        raise ValueError("Transition to {} already exists!".format(self.next_state))
+
+
 class SplitState(State):
     def __init__(self, next_state_1: State = None, next_state_2: State = None, _id=None):
         super().__init__()
@@ -75,7 +217,7 @@ def assign_state_ids(start_state: State, start_id: int = 0):
         state.id = _id
         _id += 1
 
-        if isinstance(state, LiteralState):
+        if isinstance(state, (LiteralState, CharClassState, CounterState, SaveState)):
             queue.append(state.next_state)
         elif isinstance(state, SplitState):
             queue.append(state.next_state_1)
@@ -86,7 +228,34 @@ def assign_state_ids(start_state: State, start_id: int = 0):
     return
 
 
+def reachable_states(start_state: State) -> list[State]:
+    """
+    Returns every state reachable from `start_state`, in DFS order.
+    """
+    states = []
+    visited = set()
+    stack = [start_state]
+    while stack:
+        s = stack.pop()
+        if s is None or s in visited:
+            continue
+        visited.add(s)
+        states.append(s)
+
+        if isinstance(s, (LiteralState, CharClassState, CounterState, SaveState)):
+            stack.append(s.next_state)
+        elif isinstance(s, SplitState):
+            stack.append(s.next_state_2)
+            stack.append(s.next_state_1)
+
+    return states
+
+
 def epsilon_closure(states: Iterable[State]) -> set[State]:
+    """
+    Returns `states` and every state reachable from them through epsilon edges. Entering a counter state adds a
+    `Count` for the empty run, and a `Count` whose run may end adds the state after the counter.
+    """
     if not states:
         return None
 
@@ -104,6 +273,13 @@ def epsilon_closure(states: Iterable[State]) -> set[State]:
         if isinstance(s, SplitState):
             stack.append(s.next_state_1)
             stack.append(s.next_state_2)
+        elif isinstance(s, SaveState):
+            stack.append(s.next_state)
+        elif type(s) is Count:
+            if s.mask & s.counter.exits:
+                stack.append(s.counter.next_state)
+        elif type(s) is CounterState:
+            stack.append(Count(s, 1))
 
     return closure
 
@@ -122,6 +298,12 @@ def epsilon_closure_recursive(states: Iterable[State]) -> set[State]:
             if isinstance(_s, SplitState):
                 _calculate_closure(_s.next_state_1)
                 _calculate_closure(_s.next_state_2)
+            elif isinstance(_s, SaveState):
+                _calculate_closure(_s.next_state)
+            elif isinstance(_s, CounterState):
+                _calculate_closure(Count(_s, 1))
+            elif isinstance(_s, Count) and _s.mask & _s.counter.exits:
+                _calculate_closure(_s.counter.next_state)
 
         return
 
@@ -1,6 +1,6 @@
 from collections import deque
 
-from src.nfa_state import State, LiteralState, SplitState, AcceptState, assign_state_ids
+from src.nfa_state import State, LiteralState, CharClassState, CounterState, SaveState, SplitState, AcceptState, assign_state_ids
 
 
 def nfa2str(start_state: State, assign_ids: bool = False, start_id: int = 0):
@@ -26,6 +26,25 @@ def nfa2str(start_state: State, assign_ids: bool = False, start_id: int = 0):
             text = "[id:{:02d}][Lit] --- {} ---> [id:{:02d}]".format(_id, state.literal, next_id)
             output.append(text)
 
+            queue.append(state.next_state)
+        elif isinstance(state, (CharClassState, CounterState)):
+            next_id = state.next_state.id
+
+            ranges = ",".join(chr(lo) if lo == hi else "{}-{}".format(chr(lo), chr(hi)) for lo, hi in state.chars.ranges)
+            if isinstance(state, CharClassState):
+                text = "[id:{:02d}][Cls] --- [{}] ---> [id:{:02d}]".format(_id, ranges, next_id)
+            else:
+                bound = "{},".format(state.m) if state.n is None else "{},{}".format(state.m, state.n)
+                text = "[id:{:02d}][Cnt] --- [{}]{{{}}} ---> [id:{:02d}]".format(_id, ranges, bound, next_id)
+            output.append(text)
+
+            queue.append(state.next_state)
+        elif isinstance(state, SaveState):
+            next_id = state.next_state.id
+
+            text = "[id:{:02d}][Sav] --- {} ---> [id:{:02d}]".format(_id, u'\u03B5', next_id)
+            output.append(text)
+
             queue.append(state.next_state)
         elif isinstance(state, SplitState):
             next_id_1 = state.next_state_1.id
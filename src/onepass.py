@@ -0,0 +1,149 @@
+from array import array
+
+from src.nfa_state import State, LiteralState, CharClassState, CounterState, SaveState, SplitState, AcceptState
+from src.nfa_simulation import slot_spans
+from src.alphabet import CharClasses, char_classes
+
+DEFAULT_MAX_NODES = 1000  # The analysis gives up on NFAs needing more one-pass DFA states than this
+
+
+class OnePassDfa:
+    """
+    A DFA for a one-pass NFA: one where, at every step of a match, at most one thread can consume the next character.
+    Each transition carries the capture slots the lone thread would save on its way to the consuming state.
+    - classes: the character classes of the alphabet
+    - n_columns: number of columns in a row of `table`
+    - table: `table[node * n_columns + column]` is the next node, or -1 if the match fails
+    - actions: `actions[node * n_columns + column]` are the slots set to the current position before consuming
+    - accept_actions: `accept_actions[node]` are the slots set at the end of the input, or None if `node` cannot accept
+    - n_groups: number of capturing groups
+    """
+    def __init__(self, classes: CharClasses, table: array, actions: list[tuple[int, ...]],
+                 accept_actions: list[tuple[int, ...] | None], n_groups: int):
+        self.classes = classes
+        self.n_columns = classes.n_classes
+        self.table = table
+        self.actions = actions
+        self.accept_actions = accept_actions
+        self.n_groups = n_groups
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.accept_actions)
+
+    def match(self, text: str) -> list[tuple[int, int] | None] | None:
+        """
+        Matches the whole of `text`, with the same result as `nfa_simulation.capture_match` on the NFA.
+        """
+        table = self.table
+        actions = self.actions
+        n_columns = self.n_columns
+        memo = self.classes.memo
+        classify = self.classes.classify
+
+        slots = [None] * (2 * self.n_groups + 2)
+        slots[0] = 0
+        node = 0
+        for i, c in enumerate(text):
+            column = memo.get(c)
+            if column is None:
+                column = classify(c)
+
+            k = node * n_columns + column
+            node = table[k]
+            if node < 0:
+                return None
+            for slot in actions[k]:
+                slots[slot] = i
+
+        final = self.accept_actions[node]
+        if final is None:
+            return None
+        for slot in final:
+            slots[slot] = len(text)
+        slots[1] = len(text)
+
+        return slot_spans(slots)
+
+
+def _closure(root: State, n_slots: int) -> list[tuple[State, tuple[int, ...]]]:
+    """
+    Returns the consuming and accept states reachable from `root` by epsilon edges, in priority order, each with the
+    slots saved on the highest priority path to it.
+    """
+    reached = []
+    seen = set()
+    stack = [(root, ())]
+    while stack:
+        s, path = stack.pop()
+        if s in seen:
+            continue
+        seen.add(s)
+
+        if isinstance(s, SplitState):
+            stack.append((s.next_state_2, path))
+            stack.append((s.next_state_1, path))
+        elif isinstance(s, SaveState):
+            stack.append((s.next_state, path + (s.slot,) if s.slot < n_slots else path))
+        else:
+            reached.append((s, path))
+
+    return reached
+
+
+def onepass_dfa(start_state: State, n_groups: int, max_nodes: int = DEFAULT_MAX_NODES) -> OnePassDfa | None:
+    """
+    Compiles an NFA with capture save states (see `post2nfa` and `ast2nfa`) into a OnePassDfa.
+    Returns None if the NFA is not one-pass, or would need more than `max_nodes` DFA states.
+
+    A node stands for the target of a consuming state's edge (or the start state); since a single thread is alive at
+    a time, no subset construction is needed and there are at most as many nodes as NFA states.
+    """
+    if start_state is None:
+        raise ValueError("Invalid NFA!")
+
+    classes = char_classes(start_state)
+    representatives = classes.representatives()
+    n_columns = classes.n_classes
+    n_slots = 2 * n_groups + 2
+
+    node_ids = {start_state: 0}
+    roots = [start_state]
+    table = array('i')
+    actions = []
+    accept_actions = []
+
+    i = 0
+    while i < len(roots):
+        row = [-1] * n_columns  # column 0 (characters no state consumes) always fails
+        row_actions = [()] * n_columns
+        final = None
+
+        for s, path in _closure(roots[i], n_slots):
+            if isinstance(s, AcceptState):
+                final = path
+                continue
+            if isinstance(s, CounterState):
+                return None  # a node cannot tell how many characters a counter has consumed
+
+            for column in range(1, n_columns):
+                c = representatives[column]
+                if isinstance(s, LiteralState) and s.literal != c or isinstance(s, CharClassState) and c not in s.chars:
+                    continue
+                if row[column] >= 0:
+                    return None  # two threads could consume the same character
+
+                if s.next_state not in node_ids:
+                    if len(roots) == max_nodes:
+                        return None
+                    node_ids[s.next_state] = len(roots)
+                    roots.append(s.next_state)
+                row[column] = node_ids[s.next_state]
+                row_actions[column] = path
+
+        table.extend(row)
+        actions.extend(row_actions)
+        accept_actions.append(final)
+        i += 1
+
+    return OnePassDfa(classes, table, actions, accept_actions, n_groups)
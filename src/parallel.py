@@ -0,0 +1,181 @@
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+from src.alphabet import CharClasses
+from src.dfa import Dfa
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # characters (or bytes, for files) per task
+
+_worker = {}  # per-process state, set up by `_init_worker`
+
+
+def _converge(dfa: Dfa, chunk: str) -> tuple[int, dict[int, list[int]]]:
+    """
+    Runs `chunk` from every live state of `dfa` at once, merging runs that reach the same state, until at most one
+    live run is left. Runs that reach the dead state are dropped, since the dead state maps to itself.
+    Returns (i, groups): the number of characters read, and current state -> states the runs started from.
+    """
+    table, n_columns = dfa.table, dfa.n_columns
+    memo, classify = dfa.classes.memo, dfa.classes.classify
+    dead = dfa.dead
+
+    groups = {s: [s] for s in range(dfa.n_states) if s != dead}
+
+    i = 0
+    while i < len(chunk) and len(groups) > 1:
+        column = memo.get(chunk[i])
+        if column is None:
+            column = classify(chunk[i])
+
+        following = {}
+        for current, starts in groups.items():
+            nxt = table[current * n_columns + column]
+            if nxt == dead:
+                continue
+            merged = following.get(nxt)
+            if merged is None:
+                following[nxt] = starts
+            else:
+                merged.extend(starts)
+        groups = following
+        i += 1
+
+    return i, groups
+
+
+def chunk_mapping(dfa: Dfa, chunk: str) -> list[int]:
+    """
+    Runs `chunk` from every state of `dfa` at once. Returns `mapping`, where `mapping[s]` is the state reached
+    from `s` after reading `chunk`.
+
+    Runs that reach the same state are merged and runs that reach the dead state are dropped, so the work quickly
+    drops to a single run per chunk.
+    """
+    table, n_columns = dfa.table, dfa.n_columns
+    memo, classify = dfa.classes.memo, dfa.classes.classify
+    dead = dfa.dead
+
+    i, groups = _converge(dfa, chunk)
+
+    if groups and i < len(chunk):  # all live runs have converged
+        (current, starts), = groups.items()
+        for c in chunk[i:]:
+            column = memo.get(c)
+            if column is None:
+                column = classify(c)
+            current = table[current * n_columns + column]
+            if current == dead:
+                break
+        groups = {current: starts}
+
+    mapping = [dead] * dfa.n_states  # the dead state, and every run dropped on the way, end in the dead state
+    for current, starts in groups.items():
+        for s in starts:
+            mapping[s] = current
+
+    return mapping
+
+
+def _init_worker(table_name: str, accepting: list[bool], dead: int, boundaries: list[int],
+                 interval_class: list[int], text_name: str | None):
+    # The transition table (and the text) are attached from shared memory instead of being pickled per task
+    table_memory = SharedMemory(table_name)
+    table = table_memory.buf.cast('i')
+    # Workers only compute state mappings, so the start state is not needed
+    dfa = Dfa(CharClasses(boundaries, interval_class), table, accepting, 0, dead)
+
+    _worker['memory'] = [table_memory]
+    _worker['dfa'] = dfa
+    if text_name is not None:
+        text_memory = SharedMemory(text_name)
+        _worker['memory'].append(text_memory)
+        _worker['text'] = text_memory.buf
+
+
+def _scan_text_chunk(task: tuple[int, int]) -> list[int]:
+    start, end = task
+    # the text is stored as UTF-32, 4 bytes per character
+    chunk = str(_worker['text'][start * 4:end * 4], 'utf-32-le')
+    return chunk_mapping(_worker['dfa'], chunk)
+
+
+def _scan_file_chunk(task: tuple[str, int, int]) -> list[int]:
+    path, start, end = task
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            chunk = str(mm[start:end], 'utf-8')
+    return chunk_mapping(_worker['dfa'], chunk)
+
+
+def _stitch(dfa: Dfa, mappings) -> bool:
+    s = dfa.start
+    for mapping in mappings:
+        s = mapping[s]
+
+    return dfa.accepting[s]
+
+
+def _run(dfa: Dfa, scan, tasks: list, workers: int | None, text: str | None) -> bool:
+    table_memory = SharedMemory(create=True, size=max(1, len(dfa.table) * dfa.table.itemsize))
+    text_memory = None
+    try:
+        table_memory.buf[:len(dfa.table) * dfa.table.itemsize] = dfa.table.tobytes()
+        if text is not None:
+            data = text.encode('utf-32-le')
+            text_memory = SharedMemory(create=True, size=max(1, len(data)))
+            text_memory.buf[:len(data)] = data
+
+        initargs = (table_memory.name, dfa.accepting, dfa.dead, dfa.classes.boundaries,
+                    dfa.classes.interval_class, text_memory.name if text_memory is not None else None)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+            return _stitch(dfa, pool.map(scan, tasks))
+    finally:
+        for memory in (table_memory, text_memory):
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+
+
+def parallel_match(dfa: Dfa, text: str, workers: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> bool:
+    """
+    Tells if the whole `text` matches `dfa`, scanning chunks of `text` in worker processes.
+
+    Every chunk is run from every DFA state (see `chunk_mapping`), so chunks do not depend on each other; the
+    per-chunk state mappings are then composed in order to get the exact result.
+    """
+    if not text:
+        return dfa.accepting[dfa.start]
+
+    tasks = [(i, min(i + chunk_size, len(text))) for i in range(0, len(text), chunk_size)]
+    if len(tasks) == 1 or workers == 1:
+        return _stitch(dfa, [chunk_mapping(dfa, text)])
+
+    return _run(dfa, _scan_text_chunk, tasks, workers, text)
+
+
+def parallel_match_file(dfa: Dfa, path: str, workers: int | None = None,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> bool:
+    """
+    Like `parallel_match`, for the UTF-8 content of the file at `path`. Workers map the file themselves.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return dfa.accepting[dfa.start]
+
+    # Move each cut forward past UTF-8 continuation bytes, so that no character is split between chunks
+    cuts = [0]
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = chunk_size
+            while pos < size:
+                while pos < size and mm[pos] & 0xC0 == 0x80:
+                    pos += 1
+                if pos < size:
+                    cuts.append(pos)
+                pos += chunk_size
+    cuts.append(size)
+
+    tasks = [(path, cuts[i], cuts[i + 1]) for i in range(len(cuts) - 1)]
+    return _run(dfa, _scan_file_chunk, tasks, workers, None)
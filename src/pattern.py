@@ -0,0 +1,189 @@
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from src import instrument
+from src.re2ast import re2ast, count_groups
+from src.ast2nfa import ast2nfa
+from src.nfa_optimize import optimize
+from src.nfa_state import State
+from src.nfa_simulation import capture_match, capture_search
+from src.prefilter import required_prefixes
+from src.onepass import onepass_dfa
+from src.dfa_search import DfaSearch
+from src.lazy_dfa import LazyDfa
+from src.stream import StreamMatcher
+
+DEFAULT_CACHE_SIZE = 512  # Max number of compiled patterns kept by `compile`
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class Pattern:
+    """
+    A compiled regular expression. Instances are immutable and can be shared freely.
+    """
+    __slots__ = ('_pattern', '_start_state', '_dfa', '_searcher', '_prefixes', '_groups', '_capture_state', '_onepass')
+
+    def __init__(self, pattern: str):
+        with instrument.timed('parse'):
+            node = re2ast(pattern)
+            groups = count_groups(node)
+        with instrument.timed('ast2nfa'):
+            start_state = ast2nfa(node, counters=True)
+            # Only group extraction needs save states; without groups both NFAs would be the same. The capture NFA
+            # unrolls counted repetitions, which the one-pass DFA needs.
+            capture_state = ast2nfa(node, captures=True) if groups else None
+        with instrument.timed('optimize'):
+            start_state = optimize(start_state)
+            capture_state = optimize(capture_state) if groups else start_state
+
+        object.__setattr__(self, '_pattern', pattern)
+        object.__setattr__(self, '_start_state', start_state)
+        object.__setattr__(self, '_dfa', LazyDfa(start_state))
+        object.__setattr__(self, '_prefixes', required_prefixes(start_state))
+        object.__setattr__(self, '_searcher', DfaSearch(start_state, self._prefixes))
+        object.__setattr__(self, '_groups', groups)
+        object.__setattr__(self, '_capture_state', capture_state)
+        object.__setattr__(self, '_onepass', onepass_dfa(capture_state, groups) if groups else None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Pattern objects are immutable!")
+
+    def __repr__(self):
+        return "compile({!r})".format(self._pattern)
+
+    def __eq__(self, other):
+        return isinstance(other, Pattern) and self._pattern == other._pattern
+
+    def __hash__(self):
+        return hash(self._pattern)
+
+    @property
+    def pattern(self) -> str:
+        return self._pattern
+
+    @property
+    def start_state(self) -> State:
+        return self._start_state
+
+    @property
+    def groups(self) -> int:
+        return self._groups
+
+    @property
+    def prefixes(self) -> list[str] | None:
+        return self._prefixes
+
+    def match(self, string: str) -> bool:
+        """
+        Tells if the whole `string` matches the pattern.
+        """
+        if not string:
+            return self._dfa.start.accepting
+
+        if instrument.enabled:
+            with instrument.timed('simulation'):
+                return self._dfa.match(string)
+
+        return self._dfa.match(string)
+
+    def stream(self, encoding: str = 'utf-8') -> StreamMatcher:
+        """
+        Returns a StreamMatcher that matches chunked input against the pattern, sharing this pattern's DFA cache.
+        """
+        return StreamMatcher(self._dfa, encoding)
+
+    def search(self, string: str, pos: int = 0) -> tuple[int, int] | None:
+        """
+        Returns the span of the leftmost-longest match in `string[pos:]`, or None if there is no match.
+        The end is found by a forward DFA and the start by a DFA over the reversed NFA (see `DfaSearch`).
+        """
+        return self._searcher.search(string, pos)
+
+    def finditer(self, string: str, pos: int = 0):
+        """
+        Yields the spans of all non-overlapping leftmost-longest matches in `string[pos:]`.
+        """
+        return self._searcher.finditer(string, pos)
+
+    def match_groups(self, string: str) -> list[tuple[int, int] | None] | None:
+        """
+        Matches the whole `string` and returns the span of every group (group 0 is the whole match, None for a group
+        that did not take part), or None if it does not match. Groups are resolved leftmost-first, as in `re`, except
+        for repeated groups that can match the empty string (see `nfa_simulation.capture_match`).
+        One-pass patterns (see `onepass`) are matched by a DFA instead of the Pike VM.
+        """
+        if self._onepass is not None:
+            return self._onepass.match(string)
+
+        return capture_match(self._capture_state, string, self._groups)
+
+    def search_groups(self, string: str, pos: int = 0) -> list[tuple[int, int] | None] | None:
+        """
+        Returns the group spans of the leftmost-first match in `string[pos:]`, or None if there is no match.
+        Unlike `search`, which returns the leftmost-longest match, this picks the leftmost-first match, the one
+        `re.search` would, except for repeated groups that can match the empty string (see `match_groups`).
+        """
+        return capture_search(self._capture_state, string, self._groups, pos)
+
+
+_cache = OrderedDict()
+_cache_lock = Lock()
+_cache_size = DEFAULT_CACHE_SIZE
+_hits = 0
+_misses = 0
+
+
+def compile(pattern: str) -> Pattern:
+    """
+    Returns the compiled Pattern of `pattern`. Recently used patterns are served from a bounded LRU cache.
+    """
+    global _hits, _misses
+
+    with _cache_lock:
+        p = _cache.get(pattern)
+        if p is not None:
+            _cache.move_to_end(pattern)
+            _hits += 1
+            return p
+        _misses += 1
+
+    # Compile outside the lock; a concurrent compile of the same pattern just does duplicate work
+    p = Pattern(pattern)
+
+    with _cache_lock:
+        _cache[pattern] = p
+        _cache.move_to_end(pattern)
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+
+    return p
+
+
+def cache_info() -> CacheInfo:
+    with _cache_lock:
+        return CacheInfo(_hits, _misses, _cache_size, len(_cache))
+
+
+def set_cache_size(size: int):
+    global _cache_size
+
+    if size < 0:
+        raise ValueError("Cache size must be non-negative!")
+
+    with _cache_lock:
+        _cache_size = size
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+
+
+def purge():
+    """
+    Clears the compile cache and resets its statistics.
+    """
+    global _hits, _misses
+
+    with _cache_lock:
+        _cache.clear()
+        _hits = 0
+        _misses = 0
@@ -0,0 +1,160 @@
+from array import array
+
+from src.nfa_array import FlatNfa, OP_SPLIT, OP_ACCEPT, OP_CLASS, OP_COUNTER
+
+
+class SparseSet:
+    """
+    A set of state IDs in [0, capacity) with O(1) insert, membership test and clear.
+    - dense: members in insertion order; only `dense[:size]` is meaningful
+    - mark: `mark[i] == generation` iff `i` is a member
+
+    `clear` bumps the generation instead of touching the arrays, so a set is allocated once and reused for every step.
+    """
+    __slots__ = ('dense', 'mark', 'size', 'generation')
+
+    def __init__(self, capacity: int):
+        self.dense = array('i', [0] * capacity)
+        self.mark = array('q', [0] * capacity)
+        self.size = 0
+        self.generation = 1
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, i: int):
+        return self.mark[i] == self.generation
+
+    def __iter__(self):
+        dense = self.dense
+        for k in range(self.size):
+            yield dense[k]
+
+    def add(self, i: int) -> bool:
+        """
+        Inserts `i`. Returns False if `i` is already a member.
+        """
+        if self.mark[i] == self.generation:
+            return False
+
+        self.mark[i] = self.generation
+        self.dense[self.size] = i
+        self.size += 1
+        return True
+
+    def clear(self):
+        self.size = 0
+        self.generation += 1
+
+
+def thread_stack(nfa: FlatNfa) -> array:
+    """
+    Allocates a stack for `add_thread`. A state is expanded at most once per call, and only a split grows the stack
+    (by one entry: it is popped and pushes two successors), so len(nfa) + 1 entries always suffice.
+    """
+    return array('i', [0] * (len(nfa) + 1))
+
+
+def add_thread(nfa: FlatNfa, states: SparseSet, s: int, stack: array | None = None, masks: list[int] | None = None):
+    """
+    Adds `s` and every state reachable from it through split states to `states`, in a single pass.
+    Split states are added as well, so that each of them is followed at most once per step.
+    `stack` (see `thread_stack`) is reused between calls; one is allocated if it is not given.
+    `masks` holds the run lengths of the counter states in `states` (see `CounterState`), and is required if the NFA
+    has counters: entering a counter starts an empty run.
+    """
+    opcode, out1, out2 = nfa.opcode, nfa.out1, nfa.out2
+    if stack is None:
+        stack = thread_stack(nfa)
+
+    stack[0] = s
+    top = 1
+    while top:
+        top -= 1
+        s = stack[top]
+        if opcode[s] == OP_COUNTER:
+            if states.add(s):
+                masks[s] = 1
+            elif masks[s] & 1:
+                continue
+            else:
+                masks[s] |= 1
+            if nfa.counter_masks[nfa.counter[s]][1] & 1:
+                stack[top] = out1[s]
+                top += 1
+            continue
+
+        if not states.add(s):
+            continue
+
+        if opcode[s] == OP_SPLIT:
+            # out1 is pushed last so it is followed first
+            stack[top] = out2[s]
+            stack[top + 1] = out1[s]
+            top += 2
+
+
+def _add_runs(nfa: FlatNfa, states: SparseSet, s: int, mask: int, stack: array, masks: list[int]):
+    """
+    Adds the runs of lengths `mask` to counter state `s`, and the state after it if one of them may end.
+    """
+    if states.add(s):
+        masks[s] = mask
+    else:
+        mask &= ~masks[s]
+        masks[s] |= mask
+
+    if mask & nfa.counter_masks[nfa.counter[s]][1]:
+        add_thread(nfa, states, nfa.out1[s], stack, masks)
+
+
+def pike_match(nfa: FlatNfa, _input: str) -> bool:
+    """
+    Simulates `nfa` on `_input` with two preallocated sparse sets that are swapped on every step, and one preallocated
+    stack for following split states. Runs in O(len(_input) * len(nfa)) and allocates no containers per character.
+    The run lengths of counter states are kept in two preallocated lists swapped along with the sets, and all the runs
+    of a counter advance together with one shift of their mask.
+    """
+    if nfa is None:
+        raise ValueError("Invalid NFA!")
+
+    if not _input:
+        raise ValueError("Invalid input!")
+
+    opcode, literal, out1 = nfa.opcode, nfa.literal, nfa.out1
+    char_set, char_sets = nfa.char_set, nfa.char_sets
+    counter, counter_masks = nfa.counter, nfa.counter_masks
+
+    current = SparseSet(len(nfa))
+    following = SparseSet(len(nfa))
+    masks = [0] * len(nfa) if nfa.counters else None
+    next_masks = [0] * len(nfa) if nfa.counters else None
+    stack = thread_stack(nfa)
+    add_thread(nfa, current, nfa.start, stack, masks)
+
+    for c in _input:
+        code = ord(c)
+        following.clear()
+
+        dense = current.dense
+        for k in range(current.size):
+            s = dense[k]
+            if literal[s] == code or opcode[s] == OP_CLASS and c in char_sets[char_set[s]]:
+                add_thread(nfa, following, out1[s], stack, next_masks)
+            elif opcode[s] == OP_COUNTER and c in char_sets[char_set[s]]:
+                full, _, saturate = counter_masks[counter[s]]
+                mask = (masks[s] << 1 | masks[s] & saturate) & full
+                if mask:
+                    _add_runs(nfa, following, s, mask, stack, next_masks)
+
+        if not following.size:
+            return False
+
+        current, following = following, current
+        masks, next_masks = next_masks, masks
+
+    for s in current:
+        if opcode[s] == OP_ACCEPT:
+            return True
+
+    return False
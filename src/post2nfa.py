@@ -1,28 +1,48 @@
-from .nfa_state import SplitState, LiteralState, AcceptState, State
+from .nfa_state import SplitState, LiteralState, CharClassState, CharSet, AcceptState, State
+from .nfa_fragment import StateBudget, PatchList, Fragment, repeat, capture
+from .re2post import parse_bound, parse_class
 
 
-class _Nfa:
+def tokenize_postfix(postfix: str):
     """
-    A partially built NFA without an accept state.
-    - start: starting state of the nfa
-    - ends: list of open States that need to be connected
+    Splits a postfix regular expression into tokens: single characters, counted repetitions like '{2,5}', character
+    classes like '[a-z]', and capturing groups like '(1)'. A '(' that does not start a group is a literal.
+    Raises ValueError on an unterminated repetition or character class.
     """
-    def __init__(self, start: State, open_ends: list[State], accept: State = None):
-        self.start = start
-        self.open_ends = open_ends
-        self.accept = accept
-
-    def is_open(self):
-        return self.open_ends and (self.accept is None)
-
-    def is_closed(self):
-        return not self.is_open()
-
-
-def post2nfa(postfix: str | None) -> State | None:
+    i = 0
+    while i < len(postfix):
+        if postfix[i] == '(':
+            j = i + 1
+            while j < len(postfix) and postfix[j].isdigit():
+                j += 1
+            end = j + 1 if j > i + 1 and postfix[j:j + 1] == ')' else i + 1
+            yield postfix[i:end]
+            i = end
+        elif postfix[i] == '{':
+            end = postfix.find('}', i)
+            if end < 0:
+                raise ValueError("Unterminated repetition!")
+            yield postfix[i:end + 1]
+            i = end + 1
+        elif postfix[i] == '[':
+            # a ']' right after '[' or '[^' does not close the class
+            j = i + 2 if postfix[i + 1:i + 2] == '^' else i + 1
+            end = postfix.find(']', j + 1)
+            if end < 0:
+                raise ValueError("Unterminated character class!")
+            yield postfix[i:end + 1]
+            i = end + 1
+        else:
+            yield postfix[i]
+            i += 1
+
+
+def post2nfa(postfix: str | None, counters: bool = False) -> State | None:
     """
     Convert postfix regular expression to NFA using Thompson's construction algorithm.
     Returns the starting state of the NFA.
+    Raises ValueError if counted repetitions would add more than `nfa_fragment.MAX_CLONED_STATES` states.
+    With `counters`, large counted repetitions of a single character become counter states (see `nfa_fragment.repeat`).
     
     The algorithm uses a stack to keep track of NFAs, combining them according to the operators in the postfix.
     """
@@ -30,8 +50,14 @@ def post2nfa(postfix: str | None) -> State | None:
         return None
     
     component_stack = []
+    budget = StateBudget()
 
-    for c in postfix:
+    try:
+        tokens = list(tokenize_postfix(postfix))
+    except ValueError:
+        return None
+
+    for c in tokens:
         if c == '.':  # Concatenation
             # Pop out two open NFAs and connect them
             nfa2 = component_stack.pop()
@@ -53,7 +79,7 @@ def post2nfa(postfix: str | None) -> State | None:
             s = SplitState(nfa1.start, nfa2.start)
             
             # Combine the open ends from both NFAs
-            new_nfa = _Nfa(s, nfa1.open_ends + nfa2.open_ends)
+            new_nfa = Fragment(s, nfa1.open_ends.splice(nfa2.open_ends))
             component_stack.append(new_nfa)
 
         elif c == '?':  # Zero or one
@@ -64,7 +90,8 @@ def post2nfa(postfix: str | None) -> State | None:
             s = SplitState(nfa.start, None)
 
             # Combine nfa's ends with the new skip path
-            new_nfa = _Nfa(s, nfa.open_ends + [s])  # s is an open end because s.next_state_2 is None
+            # s is an open end because s.next_state_2 is None
+            new_nfa = Fragment(s, nfa.open_ends.splice(PatchList(s)))
             component_stack.append(new_nfa)
 
         elif c == '*':  # Zero or more
@@ -79,7 +106,7 @@ def post2nfa(postfix: str | None) -> State | None:
                 end_state.transition_to(s)
             
             # The new NFA can skip or loop
-            new_nfa = _Nfa(s, [s])  # s is an open end because s.next_state_2 is None
+            new_nfa = Fragment(s, PatchList(s))  # s is an open end because s.next_state_2 is None
             component_stack.append(new_nfa)  
 
         elif c == '+':  # One or more
@@ -92,16 +119,43 @@ def post2nfa(postfix: str | None) -> State | None:
             # Connect all open ends to the SPLIT state to create loop
             for end_state in nfa.open_ends:
                 end_state.transition_to(s)
-            nfa.open_ends = [s]  # s is an open end because s.next_state_2 is None
+            nfa.open_ends = PatchList(s)  # s is an open end because s.next_state_2 is None
 
             component_stack.append(nfa)  
+
+        elif c[0] == '{' and len(c) > 1:  # Counted repetition, e.g. '{2,5}'
+            try:
+                m, n = parse_bound(c)
+            except ValueError:
+                return None  # Invalid repetition
+            if not component_stack:
+                return None  # Nothing to repeat
+
+            nfa = component_stack.pop()
+            component_stack.append(repeat(nfa, m, n, budget, counters))
+
+        elif c[0] == '(' and len(c) > 1:  # Capturing group, e.g. '(1)'
+            if not component_stack:
+                return None  # Nothing to capture
+
+            nfa = component_stack.pop()
+            component_stack.append(capture(nfa, int(c[1:-1])))
+
+        elif c[0] == '[' and len(c) > 1:  # Character class, e.g. '[a-z]'
+            try:
+                chars = CharSet(parse_class(c))
+            except ValueError:
+                return None  # Invalid character class
+
+            s = CharClassState(chars, None)
+            component_stack.append(Fragment(s, PatchList(s)))
             
         else:  # Literal character
             # Create a state that transitions on this character
             s = LiteralState(c, None)
             
             # The NFA is just this state with one open end
-            new_nfa = _Nfa(s, [s])
+            new_nfa = Fragment(s, PatchList(s))
             component_stack.append(new_nfa)
 
     # After processing all characters, we should have exactly one NFA left
@@ -0,0 +1,245 @@
+from collections import namedtuple
+
+from src.nfa_state import State, LiteralState, CharClassState, Count, AcceptState, epsilon_closure
+from src.re2ast import Literal, CharClass, Concat, Alternate, Repeat, Group, children, postorder, post2ast
+
+DEFAULT_MAX_PREFIXES = 8
+DEFAULT_MAX_PREFIX_LEN = 16
+DEFAULT_MAX_CROSS_PRODUCT = 256
+
+
+def required_prefixes(start_state: State, max_prefixes: int = DEFAULT_MAX_PREFIXES,
+                      max_len: int = DEFAULT_MAX_PREFIX_LEN) -> list[str] | None:
+    """
+    Returns a small set of literal prefixes such that every string accepted by the NFA starts with one of them,
+    or None if there is no such set (e.g. the NFA accepts the empty string).
+
+    Prefixes are grown one character at a time from the start state, as long as the set stays within `max_prefixes`
+    and the prefixes stay within `max_len` characters. A prefix stops growing once it reaches a state set that was
+    already seen, so loops like `b*` are not unrolled.
+    """
+    if start_state is None:
+        raise ValueError("Invalid NFA!")
+
+    # Each item is (prefix, closure of the states reached after reading `prefix`, closures seen on the way there).
+    # An item whose path is None cannot grow any longer.
+    start_closure = frozenset(epsilon_closure([start_state]))
+    items = [('', start_closure, {start_closure})]
+
+    for _ in range(max_len):
+        grown = []
+        changed = False
+        for prefix, closure, path in items:
+            if path is None:
+                grown.append((prefix, closure, None))
+                continue
+
+            branches = {}
+            final = False
+            for s in closure:
+                if isinstance(s, AcceptState):
+                    final = True  # a match may end here, so `prefix` cannot grow any longer
+                    break
+                if isinstance(s, (CharClassState, Count)):
+                    final = True  # the next character is not a literal, so `prefix` cannot grow any longer
+                    break
+                if isinstance(s, LiteralState):
+                    branches.setdefault(s.literal, []).append(s.next_state)
+
+            if final or not branches:
+                grown.append((prefix, closure, None))
+                continue
+
+            changed = True
+            for c, next_states in branches.items():
+                next_closure = frozenset(epsilon_closure(next_states))
+                next_path = None if next_closure in path else path | {next_closure}
+                grown.append((prefix + c, next_closure, next_path))
+
+        if not changed or len(grown) > max_prefixes:
+            break
+        items = grown
+
+    prefixes = sorted(set(prefix for prefix, _, _ in items))
+    if not prefixes or not prefixes[0]:
+        return None
+
+    # Drop every prefix that starts with another (shorter) prefix of the set
+    minimal = []
+    for p in prefixes:
+        if not minimal or not p.startswith(minimal[-1]):
+            minimal.append(p)
+
+    return minimal
+
+
+def next_candidate(text: str, prefixes: list[str], pos: int) -> int:
+    """
+    Returns the lowest position >= `pos` where one of `prefixes` occurs in `text`, or -1.
+    """
+    best = -1
+    for p in prefixes:
+        i = text.find(p, pos, len(text) if best < 0 else best + len(p))
+        if i >= 0 and (best < 0 or i < best):
+            best = i
+
+    return best
+
+
+Literals = namedtuple('Literals', ['exact', 'prefix', 'suffix', 'required'])
+Literals.__doc__ = """
+Literal facts about the language of a (sub-)expression. Every set is None when nothing useful is known.
+- exact: the whole (finite) language
+- prefix: non-empty strings such that every string of the language starts with one of them
+- suffix: non-empty strings such that every string of the language ends with one of them
+- required: non-empty strings such that every string of the language contains one of them
+"""
+
+
+def _non_empty(strings: frozenset[str] | None) -> frozenset[str] | None:
+    if strings is None or '' in strings:
+        return None
+
+    return strings
+
+
+def _from_exact(exact: frozenset[str]) -> Literals:
+    strings = _non_empty(exact)
+    return Literals(exact, strings, strings, strings)
+
+
+def _cross(s1: frozenset[str] | None, s2: frozenset[str] | None, max_cross_product: int) -> frozenset[str] | None:
+    if s1 is None or s2 is None or len(s1) * len(s2) > max_cross_product:
+        return None
+
+    return frozenset(x + y for x in s1 for y in s2)
+
+
+def _union(sets: list[frozenset[str] | None]) -> frozenset[str] | None:
+    if any(strings is None for strings in sets):
+        return None
+
+    return frozenset().union(*sets)
+
+
+def _better_required(*candidates: frozenset[str] | None) -> frozenset[str] | None:
+    """
+    Picks the most selective required set: longest shortest factor first, then fewest factors.
+    """
+    best = None
+    for r in candidates:
+        if r is None:
+            continue
+        if best is None or (min(map(len, r)), -len(r)) > (min(map(len, best)), -len(best)):
+            best = r
+
+    return best
+
+
+def _concat(l1: Literals, l2: Literals, max_cross_product: int) -> Literals:
+    exact = _cross(l1.exact, l2.exact, max_cross_product)
+    if exact is not None:
+        return _from_exact(exact)
+
+    if l1.exact is not None:
+        prefix = _non_empty(_cross(l1.exact, l2.prefix or frozenset(['']), max_cross_product))
+    else:
+        prefix = l1.prefix
+
+    if l2.exact is not None:
+        suffix = _non_empty(_cross(l1.suffix or frozenset(['']), l2.exact, max_cross_product))
+    else:
+        suffix = l2.suffix
+
+    # A string of l1 . l2 contains some suffix of l1 directly followed by some prefix of l2
+    required = _better_required(l1.required, l2.required, prefix, suffix,
+                                _cross(l1.suffix, l2.prefix, max_cross_product))
+    return Literals(None, prefix, suffix, required)
+
+
+def _repeat(l1: Literals, m: int, n: int | None, max_cross_product: int) -> Literals:
+    if l1.exact is not None:
+        optional = _from_exact(l1.exact | {''})
+    else:
+        optional = Literals(None, None, None, None)
+
+    result = _from_exact(frozenset(['']))
+    for _ in range(m):
+        result = _concat(result, l1, max_cross_product)
+
+    if n is None:
+        return _concat(result, Literals(None, None, None, None), max_cross_product)
+
+    for _ in range(n - m):
+        result = _concat(result, optional, max_cross_product)
+
+    return result
+
+
+def _node_literals(node, items: list[Literals], max_cross_product: int) -> Literals:
+    """
+    Evaluates one AST node, given the Literals of its children.
+    """
+    if isinstance(node, Literal):
+        return _from_exact(frozenset([node.char]))
+
+    if isinstance(node, CharClass):
+        # a small class is a union of literals; a big one (e.g. '.') has none
+        if len(node.chars) <= max_cross_product:
+            return _from_exact(frozenset(chr(code) for lo, hi in node.chars.ranges for code in range(lo, hi + 1)))
+        return Literals(None, None, None, None)
+
+    if isinstance(node, Concat):
+        literals = items[0]
+        for item in items[1:]:
+            literals = _concat(literals, item, max_cross_product)
+        return literals
+
+    if isinstance(node, Alternate):
+        exact = _union([l.exact for l in items])
+        if exact is not None:
+            return _from_exact(exact)
+        return Literals(None, _union([l.prefix for l in items]), _union([l.suffix for l in items]),
+                        _union([l.required for l in items]))
+
+    if isinstance(node, Repeat):
+        l1, = items
+        if (node.m, node.n) == (0, 1):  # '?'
+            return _from_exact(l1.exact | {''}) if l1.exact is not None else Literals(None, None, None, None)
+        if (node.m, node.n) == (0, None):  # '*'
+            return Literals(None, None, None, None)
+        if (node.m, node.n) == (1, None):  # '+'
+            return Literals(None, l1.prefix, l1.suffix, l1.required)
+        return _repeat(l1, node.m, node.n, max_cross_product)
+
+    if isinstance(node, Group):
+        return items[0]
+
+    raise ValueError("Cannot recognize AST node {!r}!".format(node))
+
+
+def ast_literals(node, max_cross_product: int = DEFAULT_MAX_CROSS_PRODUCT) -> Literals:
+    """
+    Evaluates an AST (see `re2ast`) over literal sets instead of NFAs.
+    Concatenations only build cross products of at most `max_cross_product` strings.
+    """
+    results = []
+    for n in postorder(node):
+        k = len(children(n))
+        literals = _node_literals(n, results[len(results) - k:], max_cross_product)
+        del results[len(results) - k:]
+        results.append(literals)
+
+    return results[0]
+
+
+def extract_literals(postfix: str | None, max_cross_product: int = DEFAULT_MAX_CROSS_PRODUCT) -> Literals | None:
+    """
+    Evaluates a postfix regular expression over literal sets instead of NFAs.
+    Returns the Literals of the whole expression, or None for an invalid postfix expression.
+    """
+    node = post2ast(postfix)
+    if node is None:
+        return None
+
+    return ast_literals(node, max_cross_product)
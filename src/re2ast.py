@@ -0,0 +1,288 @@
+from collections import namedtuple
+
+from src.nfa_state import CharSet
+from src.re2post import parse_bound, parse_class, normalize_ranges, match_bound
+from src.post2nfa import tokenize_postfix
+
+# AST nodes of a regular expression
+Literal = namedtuple('Literal', ['char'])
+CharClass = namedtuple('CharClass', ['chars'])  # chars: a CharSet
+Concat = namedtuple('Concat', ['items'])  # items: tuple of at least 2 nodes, none of them a Concat
+Alternate = namedtuple('Alternate', ['items'])  # items: tuple of at least 2 nodes, none of them an Alternate
+Repeat = namedtuple('Repeat', ['node', 'm', 'n'])  # node{m,n}, n is None if unbounded; '*' is Repeat(node, 0, None)
+Group = namedtuple('Group', ['node', 'index'])  # capturing group number `index`, counted from 1 by opening parenthesis
+
+MAX_NESTING_DEPTH = 100  # Deepest group nesting the recursive-descent parser accepts
+
+_QUANTIFIERS = {'*': (0, None), '+': (1, None), '?': (0, 1)}
+
+_CHAR_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v', '0': '\0'}
+
+# ASCII character class escapes; upper case letters are the complements
+_CLASS_ESCAPES = {
+    'd': [(ord('0'), ord('9'))],
+    'w': [(ord('0'), ord('9')), (ord('A'), ord('Z')), (ord('_'), ord('_')), (ord('a'), ord('z'))],
+    's': [(ord('\t'), ord('\r')), (ord(' '), ord(' '))],
+}
+
+DOT = CharSet(normalize_ranges([(ord('\n'), ord('\n'))], negated=True))  # '.' matches anything but a newline
+
+
+def _concat(items: list) -> object:
+    flat = []
+    for item in items:
+        flat.extend(item.items if isinstance(item, Concat) else (item,))
+
+    return flat[0] if len(flat) == 1 else Concat(tuple(flat))
+
+
+def _alternate(items: list) -> object:
+    flat = []
+    for item in items:
+        flat.extend(item.items if isinstance(item, Alternate) else (item,))
+
+    return flat[0] if len(flat) == 1 else Alternate(tuple(flat))
+
+
+def children(node) -> tuple:
+    """
+    Returns the child nodes of an AST node, in order.
+    """
+    if isinstance(node, (Literal, CharClass)):
+        return ()
+    if isinstance(node, (Concat, Alternate)):
+        return node.items
+    if isinstance(node, (Repeat, Group)):
+        return (node.node,)
+
+    raise ValueError("Cannot recognize AST node {!r}!".format(node))
+
+
+def postorder(node):
+    """
+    Yields the nodes of an AST, every node after its children, without recursion so that deep ASTs (e.g. many
+    stacked quantifiers) are fine. A pass that pushes one result per node finds the results of a node's children as
+    the last `len(children(node))` results pushed.
+    """
+    stack = [(node, False)]
+    while stack:
+        node, expanded = stack.pop()
+        items = children(node)
+        if expanded or not items:
+            yield node
+            continue
+
+        stack.append((node, True))
+        stack.extend((item, False) for item in reversed(items))
+
+
+class _Parser:
+    """
+    A recursive-descent parser over the grammar:
+
+        alternation := concat ('|' concat)*
+        concat      := repeat repeat*
+        repeat      := atom ('*' | '+' | '?' | '{m}' | '{m,}' | '{m,n}')*, where any other '{' is a literal atom
+        atom        := char | '.' | '\\' escape | '[' class ']' | '(' alternation ')' | '(?:' alternation ')'
+    """
+    def __init__(self, regex: str):
+        self.regex = regex
+        self.pos = 0
+        self.n_groups = 0
+        self.depth = 0
+
+    def error(self, reason: str):
+        raise ValueError("Invalid regular expression: {} at position {}".format(reason, self.pos))
+
+    def peek(self) -> str | None:
+        return self.regex[self.pos] if self.pos < len(self.regex) else None
+
+    def next(self) -> str:
+        c = self.peek()
+        if c is None:
+            self.error("unexpected end")
+        self.pos += 1
+        return c
+
+    def parse(self):
+        node = self.alternation()
+        if self.pos < len(self.regex):
+            self.error("unbalanced ')'")
+
+        return node
+
+    def alternation(self):
+        items = [self.concat()]
+        while self.peek() == '|':
+            self.pos += 1
+            items.append(self.concat())
+
+        return _alternate(items)
+
+    def concat(self):
+        items = []
+        while self.peek() not in (None, '|', ')'):
+            items.append(self.repeat())
+
+        if not items:
+            self.error("empty expression")
+
+        return _concat(items)
+
+    def repeat(self):
+        node = self.atom()
+        while True:
+            c = self.peek()
+            if c in _QUANTIFIERS:
+                self.pos += 1
+                m, n = _QUANTIFIERS[c]
+            elif c == '{' and (token := match_bound(self.regex, self.pos)) is not None:
+                try:
+                    m, n = parse_bound(token)
+                except ValueError:
+                    self.error("invalid repetition {}".format(token))
+                self.pos += len(token)
+            else:
+                return node
+
+            node = Repeat(node, m, n)
+
+    def atom(self):
+        c = self.next()
+        if c == '(':
+            if self.depth == MAX_NESTING_DEPTH:
+                self.pos -= 1
+                self.error("groups nested deeper than {}".format(MAX_NESTING_DEPTH))
+
+            capturing = not self.regex.startswith('?:', self.pos)
+            if capturing:
+                self.n_groups += 1
+                index = self.n_groups
+            else:
+                self.pos += 2
+
+            self.depth += 1
+            node = self.alternation()
+            self.depth -= 1
+            if self.peek() != ')':
+                self.error("missing ')'")
+            self.pos += 1
+            return Group(node, index) if capturing else node
+        if c == '[':
+            return CharClass(self.char_class())
+        if c == '.':
+            return CharClass(DOT)
+        if c == '\\':
+            ranges, char = self.escape()
+            return Literal(char) if char is not None else CharClass(CharSet(ranges))
+        if c in _QUANTIFIERS or c == '{' and match_bound(self.regex, self.pos - 1) is not None:
+            self.pos -= 1
+            self.error("nothing to repeat")
+
+        return Literal(c)
+
+    def escape(self) -> tuple[list[tuple[int, int]], str | None]:
+        """
+        Parses the escape after a '\\'. Returns (ranges, char), where `char` is None for a class escape like '\\d'.
+        """
+        c = self.next()
+        if c in _CHAR_ESCAPES:
+            c = _CHAR_ESCAPES[c]
+        elif c.lower() in _CLASS_ESCAPES:
+            return normalize_ranges(_CLASS_ESCAPES[c.lower()], negated=c.isupper()), None
+        elif c.isalnum():
+            self.pos -= 1
+            self.error("unknown escape '\\{}'".format(c))
+
+        return [(ord(c), ord(c))], c
+
+    def char_class(self) -> CharSet:
+        """
+        Parses a class after its '['. A ']' right after '[' or '[^', and a '-' at either end, stand for themselves.
+        """
+        negated = self.peek() == '^'
+        if negated:
+            self.pos += 1
+
+        ranges = []
+        first = True
+        while True:
+            if self.peek() is None:
+                self.error("unterminated character class")
+            if self.peek() == ']' and not first:
+                self.pos += 1
+                break
+            first = False
+
+            lo_ranges, lo = self.class_item()
+            if lo is not None and self.peek() == '-' and self.regex[self.pos + 1:self.pos + 2] not in ('', ']'):
+                self.pos += 1
+                _, hi = self.class_item()
+                if hi is None or lo > hi:
+                    self.error("invalid range")
+                ranges.append((ord(lo), ord(hi)))
+            else:
+                ranges.extend(lo_ranges)
+
+        return CharSet(normalize_ranges(ranges, negated))
+
+    def class_item(self) -> tuple[list[tuple[int, int]], str | None]:
+        c = self.next()
+        if c == '\\':
+            return self.escape()
+
+        return [(ord(c), ord(c))], c
+
+
+def re2ast(regex: str):
+    """
+    Parses an infix regular expression into an AST of Literal, CharClass, Concat, Alternate, Repeat and Group nodes.
+    '(...)' is a capturing group and '(?:...)' a non-capturing one.
+    Unlike `re2post`, metacharacters can be escaped with '\\', and '\\d', '\\w', '\\s' (ASCII) and their upper case
+    complements are supported. Raises ValueError on an invalid regular expression, or on groups nested deeper than
+    MAX_NESTING_DEPTH.
+    """
+    if not regex:
+        raise ValueError("Invalid regular expression: empty expression at position 0")
+
+    return _Parser(regex).parse()
+
+
+def count_groups(node) -> int:
+    """
+    Returns the number of capturing groups in an AST, i.e. the highest group index (0 if there are none).
+    """
+    return max((n.index for n in postorder(node) if isinstance(n, Group)), default=0)
+
+
+def post2ast(postfix: str | None):
+    """
+    Converts a postfix regular expression (the output of `re2post`) to an AST. Returns None if it is invalid.
+    """
+    if postfix is None:
+        return None
+
+    stack = []
+    try:
+        for c in tokenize_postfix(postfix):
+            if c in ('.', '|'):
+                node2 = stack.pop()
+                node1 = stack.pop()
+                stack.append(_concat([node1, node2]) if c == '.' else _alternate([node1, node2]))
+            elif c in _QUANTIFIERS:
+                stack.append(Repeat(stack.pop(), *_QUANTIFIERS[c]))
+            elif c[0] == '{' and len(c) > 1:
+                stack.append(Repeat(stack.pop(), *parse_bound(c)))
+            elif c[0] == '[' and len(c) > 1:
+                stack.append(CharClass(CharSet(parse_class(c))))
+            elif c[0] == '(' and len(c) > 1:
+                stack.append(Group(stack.pop(), int(c[1:-1])))
+            else:
+                stack.append(Literal(c))
+    except (IndexError, ValueError):  # an operator without enough operands, or a malformed token
+        return None
+
+    if len(stack) != 1:
+        return None
+
+    return stack[0]
@@ -1,3 +1,5 @@
+import re
+import sys
 from collections import deque
 
 # def precedence(op):
@@ -16,15 +18,125 @@ from collections import deque
 #     return "LEFT"
 
 
-def re2post(regex):
+MAX_REPEAT = 1000  # Largest bound allowed in a counted repetition
+
+_BOUND = re.compile(r'\{\d+(,\d*)?\}')
+
+
+def match_bound(regex: str, pos: int) -> str | None:
+    """
+    Returns the '{m}', '{m,}' or '{m,n}' token starting at `regex[pos]`, or None if there is none there, in which case
+    the '{' stands for itself.
+    """
+    m = _BOUND.match(regex, pos)
+    return m.group() if m else None
+
+
+def parse_bound(token: str) -> tuple[int, int | None]:
+    """
+    Parses a counted repetition token '{m}', '{m,}' or '{m,n}' into (m, n), where n is None if unbounded.
+    """
+    if len(token) < 3 or token[0] != '{' or token[-1] != '}':
+        raise ValueError("Invalid repetition {}".format(token))
+
+    parts = token[1:-1].split(',')
+    if len(parts) > 2 or not all(p.isdigit() for p in parts if p) or not parts[0]:
+        raise ValueError("Invalid repetition {}".format(token))
+
+    m = int(parts[0])
+    if len(parts) == 1:
+        n = m
+    else:
+        n = int(parts[1]) if parts[1] else None
+
+    if (n is not None and n < m) or max(m, n or 0) > MAX_REPEAT:
+        raise ValueError("Invalid repetition {}".format(token))
+
+    return m, n
+
+
+def format_bound(m: int, n: int | None) -> str:
+    """
+    The inverse of `parse_bound`, in canonical form.
+    """
+    if n == m:
+        return '{{{}}}'.format(m)
+    if n is None:
+        return '{{{},}}'.format(m)
+
+    return '{{{},{}}}'.format(m, n)
+
+
+def parse_class(token: str) -> list[tuple[int, int]]:
+    """
+    Parses a character class token '[...]' or '[^...]' into sorted, disjoint and non-adjacent code point ranges.
+    A ']' right after '[' or '[^', and a '-' at either end of the class, stand for themselves.
+    """
+    if len(token) < 3 or token[0] != '[' or token[-1] != ']':
+        raise ValueError("Invalid character class {}".format(token))
+
+    negated = token[1] == '^'
+    body = token[2:-1] if negated else token[1:-1]
+    if not body:
+        raise ValueError("Invalid character class {}".format(token))
+
+    ranges = []
+    i = 0
+    while i < len(body):
+        if i + 2 < len(body) and body[i + 1] == '-':
+            lo, hi = ord(body[i]), ord(body[i + 2])
+            if lo > hi:
+                raise ValueError("Invalid character class {}".format(token))
+            i += 3
+        else:
+            lo = hi = ord(body[i])
+            i += 1
+        ranges.append((lo, hi))
+
+    return normalize_ranges(ranges, negated)
+
+
+def normalize_ranges(ranges: list[tuple[int, int]], negated: bool = False) -> list[tuple[int, int]]:
+    """
+    Sorts and merges inclusive code point ranges, and complements them if `negated`.
+    """
+    merged = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+
+    if not negated:
+        return merged
+
+    complement = []
+    lo = 0
+    for start, end in merged:
+        if start > lo:
+            complement.append((lo, start - 1))
+        lo = end + 1
+    if lo <= sys.maxunicode:
+        complement.append((lo, sys.maxunicode))
+
+    return complement
+
+
+def re2post(regex, capture: bool = False):
     """
     Convert infix regular expression to postfix notation.
     Insert '.' as explicit concatenation operator.
+    Counted repetitions '{m}', '{m,}' and '{m,n}' are emitted as single postfix tokens, like '*'; any other '{' is a
+    literal, emitted as the class '[{]' so that it cannot be mistaken for a repetition.
+    Character classes '[...]' are emitted as single operand tokens, and '.' as the class '[^\\n]'.
+    With `capture`, the k-th opening parenthesis also marks group k, emitted as the unary operator '(k)' after the
+    group, e.g. 'a(b|c)' becomes 'abc|(1).'.
     """
     output_queue = deque()  # Output queue for postfix expression
     operator_stack = []    # Stack for operators and parentheses
     n_alt_ops = 0      # Number of seen alternation operators (i.e. '|')
     n_con_opnds = 0     # Number of seen atoms (if n_atoms >= 2, it's time to insert the concatenation operator '.')
+    n_groups = 0       # Number of seen capturing groups
 
     def check_and_insert_one_dot():
         nonlocal n_con_opnds, output_queue
@@ -42,12 +154,16 @@ def re2post(regex):
         if n_alt_ops >= 1:
             output_queue.append('|' * n_alt_ops)
 
-    for c in regex:
+    i = 0
+    while i < len(regex):
+        c = regex[i]
+        i += 1
         if c == '(':
             check_and_insert_one_dot()
 
             # store the old stats
-            operator_stack.append((n_alt_ops, n_con_opnds))
+            n_groups += 1
+            operator_stack.append((n_alt_ops, n_con_opnds, n_groups))
             
             # init new stats for inside-parentheses expression
             n_alt_ops = 0
@@ -71,12 +187,46 @@ def re2post(regex):
             assert n_con_opnds == 0
             # no need to reset n_con_opnds or n_alt_ops since we are going to laod the old values
             
-            n_alt_ops, n_con_opnds = operator_stack.pop()  # load the old stats when '(' is scanned 
+            n_alt_ops, n_con_opnds, group = operator_stack.pop()  # load the old stats when '(' is scanned 
             n_con_opnds += 1
+
+            if capture:
+                output_queue.append('({})'.format(group))
         elif c in ('*', '+', '?'):
             if n_con_opnds == 0:
                 raise ValueError("Invalid regular expression")
             output_queue.append(c)
+        elif c == '{' and (token := match_bound(regex, i - 1)) is not None:
+            if n_con_opnds == 0:
+                raise ValueError("Invalid regular expression")
+
+            output_queue.append(format_bound(*parse_bound(token)))
+            i += len(token) - 1
+        elif c == '{':
+            check_and_insert_one_dot()
+
+            output_queue.append('[{]')
+            n_con_opnds += 1
+        elif c == '[':
+            check_and_insert_one_dot()
+
+            token = c
+            while i < len(regex):
+                c = regex[i]
+                i += 1
+                token += c
+                # a ']' right after '[' or '[^' does not close the class
+                if c == ']' and len(token) > (3 if token.startswith('[^') else 2):
+                    break
+
+            parse_class(token)  # validates the class
+            output_queue.append(token)
+            n_con_opnds += 1
+        elif c == '.':
+            check_and_insert_one_dot()
+
+            output_queue.append('[^\n]')
+            n_con_opnds += 1
         else:
             check_and_insert_one_dot()
 
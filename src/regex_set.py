@@ -0,0 +1,154 @@
+from src.re2ast import re2ast
+from src.ast2nfa import ast2nfa
+from src.nfa_optimize import optimize
+from src.nfa_state import State, LiteralState, CharClassState, CounterState, SplitState, AcceptState, epsilon_closure
+from src.nfa_simulation import step, search
+from src.prefilter import ast_literals, required_prefixes
+from src.aho_corasick import AhoCorasick
+from src.lazy_dfa import LazyDfa, DEFAULT_CACHE_SIZE
+
+
+def _find_accept_state(start_state: State) -> AcceptState:
+    visited = set()
+    stack = [start_state]
+    while stack:
+        s = stack.pop()
+        if s in visited:
+            continue
+        visited.add(s)
+
+        if isinstance(s, AcceptState):
+            return s
+        if isinstance(s, (LiteralState, CharClassState, CounterState)):
+            stack.append(s.next_state)
+        elif isinstance(s, SplitState):
+            stack.append(s.next_state_1)
+            stack.append(s.next_state_2)
+
+    raise ValueError("NFA has no accept state!")
+
+
+def _join(start_states: list[State]) -> State:
+    """
+    Joins NFAs under a balanced tree of split states.
+    """
+    level = list(start_states)
+    while len(level) > 1:
+        joined = [SplitState(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            joined.append(level[-1])
+        level = joined
+
+    return level[0]
+
+
+class RegexSet:
+    """
+    Matches a string against many patterns at once.
+
+    The NFAs of all patterns are joined under one tree of split states. Each pattern keeps its own accept state,
+    so a single scan of the input tells which patterns match. With `use_dfa`, the scan runs on a lazy DFA whose
+    states are subsets of the joined NFA.
+
+    For `search`, the literals of every pattern are fed to one Aho-Corasick automaton. A pure-literal pattern
+    (e.g. a keyword alternation) is decided by the automaton alone; a pattern with required literal factors only
+    runs its NFA when one of its factors occurs; the remaining patterns always run their NFA.
+    """
+    def __init__(self, patterns: list[str], use_dfa: bool = True, cache_size: int = DEFAULT_CACHE_SIZE):
+        if not patterns:
+            raise ValueError("Empty pattern set!")
+
+        self.patterns = list(patterns)
+
+        start_states = []
+        self._accept_index = {}  # accept state -> pattern index
+        words = {}  # literal -> [(pattern index, whether a hit is a match)]
+        self._always_match = []  # patterns that match the empty string, hence occur in every string
+        self._always_confirm = []  # patterns without usable literals
+        for i, pattern in enumerate(self.patterns):
+            node = re2ast(pattern)
+            start_state = optimize(ast2nfa(node))
+
+            start_states.append(start_state)
+            self._accept_index[_find_accept_state(start_state)] = i
+
+            literals = ast_literals(node)
+            if literals.exact is not None and '' in literals.exact:
+                self._always_match.append(i)
+            elif literals.exact is not None:
+                for word in literals.exact:
+                    words.setdefault(word, []).append((i, True))
+            elif literals.required is not None:
+                for word in literals.required:
+                    words.setdefault(word, []).append((i, False))
+            else:
+                self._always_confirm.append(i)
+
+        self._start_states = start_states
+        self._prefixes = [None] * len(start_states)  # computed lazily, only for patterns that are confirmed
+        self._word_owners = list(words.values())
+        self._prefilter = AhoCorasick(list(words)) if words else None
+
+        self.start_state = _join(start_states)
+        self._dfa = LazyDfa(self.start_state, cache_size) if use_dfa else None
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def matches(self, string: str) -> list[int]:
+        """
+        Returns the sorted indices of the patterns that match the whole `string`.
+        """
+        if self._dfa is not None:
+            closure = self._run_dfa(string)
+        else:
+            closure = self._run_nfa(string)
+
+        accept_index = self._accept_index
+        return sorted(accept_index[s] for s in closure if isinstance(s, AcceptState))
+
+    def is_match(self, string: str) -> bool:
+        return bool(self.matches(string))
+
+    def search(self, string: str) -> list[int]:
+        """
+        Returns the sorted indices of the patterns that occur anywhere in `string`.
+        """
+        found = set(self._always_match)
+        candidates = set(self._always_confirm)
+
+        if self._prefilter is not None:
+            word_owners = self._word_owners
+            for w in self._prefilter.find_words(string):
+                for i, is_match in word_owners[w]:
+                    if is_match:
+                        found.add(i)
+                    else:
+                        candidates.add(i)
+
+        for i in candidates - found:
+            if self._prefixes[i] is None:
+                self._prefixes[i] = required_prefixes(self._start_states[i]) or []
+            if search(self._start_states[i], string, 0, self._prefixes[i] or None) is not None:
+                found.add(i)
+
+        return sorted(found)
+
+    def _run_dfa(self, string: str) -> frozenset[State]:
+        dfa = self._dfa
+        d = dfa.start
+        for c in string:
+            d = dfa.next_state(d, c)
+            if dfa.is_dead(d):
+                break
+
+        return d.nfa_states
+
+    def _run_nfa(self, string: str) -> set[State]:
+        closure = epsilon_closure([self.start_state])
+        for c in string:
+            closure = step(closure, c)
+            if closure is None:
+                return set()
+
+        return closure
@@ -0,0 +1,236 @@
+"""
+A versioned binary format for compiled automata, designed to be loaded from mmap without copying the big arrays.
+
+    header:  magic (4s) | format version (H) | kind (H) | byte order (B) | padding (3x)
+    FlatNfa: n_states (i) | start (i) | n_char_sets (i) | n_ranges (i) | n_counters (i) | padding (4x)
+             | opcode, literal, out1, out2, char_set, counter (n_states int32 each)
+             | range counts (n_char_sets int32) | ranges (2 * n_ranges int32, lo and hi interleaved)
+             | counters (2 * n_counters int32, m and n interleaved, n = -1 if unbounded)
+    Dfa:     n_states (i) | n_columns (i) | start (i) | dead (i) | n_intervals (i) | padding (4x)
+             | table (n_states * n_columns int32) | boundaries, interval_class (n_intervals int32 each)
+             | accepting (n_states bytes)
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from src.re2ast import re2ast
+from src.re2post import MAX_REPEAT
+from src.ast2nfa import ast2nfa
+from src.nfa_optimize import optimize
+from src.alphabet import CharClasses
+from src.dfa import Dfa, compile_dfa
+from src.nfa_array import FlatNfa, flatten, OP_LITERAL, OP_COUNTER
+from src.nfa_state import CharSet
+
+MAGIC = b'RXAU'
+FORMAT_VERSION = 3
+ENGINE_VERSION = '5'  # Bump whenever compilation changes, so that stale cache entries are ignored
+
+KIND_NFA = 1
+KIND_DFA = 2
+
+_HEADER = struct.Struct('<4sHHB3x')
+_NFA_HEADER = struct.Struct('<iiiii4x')
+_DFA_HEADER = struct.Struct('<iiiii4x')
+_BYTE_ORDERS = {'little': 0, 'big': 1}
+
+
+def _int_array(values) -> bytes:
+    return array('i', values).tobytes()
+
+
+def dumps_flat_nfa(nfa: FlatNfa) -> bytes:
+    ranges = [r for chars in nfa.char_sets for r in chars.ranges]
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, KIND_NFA, _BYTE_ORDERS[sys.byteorder]),
+             _NFA_HEADER.pack(len(nfa), nfa.start, len(nfa.char_sets), len(ranges), len(nfa.counters))]
+    for column in (nfa.opcode, nfa.literal, nfa.out1, nfa.out2, nfa.char_set, nfa.counter):
+        parts.append(_int_array(column))
+
+    parts.append(_int_array(len(chars.ranges) for chars in nfa.char_sets))
+    parts.append(_int_array(bound for r in ranges for bound in r))
+    parts.append(_int_array(bound for m, n in nfa.counters for bound in (m, -1 if n is None else n)))
+
+    return b''.join(parts)
+
+
+def dumps_dfa(dfa: Dfa) -> bytes:
+    classes = dfa.classes
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, KIND_DFA, _BYTE_ORDERS[sys.byteorder]),
+             _DFA_HEADER.pack(dfa.n_states, dfa.n_columns, dfa.start, dfa.dead, len(classes.boundaries)),
+             _int_array(dfa.table),
+             _int_array(classes.boundaries),
+             _int_array(classes.interval_class),
+             bytes(bool(a) for a in dfa.accepting)]
+
+    return b''.join(parts)
+
+
+class _Reader:
+    """
+    Reads sections of a buffer in order. Integer arrays are zero-copy memoryviews when the byte order matches.
+    """
+    def __init__(self, buffer, swap: bool):
+        self.view = memoryview(buffer)
+        self.offset = 0
+        self.swap = swap
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        if self.offset + fmt.size > len(self.view):
+            raise ValueError("Truncated automaton data!")
+
+        values = fmt.unpack_from(self.view, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def ints(self, n: int):
+        end = self.offset + n * 4
+        if n < 0 or end > len(self.view):
+            raise ValueError("Truncated automaton data!")
+
+        section = self.view[self.offset:end]
+        self.offset = end
+        if not self.swap:
+            return section.cast('i')
+
+        values = array('i', section.tobytes())
+        values.byteswap()
+        return values
+
+    def bytes(self, n: int) -> memoryview:
+        end = self.offset + n
+        if n < 0 or end > len(self.view):
+            raise ValueError("Truncated automaton data!")
+
+        section = self.view[self.offset:end]
+        self.offset = end
+        return section
+
+
+def _check_range(values, lo: int, hi: int):
+    """
+    Raises a ValueError unless every value is in [lo, hi), so that corrupted data fails here and not at match time.
+    """
+    if len(values) and (min(values) < lo or max(values) >= hi):
+        raise ValueError("Corrupted automaton data!")
+
+
+def loads(buffer) -> FlatNfa | Dfa:
+    """
+    Loads a FlatNfa or a Dfa from `buffer` (bytes, mmap, ...). The returned automaton keeps `buffer` alive.
+    """
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Truncated automaton data!")
+
+    magic, version, kind, byte_order = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a compiled automaton!")
+    if version != FORMAT_VERSION:
+        raise ValueError("Unsupported format version {}!".format(version))
+
+    reader = _Reader(buffer, byte_order != _BYTE_ORDERS[sys.byteorder])
+    reader.offset = _HEADER.size
+
+    if kind == KIND_NFA:
+        n, start, n_char_sets, n_ranges, n_counters = reader.unpack(_NFA_HEADER)
+        opcode, literal, out1, out2, char_set, counter = (reader.ints(n) for _ in range(6))
+        _check_range([start], 0, n)
+        _check_range(opcode, OP_LITERAL, OP_COUNTER + 1)
+        _check_range(literal, -1, sys.maxunicode + 1)
+        _check_range(out1, -1, n)
+        _check_range(out2, -1, n)
+        _check_range(char_set, -1, n_char_sets)
+        _check_range(counter, -1, n_counters)
+
+        # CharSets are small and rebuilt eagerly, so that matching never touches the buffer for them
+        counts = reader.ints(n_char_sets)
+        bounds = reader.ints(2 * n_ranges)
+        char_sets = []
+        i = 0
+        for count in counts:
+            char_sets.append(CharSet((bounds[k], bounds[k + 1]) for k in range(i, i + 2 * count, 2)))
+            i += 2 * count
+        if i != 2 * n_ranges:
+            raise ValueError("Corrupted automaton data!")
+
+        bounds = reader.ints(2 * n_counters)
+        counters = [(bounds[k], None if bounds[k + 1] < 0 else bounds[k + 1]) for k in range(0, 2 * n_counters, 2)]
+        _check_range(bounds, -1, MAX_REPEAT + 1)
+        if any(m < 0 or n is not None and n < m for m, n in counters):
+            raise ValueError("Corrupted automaton data!")
+
+        return FlatNfa(opcode, literal, out1, out2, start, char_set, char_sets, counter, counters)
+
+    if kind == KIND_DFA:
+        n_states, n_columns, start, dead, n_intervals = reader.unpack(_DFA_HEADER)
+        table = reader.ints(n_states * n_columns)
+        classes = CharClasses(reader.ints(n_intervals), reader.ints(n_intervals))
+        accepting = [bool(a) for a in reader.bytes(n_states)]  # small; a list keeps `match` returning bools
+        if classes.n_classes != n_columns or classes.boundaries[0] != 0:
+            raise ValueError("Corrupted automaton data!")
+        _check_range(table, 0, n_states)
+        _check_range(classes.interval_class, 0, n_columns)
+        _check_range([start], 0, n_states)
+        _check_range([dead], -1, n_states)
+        return Dfa(classes, table, accepting, start, dead)
+
+    raise ValueError("Unknown automaton kind {}!".format(kind))
+
+
+def load_file(path: str) -> FlatNfa | Dfa:
+    """
+    Maps the file at `path` and loads the automaton from it without copying its arrays.
+    """
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return loads(mm)
+
+
+def dump_file(data: bytes, path: str):
+    """
+    Writes `data` to `path` atomically, so that concurrent readers never see a partial file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class CompileCache:
+    """
+    An on-disk cache of compiled automata, keyed by a hash of the pattern, the automaton kind and ENGINE_VERSION.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, pattern: str, kind: int) -> str:
+        key = '{}\0{}\0{}'.format(ENGINE_VERSION, kind, pattern).encode('utf-8')
+        return os.path.join(self.directory, hashlib.sha256(key).hexdigest() + '.rxa')
+
+    def _get(self, pattern: str, kind: int, build) -> FlatNfa | Dfa:
+        path = self.path(pattern, kind)
+        try:
+            return load_file(path)
+        except (OSError, ValueError):  # missing, or written by an incompatible version
+            pass
+
+        start_state = optimize(ast2nfa(re2ast(pattern), counters=True))
+        dump_file(build(start_state), path)
+        return load_file(path)
+
+    def get_flat_nfa(self, pattern: str) -> FlatNfa:
+        return self._get(pattern, KIND_NFA, lambda start_state: dumps_flat_nfa(flatten(start_state)))
+
+    def get_dfa(self, pattern: str) -> Dfa:
+        return self._get(pattern, KIND_DFA, lambda start_state: dumps_dfa(compile_dfa(start_state)))
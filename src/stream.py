@@ -0,0 +1,152 @@
+import codecs
+
+from src.nfa_state import State
+from src.nfa_simulation import step, is_accepting
+from src.alphabet import char_classes
+from src.lazy_dfa import LazyDfa
+
+MAX_EXPLORED_SETS = 1024  # `is_accepted` gives up, and answers False, after exploring this many NFA state sets
+
+
+def _accepts_everything(closure: frozenset[State], representatives: list[str | None], max_sets: int) -> bool:
+    """
+    Tells if every string, the empty one included, leads from `closure` to an accepting set of NFA states.
+    Characters of the same class lead to the same set, so one representative per class is enough.
+    Returns False if more than `max_sets` sets are reachable.
+    """
+    seen = {closure}
+    stack = [closure]
+    while stack:
+        states = stack.pop()
+        if not is_accepting(states):
+            return False
+
+        for c in representatives:
+            if c is None:
+                continue  # an empty class
+
+            nxt = step(states, c)
+            if nxt is None:
+                return False
+            nxt = frozenset(nxt)
+            if nxt not in seen:
+                if len(seen) == max_sets:
+                    return False
+                seen.add(nxt)
+                stack.append(nxt)
+
+    return True
+
+
+class StreamMatcher:
+    """
+    Matches an input that arrives in chunks against an NFA, keeping only the current automaton state between chunks.
+
+    Chunks can be `str`, or `bytes` decoded incrementally with `encoding`. After each `feed`, two flags allow an early
+    exit: `is_dead` tells that no continuation can match any more, and `is_accepted` that every continuation matches.
+    `is_accepting` only tells if the input seen so far matches; a later chunk can still change that.
+
+    The lazy DFA is used as long as its cache behaves; if a single `feed` flushes the cache more than
+    `max_flushes` times, the stream switches to plain NFA simulation for good.
+    """
+    def __init__(self, nfa: State | LazyDfa, encoding: str = 'utf-8'):
+        if nfa is None:
+            raise ValueError("Invalid NFA!")
+
+        self._dfa = nfa if isinstance(nfa, LazyDfa) else LazyDfa(nfa)
+        self._encoding = encoding
+        self._representatives = None  # one character per class of the alphabet, computed by the first `is_accepted`
+        self._accepted = (None, False)  # the last state set `is_accepted` was computed for, and its answer
+        self.reset()
+
+    def reset(self):
+        self._state = self._dfa.start
+        self._closure = None  # set once the stream falls back to NFA simulation
+        self._decoder = codecs.getincrementaldecoder(self._encoding)()
+        self._finished = False
+
+    @property
+    def is_dead(self) -> bool:
+        if self._closure is not None:
+            return not self._closure
+
+        return self._dfa.is_dead(self._state)
+
+    @property
+    def is_accepting(self) -> bool:
+        if self._closure is not None:
+            return is_accepting(self._closure)
+
+        return self._state.accepting
+
+    @property
+    def is_accepted(self) -> bool:
+        """
+        True when the input seen so far and every continuation of it match, so that `finish` will return True
+        whatever comes next. Once the stream is finished, this is the same as `is_accepting`.
+        """
+        if self._finished:
+            return self.is_accepting
+
+        states = frozenset(self._closure) if self._closure is not None else self._state.nfa_states
+        if self._accepted[0] != states:
+            if self._representatives is None:
+                self._representatives = char_classes(self._dfa.start_state).representatives()
+            self._accepted = (states, _accepts_everything(states, self._representatives, MAX_EXPLORED_SETS))
+
+        return self._accepted[1]
+
+    def feed(self, chunk: str | bytes) -> bool:
+        """
+        Consumes `chunk`. Returns False once the stream is dead, so callers can stop reading early.
+        """
+        if self._finished:
+            raise ValueError("Stream already finished!")
+
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            chunk = self._decoder.decode(chunk)
+
+        if self._closure is None:
+            self._feed_dfa(chunk)
+        else:
+            self._feed_nfa(chunk)
+
+        return not self.is_dead
+
+    def finish(self) -> bool:
+        """
+        Ends the stream and tells if the whole input matches.
+        """
+        if not self._finished:
+            rest = self._decoder.decode(b'', final=True)
+            if rest:
+                self.feed(rest)
+            self._finished = True
+
+        return self.is_accepting
+
+    def _feed_dfa(self, chunk: str):
+        dfa = self._dfa
+        flush_limit = dfa.flushes + dfa.max_flushes
+
+        d = self._state
+        for i, c in enumerate(chunk):
+            d = dfa.next_state(d, c)
+            if dfa.is_dead(d):
+                break
+
+            if dfa.flushes > flush_limit:
+                self._closure = set(d.nfa_states)
+                self._feed_nfa(chunk[i + 1:])
+                return
+
+        self._state = d
+
+    def _feed_nfa(self, chunk: str):
+        closure = self._closure
+        for c in chunk:
+            if not closure:
+                break
+            closure = step(closure, c) or set()
+
+        self._closure = closure
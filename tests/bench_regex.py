@@ -0,0 +1,148 @@
+"""
+Benchmarks compile time and match throughput of every engine, against the standard `re` module.
+
+    python -m tests.bench_regex [--quick] [--output results.json]
+
+Results are written as JSON, one record per (case, stage), so that runs can be compared over time.
+Not collected by pytest: the file name does not start with `test_`.
+"""
+import argparse
+import json
+import platform
+import re
+import sys
+import time
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.re2ast import re2ast
+from src.ast2nfa import ast2nfa
+from src.nfa_state import assign_state_ids
+from src.nfa_simulation import match
+from src.lazy_dfa import LazyDfa
+from src.dfa import compile_dfa, StateLimitExceeded
+from src.nfa_array import flatten
+from src.pike_vm import pike_match
+from src.closure_index import ClosureIndex, match_indexed
+
+
+MAX_BACKTRACKING_N = 20  # `re` is exponential on the pathological case, so it is skipped beyond this size
+
+
+def pathological(n):
+    # a?^n a^n against a^n: exponential for backtracking engines, linear for automata
+    return 'a?' * n + 'a' * n, 'a' * n
+
+
+def nested_stars(n):
+    # the text matches: a failing text makes `re` backtrack exponentially in the nesting depth
+    return '(' * n + 'a*' + ')*' * n + 'b', 'a' * (4 * n) + 'b'
+
+
+def wide_alternation(n):
+    words = ['w{}x'.format(i) for i in range(n)]
+    return '|'.join(words), words[n // 2]
+
+
+def literal_chain(n):
+    return 'ab' * n, 'ab' * n
+
+
+def cases(quick: bool):
+    sizes = [4, 16] if quick else [4, 16, 64]
+    for n in sizes:
+        yield 'pathological_{}'.format(n), *pathological(n), n <= MAX_BACKTRACKING_N
+        yield 'nested_stars_{}'.format(n), *nested_stars(n), True
+        yield 'literal_chain_{}'.format(n), *literal_chain(n), True
+    for n in ([10, 100] if quick else [10, 100, 1000]):
+        yield 'wide_alternation_{}'.format(n), *wide_alternation(n), True
+
+
+def timeit(func, min_time: float) -> tuple[float, int]:
+    """
+    Calls `func` repeatedly for at least `min_time` seconds. Returns (seconds per call, number of calls).
+    """
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time or calls == 0:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+
+    return elapsed / calls, calls
+
+
+def run(quick: bool = False, min_time: float = 0.2) -> list[dict]:
+    results = []
+
+    def record(case, stage, func, n_chars=None):
+        seconds, calls = timeit(func, min_time)
+        entry = {'case': case, 'stage': stage, 'seconds': seconds, 'calls': calls}
+        if n_chars:
+            entry['chars_per_second'] = n_chars / seconds
+        results.append(entry)
+        print("{:<24} {:<20} {:>12.3f} us".format(case, stage, seconds * 1e6), file=sys.stderr)
+
+    for case, regex, text, run_re in cases(quick):
+        postfix = re2post(regex)
+        record(case, 're2post', lambda: re2post(regex))
+        record(case, 'post2nfa', lambda: post2nfa(postfix))
+        record(case, 'assign_state_ids', lambda: assign_state_ids(post2nfa(postfix)))
+        record(case, 're2ast', lambda: re2ast(regex))
+        record(case, 'ast2nfa', lambda: ast2nfa(re2ast(regex)))
+
+        nfa = post2nfa(postfix)
+        record(case, 'match', lambda: match(nfa, text), len(text))
+
+        lazy = LazyDfa(nfa)
+        record(case, 'lazy_dfa', lambda: lazy.match(text), len(text))
+
+        index = ClosureIndex(nfa)
+        record(case, 'match_indexed', lambda: match_indexed(index, text), len(text))
+
+        flat = flatten(nfa)
+        record(case, 'pike_vm', lambda: pike_match(flat, text), len(text))
+
+        try:
+            record(case, 'compile_dfa', lambda: compile_dfa(nfa))
+            dfa = compile_dfa(nfa)
+            record(case, 'dfa', lambda: dfa.match(text), len(text))
+        except StateLimitExceeded:
+            pass
+
+        std = re.compile(regex)
+        record(case, 're.compile', lambda: (re.purge(), re.compile(regex)))  # bypass re's own cache
+        if run_re:
+            record(case, 're.fullmatch', lambda: std.fullmatch(text), len(text))
+        else:
+            results.append({'case': case, 'stage': 're.fullmatch', 'skipped': 'exponential backtracking'})
+
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m tests.bench_regex', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help="only run the small cases")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum seconds spent per measurement")
+    parser.add_argument('--output', help="JSON file to write; defaults to stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'results': run(args.quick, args.min_time),
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import pytest
+
+from src.aho_corasick import AhoCorasick
+
+
+def test_aho_corasick_classic_example():
+    ac = AhoCorasick(['he', 'she', 'his', 'hers'])
+    assert list(ac.iter('ushers')) == [(4, 1), (4, 0), (6, 3)]
+    assert ac.find_words('ahishers') == {0, 1, 2, 3}
+    assert ac.find_words('xyz') == set()
+
+
+def test_aho_corasick_overlapping_and_repeated_words():
+    ac = AhoCorasick(['a', 'aa', 'aaa'])
+    assert list(ac.iter('aaa')) == [(1, 0), (2, 1), (2, 0), (3, 2), (3, 1), (3, 0)]
+
+
+def test_aho_corasick_many_words():
+    words = ['w{}x'.format(i) for i in range(1000)]
+    ac = AhoCorasick(words)
+    assert len(ac) == 1000
+    assert ac.find_words('..w17x..w999x..w1000x') == {17, 999}
+
+
+def test_aho_corasick_empty_word():
+    with pytest.raises(ValueError):
+        AhoCorasick(['a', ''])
@@ -0,0 +1,64 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.alphabet import CharClasses, char_classes, MAX_CODE_POINT
+
+
+def compile_nfa(regex):
+    return post2nfa(re2post(regex))
+
+
+def test_char_classes_of_literals():
+    classes = char_classes(compile_nfa('a(b|c)*a'))
+    assert len(classes) == 4
+
+    assert classes.classify('x') == 0
+    assert classes.classify('€') == 0
+    assert classes.classify(chr(MAX_CODE_POINT)) == 0
+    assert len({classes.classify(c) for c in 'abc'}) == 3
+    assert 0 not in {classes.classify(c) for c in 'abc'}
+
+
+def test_char_classes_merge_adjacent_intervals():
+    classes = char_classes(compile_nfa('ab'))
+    # [0, 'a'), 'a', 'b', ('b', max]
+    assert classes.boundaries == [0, ord('a'), ord('b'), ord('c')]
+    assert classes.interval_class == [0, 1, 2, 0]
+
+
+def test_char_classes_of_ranges():
+    # 'a'-'b' is only in [a-c], 'c' is in [a-c] and [c-e], 'd'-'e' is only in [c-e]
+    classes = char_classes(compile_nfa('[a-c][c-e]'))
+    assert len(classes) == 4
+    assert classes.classify('a') == classes.classify('b')
+    assert len({classes.classify(c) for c in 'ace'}) == 3
+    assert classes.classify('f') == 0
+
+    # '.' covers everything but a newline
+    classes = char_classes(compile_nfa('.'))
+    assert len(classes) == 2
+    assert classes.classify('\n') == 0
+    assert classes.classify(chr(MAX_CODE_POINT)) == classes.classify('x') == 1
+
+
+def test_char_classes_representatives():
+    classes = char_classes(compile_nfa('x|é'))
+    reps = classes.representatives()
+    assert len(reps) == len(classes) == 3
+    assert reps[0] == chr(0)
+    assert sorted(reps[1:]) == ['x', 'é']
+    for k, c in enumerate(reps):
+        assert classes.classify(c) == k
+
+
+def test_char_classes_memo():
+    classes = CharClasses([0, 100], [0, 1])
+    assert classes.classify('a') == 0
+    assert classes.classify('é') == 1
+    assert classes.memo == {'a': 0, 'é': 1}
+
+
+def test_char_classes_invalid():
+    with pytest.raises(ValueError):
+        char_classes(None)
@@ -0,0 +1,93 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.re2ast import re2ast, Literal
+from src.ast2nfa import ast2nfa
+from src.nfa_state import LiteralState, SplitState, AcceptState, reachable_states
+from src.nfa_simulation import match
+from src.prefilter import ast_literals
+from tests.test_post2nfa import slow, words, count_patch_walks
+
+
+def test_ast2nfa_literal():
+    start = ast2nfa(Literal('a'))
+    assert isinstance(start, LiteralState)
+    assert isinstance(start.next_state, AcceptState)
+
+
+def test_ast2nfa_alternation_is_a_chain():
+    # a|b|c: split(a, split(b, c)), all alternatives lead to the same accept state
+    start = ast2nfa(re2ast('a|b|c'))
+    assert isinstance(start, SplitState)
+    assert start.next_state_1.literal == 'a'
+    assert isinstance(start.next_state_2, SplitState)
+    assert start.next_state_2.next_state_1.literal == 'b'
+    assert start.next_state_2.next_state_2.literal == 'c'
+    assert start.next_state_1.next_state is start.next_state_2.next_state_2.next_state
+
+
+def test_ast2nfa_star():
+    start = ast2nfa(re2ast('a*'))
+    assert isinstance(start, SplitState)
+    assert start.next_state_1.literal == 'a'
+    assert start.next_state_1.next_state is start
+    assert isinstance(start.next_state_2, AcceptState)
+
+
+def test_ast2nfa_invalid():
+    assert ast2nfa(None) is None
+    with pytest.raises(ValueError):
+        ast2nfa(('not', 'a', 'node'))
+
+
+@pytest.mark.parametrize("regex", ['a', 'ab', 'a|b', 'a*b|c+', 'a(b|c)*d', '(a*)*', '(a|b)*a(a|b)', 'a?a?aa',
+                                   'a{2,3}', '(ab){0,2}c', '[a-c]+d', '.b'])
+def test_ast2nfa_agrees_with_post2nfa(regex):
+    nfa = ast2nfa(re2ast(regex))
+    legacy = post2nfa(re2post(regex))
+    for n in range(1, 6):
+        for i in range(4 ** n):
+            string = ''.join('abcd'[(i >> (2 * k)) & 3] for k in range(n))
+            assert match(nfa, string) == match(legacy, string), string
+
+
+@pytest.mark.parametrize("regex,string,expected", [
+    ('a\\*', 'a*', True),
+    ('a\\*', 'aa', False),
+    ('\\(\\d+\\)', '(42)', True),
+    ('\\w+@\\w+\\.com', 'joe_1@mail.com', True),
+    ('\\w+@\\w+\\.com', 'joe@mailxcom', False),
+    ('[\\]]+', ']]', True),
+    ('\\S\\s\\S', 'a b', True),
+])
+def test_ast2nfa_escapes(regex, string, expected):
+    assert match(ast2nfa(re2ast(regex)), string) == expected
+
+
+def test_ast2nfa_deep_ast():
+    # neither building the NFA nor extracting its literals recurses on the AST
+    node = re2ast('(' * 100 + 'ab' + '?' * 2000 + ')' * 100)
+    nfa = ast2nfa(node, captures=True)
+    assert match(nfa, 'a')
+    assert match(nfa, 'ab')
+    assert not match(nfa, 'abb')
+    assert ast_literals(node).exact == {'a', 'ab'}
+
+
+@pytest.mark.parametrize("n", [1000, 10000, pytest.param(100000, marks=slow)])
+def test_ast2nfa_many_alternatives(n):
+    nfa = ast2nfa(re2ast(words(n)))
+    assert match(nfa, 'w0')
+    assert match(nfa, 'w{}'.format(n - 1))
+    assert not match(nfa, 'w{}'.format(n))
+    assert len(reachable_states(nfa)) == len(words(n)) + 1
+    assert sum(isinstance(s, AcceptState) for s in reachable_states(nfa)) == 1
+
+
+@pytest.mark.parametrize("n", [1000, 10000, pytest.param(100000, marks=slow)])
+def test_ast2nfa_is_linear_in_alternatives(monkeypatch, n):
+    # splicing by walking to the end of the first list would visit O(n^2) nodes
+    walked = count_patch_walks(monkeypatch)
+    ast2nfa(re2ast(words(n)))
+    assert walked[0] <= len(words(n))  # each open end is patched once
@@ -0,0 +1,43 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.dfa import compile_dfa
+from src.nfa_simulation import match
+from src.batch import match_many
+
+
+@pytest.mark.parametrize("regex", ['a', 'ab', 'a|b', 'a*b|c+', 'a(b|c)*d', '(a|b)*a(a|b)', 'é+x'])
+def test_match_many_agrees_with_nfa(regex):
+    strings = ['', 'a', 'b', 'ab', 'ba', 'abd', 'acbd', 'aab', 'ccc', 'abba', 'ééx', 'xyz', 'a' * 20]
+    result = match_many(regex, strings)
+
+    assert result.dtype == bool
+    assert result.shape == (len(strings),)
+
+    nfa = post2nfa(re2post(regex))
+    start_accepting = compile_dfa(nfa).accepting[0]
+    expected = [match(nfa, s) if s else start_accepting for s in strings]
+    assert result.tolist() == expected
+
+
+def test_match_many_precompiled_dfa():
+    dfa = compile_dfa(post2nfa(re2post('ab*')))
+    assert match_many(dfa, np.array(['a', 'abbb', 'b'])).tolist() == [True, True, False]
+
+
+def test_match_many_edge_cases():
+    assert match_many('a', []).tolist() == []
+    assert match_many('a*', ['', '']).tolist() == [True, True]
+
+    with pytest.raises(ValueError):
+        match_many('(a', ['a'])
+
+
+def test_match_many_trailing_nul():
+    # NUL is an ordinary character, even at the end of a string
+    assert match_many('a*', ['a\x00', 'a']).tolist() == [False, True]
+    assert match_many('a\x00', ['a\x00', 'a', 'a\x00\x00']).tolist() == [True, False, False]
+    assert match_many('\x00*', ['\x00\x00', '']).tolist() == [True, True]
@@ -0,0 +1,20 @@
+import json
+
+from tests.bench_regex import run, main
+
+
+def test_bench_regex_smoke():
+    results = run(quick=True, min_time=0)
+
+    stages = {(r['case'], r['stage']) for r in results}
+    assert ('pathological_4', 'lazy_dfa') in stages
+    assert ('wide_alternation_10', 're.fullmatch') in stages
+    assert all(r['seconds'] > 0 for r in results if 'skipped' not in r)
+
+
+def test_bench_regex_writes_json(tmp_path, capsys):
+    output = tmp_path / 'results.json'
+    assert main(['--quick', '--min-time', '0', '--output', str(output)]) == 0
+
+    report = json.loads(output.read_text())
+    assert {'python', 'platform', 'timestamp', 'results'} <= set(report)
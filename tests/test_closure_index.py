@@ -0,0 +1,67 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.nfa_state import LiteralState, AcceptState, epsilon_closure
+from src.nfa_simulation import match
+from src.closure_index import ClosureIndex, match_indexed
+
+
+def compile_nfa(regex):
+    return post2nfa(re2post(regex))
+
+
+def test_closure_index_kernel_states():
+    start = compile_nfa('a*b')
+    index = ClosureIndex(start)
+
+    # 'a' loops back to the start state, so the only other kernel state is the one entered after 'b'
+    assert len(index.closures) == 2
+    assert index.closures[start] == epsilon_closure([start])
+
+    table = index.dispatch[start]
+    assert set(table) == {'a', 'b'}
+    (after_b,) = table['b']
+    assert isinstance(after_b, AcceptState)
+    assert index.accepting == {after_b}
+
+
+def test_closure_index_wide_alternation():
+    words = ['foo', 'bar', 'baz', 'qux', 'quux']
+    start = compile_nfa('|'.join(words))
+    index = ClosureIndex(start)
+
+    table = index.dispatch[start]
+    assert set(table) == {'f', 'b', 'q'}
+    assert len(table['b']) == 2
+    assert all(isinstance(s, LiteralState) for s in table['b'])
+
+
+@pytest.mark.parametrize("regex", ['a', 'ab', 'a|b', 'a*b|c+', 'a(b|c)*d', '(a*)*', '(a|b)*a(a|b)', 'ab|ac|ad',
+                                   '[ab]*c', 'a[^b]|ab', '.*a.'])
+def test_match_indexed_agrees_with_nfa(regex):
+    index = ClosureIndex(compile_nfa(regex))
+    nfa = compile_nfa(regex)
+    for n in range(1, 6):
+        for i in range(4 ** n):
+            string = ''.join('abcd'[(i >> (2 * k)) & 3] for k in range(n))
+            assert match_indexed(index, string) == match(nfa, string), string
+
+
+def test_closure_index_invalid():
+    with pytest.raises(ValueError):
+        ClosureIndex(None)
+
+    with pytest.raises(ValueError):
+        match_indexed(ClosureIndex(compile_nfa('a')), '')
+
+
+def test_closure_index_memo_is_bounded(monkeypatch):
+    monkeypatch.setattr('src.closure_index.MAX_MEMO_SIZE', 10)
+    index = ClosureIndex(post2nfa(re2post('[^,]+')))
+    text = ''.join(chr(0x4e00 + i) for i in range(100))
+    assert match_indexed(index, text)
+    assert match_indexed(index, text)  # characters beyond the memo are resolved again
+    assert index.n_memoized == 10
+    assert sum(len(table) for table in index.dispatch.values()) == 10
+    assert not match_indexed(index, text + ',')
@@ -0,0 +1,73 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.nfa_simulation import match
+from src.dfa import compile_dfa, StateLimitExceeded
+
+
+def compile_nfa(regex):
+    return post2nfa(re2post(regex))
+
+
+@pytest.mark.parametrize("regex,string,expected", [
+    ('a', 'a', True),
+    ('a', 'b', False),
+    ('ab', 'ab', True),
+    ('ab', 'abc', False),
+    ('a|b', 'b', True),
+    ('a|b', 'c', False),
+    ('a*', 'aaaa', True),
+    ('a+', 'a', True),
+    ('a?', 'aa', False),
+    ('a*b|c+', 'ab', True),
+    ('a*b|c+', 'ccc', True),
+    ('a*b|c+', 'abc', False),
+    ('a(b|c)d', 'acd', True),
+    ('a(b|c)d', 'ad', False),
+    ('(a*)*', 'aaa', True),
+])
+def test_dfa_matching(regex, string, expected):
+    dfa = compile_dfa(compile_nfa(regex))
+    assert dfa.match(string) == expected
+
+
+@pytest.mark.parametrize("regex", ['(a|b)*abb', 'a(b|c)*d', '(ab|a)(bc|c)', 'a*b*c*'])
+def test_dfa_agrees_with_nfa(regex):
+    dfa = compile_dfa(compile_nfa(regex))
+    nfa = compile_nfa(regex)
+    for n in range(1, 6):
+        for i in range(4 ** n):
+            string = ''.join('abcd'[(i >> (2 * k)) & 3] for k in range(n))
+            assert dfa.match(string) == match(nfa, string), string
+
+
+@pytest.mark.parametrize("regex,n_states", [
+    ('(a|b)*abb', 4),  # the textbook example
+    ('a*|a*', 1),
+    ('(a|b)*', 1),
+    ('ab|ac', 3),
+])
+def test_dfa_is_minimal(regex, n_states):
+    dfa = compile_dfa(compile_nfa(regex))
+    # plus one for the dead state
+    assert dfa.n_states == n_states + 1
+    assert dfa.start == 0
+    assert not dfa.accepting[dfa.dead]
+
+
+def test_dfa_state_limit():
+    nfa = compile_nfa('(a|b)*a(a|b)(a|b)(a|b)(a|b)')
+    with pytest.raises(StateLimitExceeded):
+        compile_dfa(nfa, max_states=16)
+
+    nfa = compile_nfa('(a|b)*a(a|b)(a|b)(a|b)(a|b)')
+    assert compile_dfa(nfa, max_states=100).n_states == 2 ** 5 + 1
+
+
+def test_dfa_invalid():
+    with pytest.raises(ValueError):
+        compile_dfa(None)
+
+    with pytest.raises(ValueError):
+        compile_dfa(compile_nfa('a')).match('')
@@ -0,0 +1,94 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.nfa_simulation import match, search, finditer
+from src.prefilter import required_prefixes
+from src.dfa_search import reverse_nfa, DfaSearch
+
+
+def compile_nfa(regex):
+    return post2nfa(re2post(regex))
+
+
+def strings(alphabet, max_len):
+    for n in range(1, max_len + 1):
+        for i in range(len(alphabet) ** n):
+            yield ''.join(alphabet[(i // len(alphabet) ** k) % len(alphabet)] for k in range(n))
+
+
+@pytest.mark.parametrize("regex", ['a', 'abc', 'a|bc', 'a*b', '(ab|c)*a', 'a(b|c)+', '(a|b)*a(a|b)', 'a{2,3}c?',
+                                   '[ab]c.'])
+def test_reverse_nfa_accepts_reversed_strings(regex):
+    nfa = compile_nfa(regex)
+    reversed_nfa = reverse_nfa(compile_nfa(regex))
+    for string in strings('abc', 5):
+        assert match(reversed_nfa, string[::-1]) == match(nfa, string), string
+
+
+def test_reverse_nfa_invalid():
+    with pytest.raises(ValueError):
+        reverse_nfa(None)
+
+
+@pytest.mark.parametrize("regex", ['a', 'ab', 'a|b', 'a*b|c+', 'a(b|c)*d', '(a*)*', '(a|b)*a(a|b)', 'abcd|c',
+                                   'a.*b|c', 'b*', '(ab|a)(bc|c)?', 'c(a|b){2,3}', '[ab]+c?'])
+def test_dfa_search_agrees_with_nfa_search(regex):
+    nfa = compile_nfa(regex)
+    prefixes = required_prefixes(nfa)
+    searchers = [DfaSearch(nfa), DfaSearch(nfa, prefixes)]
+    for string in strings('abcd', 5):
+        for pos in range(len(string) + 1):
+            for searcher in searchers:
+                assert searcher.search(string, pos) == search(nfa, string, pos, prefixes), (string, pos)
+
+
+@pytest.mark.parametrize("regex", ['a{2,4}', 'ca{2,}', '[ab]{1,3}c', 'b(a{2}|c)+'])
+def test_dfa_search_with_counters(monkeypatch, regex):
+    monkeypatch.setattr('src.nfa_fragment.MIN_COUNTER_BOUND', 2)
+    nfa = compile_nfa(regex)
+    counted = post2nfa(re2post(regex), counters=True)
+    searcher = DfaSearch(counted, required_prefixes(counted))
+    for string in strings('abcd', 6):
+        assert searcher.search(string) == search(nfa, string), string
+        assert match(reverse_nfa(counted), string[::-1]) == match(nfa, string), string
+
+
+def test_dfa_search_leftmost_start_is_not_the_earliest_end():
+    # 'c' ends first, but the leftmost match starts at 0 and ends later
+    searcher = DfaSearch(compile_nfa('abcd|c'))
+    assert searcher.search('abcd') == (0, 4)
+    assert searcher.search('abce') == (2, 3)
+
+
+def test_dfa_search_finditer():
+    nfa = compile_nfa('foo|bar')
+    searcher = DfaSearch(nfa, required_prefixes(nfa))
+    text = 'a foo and a bar, foobar'
+    assert list(searcher.finditer(text)) == list(finditer(nfa, text)) == [(2, 5), (12, 15), (17, 20), (20, 23)]
+
+    # empty matches move on by one character
+    assert list(DfaSearch(compile_nfa('a*')).finditer('baa')) == [(0, 0), (1, 3), (3, 3)]
+
+
+def test_dfa_search_builds_the_reverse_dfa_lazily():
+    searcher = DfaSearch(compile_nfa('ab'))
+    assert searcher.search('xxxx') is None
+    assert searcher._reverse is None
+    assert searcher.search('xxab') == (2, 4)
+    assert searcher._reverse is not None
+
+
+def test_dfa_search_falls_back_when_thrashing():
+    nfa = compile_nfa('(a|b)*a(a|b)(a|b)(a|b)')
+    searcher = DfaSearch(nfa, cache_size=2, max_flushes=1)
+    text = 'abbabaabbbaababa' * 4
+    assert searcher.search(text) == search(nfa, text)
+    assert searcher.flushes > 1
+
+
+def test_dfa_search_invalid():
+    with pytest.raises(ValueError):
+        DfaSearch(None)
+    with pytest.raises(ValueError):
+        DfaSearch(compile_nfa('a'), cache_size=1)
@@ -0,0 +1,95 @@
+import io
+
+import pytest
+
+from src.pattern import compile
+from src.grep import grep_file, main, _count_newlines
+
+
+def grep_lines(pattern, path, line_numbers=False):
+    lines = []
+    count = grep_file(pattern, path, lambda number, line: lines.append((number, bytes(line))), line_numbers)
+    return count, lines
+
+
+@pytest.fixture
+def log_files(tmp_path):
+    a = tmp_path / 'a.log'
+    a.write_bytes(b'start\nerror: disk full\nok\nwarning: low memory\nerror: timeout\n')
+    b = tmp_path / 'b.log'
+    b.write_bytes('café error\nnothing\nerrrror'.encode('utf-8'))  # no trailing newline
+    empty = tmp_path / 'empty.log'
+    empty.write_bytes(b'')
+    return str(a), str(b), str(empty)
+
+
+def test_grep_file(log_files):
+    a, b, empty = log_files
+
+    assert grep_lines(compile('error'), a) == (2, [(None, b'error: disk full'), (None, b'error: timeout')])
+    assert grep_lines(compile('error'), a, line_numbers=True)[1] == [(2, b'error: disk full'), (5, b'error: timeout')]
+    assert grep_lines(compile('er+or'), b, line_numbers=True) == (2, [(1, 'café error'.encode('utf-8')),
+                                                                     (3, b'errrror')])
+    assert grep_file(compile('o+k'), a) == 1
+    assert grep_lines(compile('error'), empty) == (0, [])
+
+
+def test_grep_file_line_numbers_after_skipped_lines(tmp_path):
+    path = tmp_path / 'big.log'
+    path.write_bytes(b'noise\n' * 1000 + b'error 1\n' + b'\n' * 500 + b'error 2')
+    assert grep_lines(compile('error'), str(path), True)[1] == [(1001, b'error 1'), (1502, b'error 2')]
+
+
+def test_count_newlines():
+    data = b'a\nb\n\nc'
+    assert _count_newlines(data, 0, len(data)) == 3
+    assert _count_newlines(data, 2, 4) == 1
+    assert _count_newlines(data, 6, 7) == 0
+
+
+def test_grep_file_without_prefix(log_files):
+    a, _, _ = log_files
+    # 'x*' has no required prefix, so every line is a candidate and every line matches
+    assert grep_file(compile('x*'), a) == 5
+
+
+def test_main_prints_matching_lines(log_files):
+    a, b, _ = log_files
+
+    out = io.BytesIO()
+    assert main(['-n', 'timeout|full', a], out) == 0
+    assert out.getvalue() == b'2:error: disk full\n5:error: timeout\n'
+
+    out = io.BytesIO()
+    assert main(['-c', '-j', '2', 'error', a, b], out) == 0
+    assert out.getvalue() == a.encode() + b':2\n' + b.encode() + b':1\n'
+
+
+def test_main_streams_each_file(log_files, monkeypatch):
+    a, b, _ = log_files
+
+    # the lines of a file are written before the next file is scanned
+    written_before = []
+    out = io.BytesIO()
+
+    def scan(*args):
+        written_before.append(out.getvalue())
+        return grep_file(*args)
+
+    monkeypatch.setattr('src.grep.grep_file', scan)
+    assert main(['error', a, b], out) == 0
+    assert written_before == [b'', a.encode() + b':error: disk full\n' + a.encode() + b':error: timeout\n']
+
+    # with several jobs, the output stays in argument order
+    out = io.BytesIO()
+    assert main(['-j', '2', 'error', a, b], out) == 0
+    assert out.getvalue() == (written_before[1] + b.encode() + ':café error\n'.encode('utf-8'))
+
+
+def test_main_exit_status(log_files, capsys):
+    a, _, _ = log_files
+
+    assert main(['nomatch', a], io.BytesIO()) == 1
+    assert main(['(', a], io.BytesIO()) == 2
+    assert main(['error', a + '.missing'], io.BytesIO()) == 2
+    assert 'missing' in capsys.readouterr().err
@@ -0,0 +1,82 @@
+from src import instrument
+from src.instrument import MatchStats, StageTiming, collect, add_callback, remove_callback, timed
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.nfa_simulation import match
+from src.lazy_dfa import LazyDfa
+from src.pattern import Pattern
+
+
+def compile_nfa(regex):
+    return post2nfa(re2post(regex))
+
+
+def test_disabled_by_default():
+    assert instrument.enabled is False
+
+    with collect() as events:
+        assert instrument.enabled is True
+    assert instrument.enabled is False
+    assert events == []
+
+
+def test_match_stats():
+    nfa = compile_nfa('a(b|c)*d')
+    with collect() as events:
+        assert match(nfa, 'abcd')
+        assert not match(nfa, 'ax')
+
+    stats, failed = events
+    assert isinstance(stats, MatchStats)
+    assert stats.engine == 'nfa_simulation'
+    assert stats.chars == 4
+    assert len(stats.active_states) == 5
+    assert stats.peak_closure == max(stats.active_states)
+    assert stats.seconds > 0
+
+    assert failed.chars == 2
+    assert failed.active_states[-1] == 0
+
+
+def test_lazy_dfa_cache_stats():
+    dfa = LazyDfa(compile_nfa('a(b|c)*d'))
+    with collect() as events:
+        dfa.match('abcd')
+        dfa.match('abcd')
+
+    first, second = events
+    assert (first.cache_hits, first.cache_misses) == (0, 4)
+    assert (second.cache_hits, second.cache_misses) == (4, 0)
+    assert first.engine == 'lazy_dfa'
+
+
+def test_lazy_dfa_fallback_is_reported():
+    dfa = LazyDfa(compile_nfa('(a|b)*a(a|b)'), cache_size=2, max_flushes=0)
+    with collect() as events:
+        dfa.match('abab')
+
+    assert events[0].engine == 'lazy_dfa+nfa_simulation'
+
+
+def test_stage_timings():
+    with collect() as events:
+        Pattern('ab*').match('abbb')
+
+    stages = [e.stage for e in events if isinstance(e, StageTiming)]
+    assert stages == ['parse', 'ast2nfa', 'optimize', 'simulation']
+    assert any(isinstance(e, MatchStats) for e in events)
+
+
+def test_callbacks():
+    seen = []
+    add_callback(seen.append)
+    try:
+        with timed('custom'):
+            pass
+    finally:
+        remove_callback(seen.append)
+
+    with timed('ignored'):
+        pass
+
+    assert [e.stage for e in seen] == ['custom']
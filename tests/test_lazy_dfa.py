@@ -0,0 +1,75 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.nfa_simulation import match
+from src.lazy_dfa import LazyDfa
+
+
+def compile_nfa(regex):
+    return post2nfa(re2post(regex))
+
+
+@pytest.mark.parametrize("regex,string,expected", [
+    ('a', 'a', True),
+    ('a', 'b', False),
+    ('ab', 'ab', True),
+    ('ab', 'a', False),
+    ('a|b', 'b', True),
+    ('a|b', 'c', False),
+    ('ab|cd', 'cd', True),
+    ('a*', 'aaaa', True),
+    ('a+', 'a', True),
+    ('a?', 'a', True),
+    ('a?', 'aa', False),
+    ('a*b|c+', 'ab', True),
+    ('a*b|c+', 'ccc', True),
+    ('a*b|c+', 'abc', False),
+    ('a(b|c)d', 'acd', True),
+    ('a(b|c)d', 'ad', False),
+    ('(a*)*', 'aaa', True),
+])
+def test_lazy_dfa_matching(regex, string, expected):
+    dfa = LazyDfa(compile_nfa(regex))
+    assert dfa.match(string) == expected
+    # a second run goes through the memoized transitions
+    assert dfa.match(string) == expected
+
+
+def test_lazy_dfa_memoizes_transitions():
+    dfa = LazyDfa(compile_nfa('a(b|c)*d'))
+    dfa.match('abcbcd')
+
+    d = dfa.start
+    for c in 'abcbcd':
+        assert c in d.transitions
+        d = d.transitions[c]
+    assert d.accepting
+
+
+def test_lazy_dfa_dead_state():
+    dfa = LazyDfa(compile_nfa('ab'))
+    assert dfa.match('ba') is False
+    assert dfa.is_dead(dfa.next_state(dfa.start, 'b'))
+
+
+@pytest.mark.parametrize("string", ['ab', 'aab', 'abab', 'abbbbab', 'aaaa', 'abba', 'b'])
+def test_lazy_dfa_flush_and_fallback(string):
+    regex = '(a|b)*a(a|b)(a|b)'
+    expected = match(compile_nfa(regex), string)
+
+    # Tiny budget: the cache gets flushed constantly and the matcher falls back to NFA simulation
+    dfa = LazyDfa(compile_nfa(regex), cache_size=2, max_flushes=0)
+    assert dfa.match(string) == expected
+
+    dfa = LazyDfa(compile_nfa(regex), cache_size=2, max_flushes=1000)
+    assert dfa.match(string) == expected
+    assert len(dfa._cache) <= 2
+
+
+def test_lazy_dfa_invalid():
+    with pytest.raises(ValueError):
+        LazyDfa(None)
+
+    with pytest.raises(ValueError):
+        LazyDfa(compile_nfa('a')).match('')
@@ -0,0 +1,80 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.nfa_state import CharSet
+from src.nfa_array import (flatten, post2flat, match_flat, epsilon_closure_flat,
+                           OP_LITERAL, OP_SPLIT, OP_ACCEPT, OP_CLASS)
+
+
+def test_flatten_one_alternate():
+    nfa = post2flat('ab|')
+    assert len(nfa) == 4
+    assert nfa.start == 0
+    assert list(nfa.opcode) == [OP_SPLIT, OP_LITERAL, OP_LITERAL, OP_ACCEPT]
+    assert list(nfa.literal) == [-1, ord('a'), ord('b'), -1]
+    assert list(nfa.out1) == [1, 3, 3, -1]
+    assert list(nfa.out2) == [2, -1, -1, -1]
+
+
+def test_flatten_one_star():
+    nfa = post2flat('a*')
+    assert list(nfa.opcode) == [OP_SPLIT, OP_LITERAL, OP_ACCEPT]
+    assert list(nfa.out1) == [1, 0, -1]
+    assert list(nfa.out2) == [2, -1, -1]
+
+
+def test_flatten_char_classes():
+    nfa = flatten(post2nfa(re2post('[ab]x|[ab]y')))
+    classes = [s for s in range(len(nfa)) if nfa.opcode[s] == OP_CLASS]
+    assert len(classes) == 2
+    assert all(nfa.literal[s] == -1 for s in classes)
+    assert nfa.char_sets == [CharSet([(ord('a'), ord('b'))])]  # both states share one CharSet
+    assert {nfa.char_set[s] for s in classes} == {0}
+
+
+def test_flat_epsilon_closure():
+    nfa = post2flat('ab.')
+    assert epsilon_closure_flat(nfa, [nfa.start]) == {0}
+
+    nfa = post2flat('a?')
+    assert epsilon_closure_flat(nfa, [nfa.start]) == {0, 1, 2}
+    assert epsilon_closure_flat(nfa, [1]) == {1}
+
+
+def test_post2flat_invalid():
+    assert post2flat(None) is None
+    assert post2flat('') is None
+
+    with pytest.raises(ValueError):
+        flatten(None)
+
+
+@pytest.mark.parametrize("regex,string,expected", [
+    ('a', 'a', True),
+    ('a', 'b', False),
+    ('ab', 'ab', True),
+    ('a|b', 'b', True),
+    ('a*', 'aaaa', True),
+    ('a+', 'a', True),
+    ('a?', 'aa', False),
+    ('a*b|c+', 'ab', True),
+    ('a*b|c+', 'abc', False),
+    ('a(b|c)d', 'acd', True),
+    ('(a*)*', 'aaa', True),
+    ('é+', 'éé', True),
+    ('[a-c]+x', 'abcx', True),
+    ('[^a-c]x', 'bx', False),
+    ('.é', 'xé', True),
+])
+def test_match_flat(regex, string, expected):
+    nfa = flatten(post2nfa(re2post(regex)))
+    assert match_flat(nfa, string) == expected
+
+
+def test_match_flat_invalid():
+    with pytest.raises(ValueError):
+        match_flat(None, 'a')
+
+    with pytest.raises(ValueError):
+        match_flat(post2flat('a'), '')
@@ -0,0 +1,89 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.nfa_state import LiteralState, SplitState, AcceptState, reachable_states
+from src.nfa_simulation import match, search
+from src.nfa_optimize import (remove_redundant_splits, merge_epsilon_chains, collapse_literal_runs, optimize,
+                              MAX_RUN_LENGTH)
+
+
+def compile_nfa(regex):
+    return post2nfa(re2post(regex))
+
+
+def count_splits(start_state):
+    return sum(isinstance(s, SplitState) for s in reachable_states(start_state))
+
+
+def test_remove_redundant_splits():
+    # 'a{0}b' starts with a split whose both edges lead to 'b'
+    start = remove_redundant_splits(compile_nfa('a{0}b'))
+    assert isinstance(start, LiteralState)
+    assert start.literal == 'b'
+    assert isinstance(start.next_state, AcceptState)
+
+    # '(a{0})*b' leaves a split looping onto itself
+    start = remove_redundant_splits(compile_nfa('(a{0})*b'))
+    assert count_splits(start) == 0
+
+
+def test_merge_epsilon_chains():
+    # 'a??b': the outer split only adds a second path to 'b'
+    nfa = compile_nfa('a??b')
+    assert count_splits(nfa) == 2
+    start = merge_epsilon_chains(nfa)
+    assert count_splits(start) == 1
+    assert isinstance(start, SplitState)
+    assert start.next_state_1.literal == 'a'
+    assert start.next_state_2.literal == 'b'
+
+    # '(a*)*b': an epsilon cycle of two splits
+    start = merge_epsilon_chains(compile_nfa('(a*)*b'))
+    assert count_splits(start) == 1
+
+
+def test_merge_epsilon_chains_never_grows():
+    # every optional shares its skip edge with the next one; merging would need more splits than there are
+    nfa = compile_nfa('a?b?c?d?e?')
+    n_states = len(reachable_states(nfa))
+    assert merge_epsilon_chains(nfa) is nfa
+    assert len(reachable_states(nfa)) == n_states
+
+
+def test_collapse_literal_runs():
+    start = collapse_literal_runs(compile_nfa('abc(d|e)'))
+    text, exit_state = start.run
+    assert text == 'abc'
+    assert isinstance(exit_state, SplitState)
+    assert start.next_state.run[0] == 'bc'
+    assert start.next_state.next_state.run is None  # a run of one literal
+
+    start = collapse_literal_runs(compile_nfa('a' * (MAX_RUN_LENGTH + 5)))
+    text, exit_state = start.run
+    assert text == 'a' * MAX_RUN_LENGTH
+    assert exit_state.run[0] == 'aaaaa'
+
+
+def test_optimize_keeps_the_accept_state():
+    nfa = compile_nfa('(a|b)*c')
+    accept = [s for s in reachable_states(nfa) if isinstance(s, AcceptState)]
+    assert [s for s in reachable_states(optimize(nfa)) if isinstance(s, AcceptState)] == accept
+
+
+def test_optimize_invalid():
+    assert optimize(None) is None
+
+
+@pytest.mark.parametrize("regex", ['abc', 'a??b', '(a*)*b', '(a|b)*abb', 'a?b?c?a?b?', '(a{0})*b', 'x{0}a',
+                                   '((a|b)?)*c', '(abc)*', 'a{2,4}b?', 'x*abc', '[ab]c.d', '(ab|ac)+'])
+def test_optimize_agrees_with_nfa(regex):
+    nfa = compile_nfa(regex)
+    optimized = optimize(compile_nfa(regex))
+    assert len(reachable_states(optimized)) <= len(reachable_states(nfa))
+
+    for n in range(1, 6):
+        for i in range(5 ** n):
+            string = ''.join('abcdx'[(i // 5 ** k) % 5] for k in range(n))
+            assert match(optimized, string) == match(nfa, string), string
+            assert search(optimized, string) == search(nfa, string), string
@@ -1,9 +1,13 @@
+import re
+
 import pytest
 
 from src.re2post import re2post
 from src.post2nfa import post2nfa
-from src.nfa_simulation import match
-from src.nfa_state import State
+from src.nfa_simulation import match, search, finditer, capture_match, capture_search
+from src.nfa_optimize import optimize
+from src.prefilter import required_prefixes
+from src.nfa_state import State, CounterState, reachable_states
 
 
 def compile_nfa(regex):
@@ -84,3 +88,91 @@ def test_invalid_nfa():
 def test_invalid_regexes(regex):
     with pytest.raises((ValueError, AssertionError)):
         compile_nfa(regex)
+
+
+@pytest.mark.parametrize("regex,string,expected", [
+    ('a', 'a', (0, 1)),
+    ('a', 'bba', (2, 3)),
+    ('a', 'bbb', None),
+    ('ab', 'xxabxab', (2, 4)),
+    ('a+', 'baaab', (1, 4)),  # longest
+    ('a*', 'baa', (0, 0)),  # leftmost, even if empty
+    ('ab|abcd', 'xabcd', (1, 5)),
+    ('b|abc', 'abc', (0, 3)),  # leftmost beats earliest-ending
+    ('a(b|c)d', 'abacdx', (2, 5)),
+    ('a', '', None),
+])
+def test_nfa_search(regex, string, expected):
+    nfa = compile_nfa(regex)
+    assert search(nfa, string) == expected
+
+
+def test_nfa_search_pos():
+    nfa = compile_nfa('ab')
+    assert search(nfa, 'abab', 1) == (2, 4)
+    assert search(nfa, 'abab', 3) is None
+
+
+@pytest.mark.parametrize("regex,string", [
+    ('ab', 'xxabxab'),
+    ('b|abc', 'zzabcz'),
+    ('a(b|c)d', 'abacdx'),
+    ('foo|bar', 'xxbaxfoo'),
+    ('ab+c', 'abbabbbc'),
+])
+def test_nfa_search_with_prefixes(regex, string):
+    nfa = compile_nfa(regex)
+    prefixes = required_prefixes(nfa)
+    assert prefixes is not None
+    assert search(nfa, string, 0, prefixes) == search(nfa, string)
+
+
+def test_nfa_finditer():
+    nfa = compile_nfa('ab+')
+    assert list(finditer(nfa, 'abxabbbaab', 0, required_prefixes(nfa))) == [(0, 2), (3, 7), (8, 10)]
+
+    # empty matches advance by one character
+    nfa = compile_nfa('a*')
+    assert list(finditer(nfa, 'baa')) == [(0, 0), (1, 3), (3, 3)]
+
+
+@pytest.mark.parametrize("regex", ['(a|ab)(c|bcd)', '(a*)(b|abc)', '(ab|a)(bc|c)?', '((a|b)c)+', 'a(b)?c', '(a|b)*(b)',
+                                   '(a(b)?)+', '([ab]+)(c)'])
+def test_capture_search_agrees_with_re(regex):
+    n_groups = re.compile(regex).groups
+    nfa = post2nfa(re2post(regex, capture=True))
+    optimized = optimize(post2nfa(re2post(regex, capture=True)))
+    for n in range(6):
+        for i in range(3 ** n):
+            string = ''.join('abc'[(i // 3 ** k) % 3] for k in range(n))
+            for find, expected in [(capture_search, re.search(regex, string)),
+                                   (capture_match, re.fullmatch(regex, string))]:
+                if expected is not None:
+                    expected = [expected.span(k) if expected.group(k) is not None else None
+                                for k in range(n_groups + 1)]
+                assert find(nfa, string, n_groups) == expected, (find.__name__, string)
+                assert find(optimized, string, n_groups) == expected, (find.__name__, string)
+
+
+@pytest.mark.parametrize("regex", ['(a{2,4})', '(a{3,})(b)', '([ab]{0,3})b', '((a{2})+)', '(a{1,3})(a{2})',
+                                   '(a{2,3}|b){1,2}', '(a{0,2})(a{2,})c'])
+def test_counters_agree_with_unrolling(monkeypatch, regex):
+    monkeypatch.setattr('src.nfa_fragment.MIN_COUNTER_BOUND', 2)
+    n_groups = re.compile(regex).groups
+    unrolled = post2nfa(re2post(regex, capture=True))
+    counted = post2nfa(re2post(regex, capture=True), counters=True)
+    assert any(isinstance(s, CounterState) for s in reachable_states(counted))
+
+    for n in range(8):
+        for i in range(3 ** n):
+            string = ''.join('abc'[(i // 3 ** k) % 3] for k in range(n))
+            if string:
+                assert match(counted, string) == match(unrolled, string), string
+            assert search(counted, string) == search(unrolled, string), string
+            for find in (capture_search, capture_match):
+                assert find(counted, string, n_groups) == find(unrolled, string, n_groups), (find.__name__, string)
+
+
+def test_capture_invalid():
+    with pytest.raises(ValueError):
+        capture_search(None, 'a', 0)
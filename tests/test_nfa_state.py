@@ -1,7 +1,7 @@
 import pytest
 
-from src.nfa_state import (SplitState, LiteralState, AcceptState, epsilon_closure, epsilon_closure_recursive,
-                           assign_state_ids)
+from src.nfa_state import (SplitState, LiteralState, AcceptState, CharSet, CharClassState, epsilon_closure,
+                           epsilon_closure_recursive, assign_state_ids)
 from src.post2nfa import post2nfa
 
 
@@ -167,3 +167,23 @@ def test_epsilon_closure_recursive_with_loop(setup_loop_nfa):
     closure_1 = epsilon_closure([start_state])
     closure_2 = epsilon_closure_recursive([start_state])
     assert closure_1 == closure_2
+
+
+def test_char_set():
+    chars = CharSet([(ord('0'), ord('9')), (ord('a'), ord('z')), (0x4e00, 0x9fff)])
+    assert all(c in chars for c in '09az一')
+    assert not any(c in chars for c in '/:`{A€')
+    assert chr(0x9fff) in chars
+    assert chr(0xa000) not in chars
+    assert len(chars) == 10 + 26 + 0x5200
+
+    assert CharSet([]) == CharSet(())
+    assert 'a' not in CharSet([])
+    assert hash(CharSet([(1, 2)])) == hash(CharSet(((1, 2),)))
+
+
+def test_char_class_state_is_one_state():
+    start = post2nfa('[a-z0-9]')
+    assert isinstance(start, CharClassState)
+    assert isinstance(start.next_state, AcceptState)
+    assert 'q' in start.chars and '5' in start.chars and '-' not in start.chars
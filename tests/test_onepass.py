@@ -0,0 +1,74 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.re2ast import re2ast, count_groups
+from src.ast2nfa import ast2nfa
+from src.nfa_optimize import optimize
+from src.nfa_simulation import capture_match
+from src.onepass import onepass_dfa
+from src.pattern import compile
+
+
+def compile_nfa(regex):
+    return post2nfa(re2post(regex, capture=True))
+
+
+@pytest.mark.parametrize("regex,expected", [
+    ('a(b)c', True),
+    ('(a|b)*c', True),
+    ('(ab|cd)(e)', True),
+    ('a(b*)c', True),
+    ('(a*)(b*)', True),
+    ('(a|ab)(c)', False),  # both alternatives start with 'a'
+    ('(a*)(a)', False),
+    ('(a|b)*b', False),
+    ('a?a', False),
+])
+def test_onepass_detection(regex, expected):
+    assert (onepass_dfa(compile_nfa(regex), regex.count('(')) is not None) == expected
+
+
+def test_onepass_max_nodes():
+    nfa = compile_nfa('(abcdef)')
+    assert onepass_dfa(nfa, 1, max_nodes=3) is None
+    assert onepass_dfa(nfa, 1).n_nodes == 7
+
+
+def test_onepass_declines_counters():
+    nfa = ast2nfa(re2ast('(a{100})b'), captures=True, counters=True)
+    assert onepass_dfa(nfa, 1) is None
+    assert onepass_dfa(ast2nfa(re2ast('(a{100})b'), captures=True), 1) is not None
+
+
+def test_onepass_invalid():
+    with pytest.raises(ValueError):
+        onepass_dfa(None, 0)
+
+
+@pytest.mark.parametrize("regex", ['a(b)c', '(a|b)*c', '(ab|cd)(e)?', 'a(b*)c', '(a*)(b*)', '((a)|(b))*c',
+                                   '(a(b)?)*', '(a+)(b+)(c+)', '([ab]*)c(a|bb)'])
+def test_onepass_agrees_with_pike(regex):
+    node = re2ast(regex)
+    n_groups = count_groups(node)
+    nfa = optimize(ast2nfa(node, captures=True))
+    dfa = onepass_dfa(nfa, n_groups)
+    assert dfa is not None
+
+    for n in range(7):
+        for i in range(3 ** n):
+            string = ''.join('abc'[(i // 3 ** k) % 3] for k in range(n))
+            assert dfa.match(string) == capture_match(nfa, string, n_groups), string
+
+
+def test_pattern_uses_onepass():
+    p = compile('key=([a-z]+);value=(\\d+)')
+    assert p._onepass is not None
+    assert p.match_groups('key=abc;value=42') == [(0, 16), (4, 7), (14, 16)]
+    assert p.match_groups('key=abc;value=') is None
+    assert p.match_groups('key=ab¢;value=1') is None
+
+    # not one-pass: falls back to the Pike VM
+    p = compile('(a|ab)(c|bcd)')
+    assert p._onepass is None
+    assert p.match_groups('abcd') == [(0, 4), (0, 1), (1, 4)]
@@ -0,0 +1,68 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.nfa_simulation import match
+from src.dfa import compile_dfa
+from src.parallel import _converge, chunk_mapping, parallel_match, parallel_match_file
+
+
+def compile_dfa_of(regex):
+    return compile_dfa(post2nfa(re2post(regex)))
+
+
+def test_chunk_mapping_composes():
+    dfa = compile_dfa_of('(a|b)*abb')
+    text = 'abababbaabb'
+    for cut in range(len(text) + 1):
+        m1 = chunk_mapping(dfa, text[:cut])
+        m2 = chunk_mapping(dfa, text[cut:])
+        whole = chunk_mapping(dfa, text)
+        assert [m2[m1[s]] for s in range(dfa.n_states)] == whole
+
+
+@pytest.mark.parametrize("regex,text", [
+    ('(a|b)*abb', 'ab' * 50 + 'abb'),
+    ('(a|b)*abb', 'ab' * 50 + 'aba'),
+    ('(ab|é)*', 'abé' * 40),
+    ('(ab|é)*', 'abé' * 40 + 'a'),
+])
+def test_parallel_match(regex, text):
+    dfa = compile_dfa_of(regex)
+    expected = match(post2nfa(re2post(regex)), text)
+    assert parallel_match(dfa, text, workers=2, chunk_size=7) == expected
+    assert parallel_match(dfa, text, workers=1, chunk_size=7) == expected
+
+
+def test_parallel_match_file(tmp_path):
+    dfa = compile_dfa_of('(ab|é)*')
+    path = tmp_path / 'input.txt'
+
+    path.write_bytes(('abé' * 100).encode('utf-8'))
+    # a chunk size of 5 bytes would cut inside 'é' if the cuts were not adjusted
+    assert parallel_match_file(dfa, str(path), workers=2, chunk_size=5) is True
+
+    path.write_bytes(('abé' * 100 + 'b').encode('utf-8'))
+    assert parallel_match_file(dfa, str(path), workers=2, chunk_size=5) is False
+
+
+def test_parallel_match_empty_input(tmp_path):
+    dfa = compile_dfa_of('a*')
+    assert parallel_match(dfa, '') is True
+
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+    assert parallel_match_file(compile_dfa_of('a+'), str(path)) is False
+
+
+def test_chunk_mapping_drops_dead_runs():
+    dfa = compile_dfa_of('(a|b)*abb')
+    assert dfa.dead >= 0
+
+    # every live run is in the same state after 'abb', so the rest of the chunk is read by a single run
+    i, groups = _converge(dfa, 'abb' + 'ab' * 1000)
+    assert i <= 3
+    assert len(groups) == 1
+
+    mapping = chunk_mapping(dfa, 'abbc' + 'ab' * 10)
+    assert mapping == [dfa.dead] * dfa.n_states
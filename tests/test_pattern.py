@@ -0,0 +1,159 @@
+import re
+from time import perf_counter
+
+import pytest
+
+from src import pattern
+from src.pattern import compile, Pattern, cache_info, purge, set_cache_size, DEFAULT_CACHE_SIZE
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    purge()
+    set_cache_size(DEFAULT_CACHE_SIZE)
+    yield
+    purge()
+    set_cache_size(DEFAULT_CACHE_SIZE)
+
+
+@pytest.mark.parametrize("regex,string,expected", [
+    ('a', 'a', True),
+    ('a', 'b', False),
+    ('a*b|c+', 'ab', True),
+    ('a(b|c)d', 'ad', False),
+    ('a*', '', True),
+    ('a+', '', False),
+    ('a{2,3}', 'a', False),
+    ('a{2,3}', 'aaa', True),
+    ('a{2,3}', 'aaaa', False),
+    ('a{2,}', 'aaaaaa', True),
+    ('a{0,2}', '', True),
+    ('(ab){2}c', 'ababc', True),
+    ('(ab){2}c', 'abc', False),
+    ('x(a|b){0}y', 'xy', True),
+    ('[a-z0-9]+', 'abc123', True),
+    ('[a-z0-9]+', 'abC', False),
+    ('[^,]*,[^,]*', 'ab,cd', True),
+    ('[^,]*,[^,]*', 'ab,c,d', False),
+    ('a.c', 'abc', True),
+    ('a.c', 'a\nc', False),
+    ('[]-]+', '-]-', True),
+])
+def test_pattern_match(regex, string, expected):
+    assert compile(regex).match(string) == expected
+
+
+def test_pattern_search():
+    p = compile('a(b|c)+')
+    assert p.search('xxabcbx') == (2, 6)
+    assert p.search('xxabcbx', 3) is None
+    assert p.search('') is None
+
+
+def test_pattern_finditer():
+    p = compile('foo|bar')
+    assert list(p.finditer('a foo and a bar, foobar')) == [(2, 5), (12, 15), (17, 20), (20, 23)]
+    assert list(p.finditer('nothing here')) == []
+
+
+def test_pattern_is_immutable():
+    p = compile('ab')
+    assert p.pattern == 'ab'
+    with pytest.raises(AttributeError):
+        p.pattern = 'cd'
+    with pytest.raises(AttributeError):
+        p._dfa = None
+
+
+def test_pattern_equality():
+    assert Pattern('ab') == Pattern('ab')
+    assert hash(Pattern('ab')) == hash(Pattern('ab'))
+    assert Pattern('ab') != Pattern('ba')
+    assert repr(Pattern('ab')) == "compile('ab')"
+
+
+def test_compile_cache_hits_and_misses():
+    p1 = compile('ab')
+    p2 = compile('ab')
+    assert p1 is p2
+
+    compile('cd')
+    assert cache_info() == (1, 2, DEFAULT_CACHE_SIZE, 2)
+
+    purge()
+    assert cache_info() == (0, 0, DEFAULT_CACHE_SIZE, 0)
+    assert compile('ab') is not p1
+
+
+def test_compile_cache_evicts_least_recently_used():
+    set_cache_size(2)
+    p_a = compile('a')
+    compile('b')
+    compile('a')  # 'a' becomes the most recently used
+    compile('c')  # evicts 'b'
+
+    assert list(pattern._cache) == ['a', 'c']
+    assert compile('a') is p_a
+    assert cache_info().currsize == 2
+
+    set_cache_size(0)
+    assert cache_info().currsize == 0
+
+
+@pytest.mark.parametrize("regex", ['(', '*', 'a)', '', '(a{1000}){1000}'])
+def test_compile_invalid(regex):
+    with pytest.raises(ValueError):
+        compile(regex)
+    assert cache_info().currsize == 0
+
+
+def test_pattern_stream():
+    m = compile('ab*c').stream()
+    for chunk in (b'a', b'bbb', b'c'):
+        m.feed(chunk)
+    assert m.finish()
+
+
+def test_pattern_escapes():
+    p = compile('\\d+\\.\\d+')
+    assert p.match('3.14')
+    assert not p.match('3x14')
+    assert p.search('pi is 3.14!') == (6, 10)
+
+
+@pytest.mark.parametrize("regex,string", [
+    ('(a|ab)(c|bcd)(d*)', 'abcd'),
+    ('(\\w+)@(\\w+)\\.com', 'mail joe@example.com now'),
+    ('((a)|(b))+', 'xabba'),
+    ('(a+)(a*)', 'aaa'),
+    ('(?:x(\\d+))?y', 'x12y'),
+    ('(a){0}b', 'b'),
+])
+def test_pattern_search_groups_agrees_with_re(regex, string):
+    m = re.search(regex, string)
+    expected = [m.span(k) if m.group(k) is not None else None for k in range(m.re.groups + 1)]
+    p = compile(regex)
+    assert p.groups == m.re.groups
+    assert p.search_groups(string) == expected
+
+
+def test_pattern_match_groups():
+    p = compile('(\\d+)-(\\d+)(?:-(\\d+))?')
+    assert p.match_groups('10-200') == [(0, 6), (0, 2), (3, 6), None]
+    assert p.match_groups('1-2-3') == [(0, 5), (0, 1), (2, 3), (4, 5)]
+    assert p.match_groups('1-2-') is None
+    assert p.search_groups('id 1-2-3', 3) == [(3, 8), (3, 4), (5, 6), (7, 8)]
+
+    p = compile('ab')
+    assert p.groups == 0
+    assert p.match_groups('ab') == [(0, 2)]
+
+
+def test_pattern_groups_on_hostile_input():
+    # a backtracking engine takes exponential time here; the Pike VM is linear in the input
+    p = compile('(a*)*(b)')
+    text = 'a' * 5000
+    start = perf_counter()
+    assert p.search_groups(text) is None
+    assert p.match_groups(text + 'b')[2] == (5000, 5001)
+    assert perf_counter() - start < 10
@@ -0,0 +1,79 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.nfa_array import flatten, post2flat, match_flat, OP_SPLIT
+from src.nfa_simulation import match
+from src.pike_vm import SparseSet, add_thread, thread_stack, pike_match
+
+
+def compile_flat(regex):
+    return flatten(post2nfa(re2post(regex)))
+
+
+def test_sparse_set():
+    s = SparseSet(8)
+    assert len(s) == 0
+    assert s.add(3)
+    assert s.add(5)
+    assert not s.add(3)
+    assert 3 in s and 5 in s and 4 not in s
+    assert list(s) == [3, 5]
+
+    s.clear()
+    assert len(s) == 0
+    assert 3 not in s
+    assert s.add(5)
+    assert list(s) == [5]
+
+
+def test_add_thread_follows_splits_in_priority_order():
+    nfa = post2flat('ab|c|')  # (a|b)|c
+    states = SparseSet(len(nfa))
+    add_thread(nfa, states, nfa.start)
+    literals = [chr(nfa.literal[s]) for s in states if nfa.opcode[s] != OP_SPLIT]
+    assert literals == ['a', 'b', 'c']
+
+
+def test_add_thread_reuses_a_preallocated_stack():
+    # a chain of 99 splits, followed first on the out2 side: the deepest stack add_thread can need
+    nfa = post2flat('a' + 'a|' * 99)
+    stack = thread_stack(nfa)
+    for _ in range(2):
+        states = SparseSet(len(nfa))
+        add_thread(nfa, states, nfa.start, stack)
+        assert len(states) == len(nfa) - 1  # every state but the accept state
+    assert len(stack) == len(nfa) + 1
+
+
+@pytest.mark.parametrize("regex", ['a', 'ab', 'a|b', 'a*b|c+', 'a(b|c)*d', '(a*)*', '(a|b)*a(a|b)', 'a?a?aa',
+                                   '[a-c]*d', '[^a]b|ab', '.a.'])
+def test_pike_match_agrees_with_nfa(regex):
+    flat = compile_flat(regex)
+    nfa = post2nfa(re2post(regex))
+    for n in range(1, 6):
+        for i in range(4 ** n):
+            string = ''.join('abcd'[(i >> (2 * k)) & 3] for k in range(n))
+            assert pike_match(flat, string) == match(nfa, string), string
+
+
+@pytest.mark.parametrize("regex", ['a{2,4}', 'a{3,}b', '[ab]{0,3}b', '(a{2})+', 'a{1,3}a{2}', '(a{2,3}|b){1,2}',
+                                   'a{0,2}a{2,}c', '(a{2}|a{3})+d'])
+def test_pike_match_with_counters(monkeypatch, regex):
+    monkeypatch.setattr('src.nfa_fragment.MIN_COUNTER_BOUND', 2)
+    flat = flatten(post2nfa(re2post(regex), counters=True))
+    assert flat.counters
+    nfa = post2nfa(re2post(regex))
+    for n in range(1, 8):
+        for i in range(4 ** n):
+            string = ''.join('abcd'[(i >> (2 * k)) & 3] for k in range(n))
+            assert pike_match(flat, string) == match(nfa, string), string
+            assert match_flat(flat, string) == match(nfa, string), string
+
+
+def test_pike_match_invalid():
+    with pytest.raises(ValueError):
+        pike_match(None, 'a')
+
+    with pytest.raises(ValueError):
+        pike_match(compile_flat('a'), '')
@@ -1,5 +1,12 @@
+import os
+
+import pytest
+
+from src.re2post import re2post
 from src.post2nfa import post2nfa
-from src.nfa_state import LiteralState, AcceptState, SplitState
+from src.nfa_fragment import PatchList, MAX_CLONED_STATES
+from src.nfa_state import LiteralState, AcceptState, SplitState, SaveState, CounterState, reachable_states
+from src.nfa_simulation import match
 
 # import pytest
 # @pytest.fixture
@@ -171,6 +178,152 @@ def test_one_question():
     assert start.next_state_1.next_state is start.next_state_2
 
 
+def test_post2nfa_counted_repetition():
+    """Test a{2,3}: two mandatory copies, then one optional copy"""
+    start = post2nfa('a{2,3}')
+    assert isinstance(start, LiteralState)
+    assert isinstance(start.next_state, LiteralState)
+
+    skip = start.next_state.next_state
+    assert isinstance(skip, SplitState)
+    assert skip.next_state_1.literal == 'a'
+    assert isinstance(skip.next_state_2, AcceptState)
+    assert skip.next_state_1.next_state is skip.next_state_2
+
+    # a{0} matches only the empty string
+    start = post2nfa('a{0}')
+    assert isinstance(start, SplitState)
+    assert isinstance(start.next_state_1, AcceptState)
+    assert start.next_state_1 is start.next_state_2
+
+
+def test_post2nfa_capture_group():
+    """Test a(b)*: the group is wrapped between save states for slots 2 and 3, inside the loop"""
+    start = post2nfa('ab(1)*.')
+    assert start.literal == 'a'
+
+    loop = start.next_state
+    assert isinstance(loop, SplitState)
+    save_start = loop.next_state_1
+    assert isinstance(save_start, SaveState) and save_start.slot == 2
+    assert save_start.next_state.literal == 'b'
+    save_end = save_start.next_state.next_state
+    assert isinstance(save_end, SaveState) and save_end.slot == 3
+    assert save_end.next_state is loop
+    assert isinstance(loop.next_state_2, AcceptState)
+
+    # '(' is still a literal when it does not start a group
+    assert post2nfa('(a.').literal == '('
+    assert post2nfa('(1)') is None
+
+
+def test_post2nfa_counted_repetition_is_linear():
+    """Optional copies share their exit, so a{0,n} has n + 1 split states and n literal states"""
+    start = post2nfa('a{0,100}')
+    states = set()
+    stack = [start]
+    while stack:
+        s = stack.pop()
+        if s is None or s in states:
+            continue
+        states.add(s)
+        if isinstance(s, LiteralState):
+            stack.append(s.next_state)
+        elif isinstance(s, SplitState):
+            stack.extend([s.next_state_1, s.next_state_2])
+
+    assert sum(isinstance(s, LiteralState) for s in states) == 100
+    assert sum(isinstance(s, SplitState) for s in states) == 100
+    assert len(states) == 201
+
+
+def test_post2nfa_counted_repetition_size_limit():
+    # nested bounds multiply the NFA size; construction stops at the budget instead of building 1M states
+    with pytest.raises(ValueError, match="NFA too large"):
+        post2nfa(re2post('(a{1000}){1000}'))
+
+    start = post2nfa(re2post('(a{100}){100}'))
+    assert match(start, 'a' * 10000)
+    assert 10000 <= MAX_CLONED_STATES
+
+
+def test_post2nfa_counters():
+    """With counters, a{1,1000} is a single counter state instead of 1000 literal states"""
+    start = post2nfa(re2post('a{1,1000}'), counters=True)
+    assert isinstance(start, CounterState)
+    assert (start.m, start.n) == (1, 1000)
+    assert isinstance(start.next_state, AcceptState)
+    assert match(start, 'a' * 1000)
+    assert not match(start, 'a' * 1001)
+
+    # only a single literal or class is counted, and small bounds are unrolled
+    for regex in ['(ab){20}', 'a{3}']:
+        start = post2nfa(re2post(regex), counters=True)
+        assert not any(isinstance(s, CounterState) for s in reachable_states(start))
+
+    # copies of a counter are one state each
+    start = post2nfa(re2post('(a{1000}){1000}'), counters=True)
+    assert sum(isinstance(s, CounterState) for s in reachable_states(start)) == 1000
+
+
+def test_post2nfa_literal_brace():
+    assert match(post2nfa(re2post('a{2')), 'a{2')
+    assert match(post2nfa(re2post('x{1,2}{')), 'xx{')
+
+
+def test_patch_list_splice():
+    a, b, c = LiteralState('a'), LiteralState('b'), LiteralState('c')
+    patches = PatchList(a).splice(PatchList(b).splice(PatchList(c)))
+    assert list(patches) == [a, b, c]
+    assert patches.tail[0] is c
+
+
+# The largest cases take several seconds each, so they only run with SLOW_TESTS=1
+slow = pytest.mark.skipif(not os.environ.get('SLOW_TESTS'), reason="set SLOW_TESTS=1 to run")
+
+
+def words(n):
+    return '|'.join('w{}'.format(i) for i in range(n))
+
+
+def count_patch_walks(monkeypatch) -> list[int]:
+    """
+    Counts the patch list nodes visited while building NFAs: O(1) splicing only visits each open end when patching it.
+    """
+    walked = [0]
+    iterate = PatchList.__iter__
+
+    def counting_iter(patches):
+        for state in iterate(patches):
+            walked[0] += 1
+            yield state
+
+    monkeypatch.setattr(PatchList, '__iter__', counting_iter)
+    return walked
+
+
+@pytest.mark.parametrize("n", [1000, 10000, pytest.param(100000, marks=slow)])
+def test_post2nfa_many_alternatives(n):
+    nfa = post2nfa(re2post(words(n)))
+    assert match(nfa, 'w0')
+    assert match(nfa, 'w{}'.format(n - 1))
+    assert not match(nfa, 'w{}'.format(n))
+
+    # one literal per character, one split per '|' and one accept state: linear in the size of the regex
+    assert len(reachable_states(nfa)) == len(words(n)) + 1
+
+    # one accept state shared by all n alternatives
+    assert sum(isinstance(s, AcceptState) for s in reachable_states(nfa)) == 1
+
+
+@pytest.mark.parametrize("n", [1000, 10000, pytest.param(100000, marks=slow)])
+def test_post2nfa_is_linear_in_alternatives(monkeypatch, n):
+    # splicing by walking to the end of the first list would visit O(n^2) nodes
+    walked = count_patch_walks(monkeypatch)
+    post2nfa(re2post(words(n)))
+    assert walked[0] <= len(words(n))  # each open end is patched once
+
+
 def test_post2nfa_invalid_input():
     """Test error handling for invalid postfix expressions"""
     assert post2nfa(None) is None
@@ -178,6 +331,9 @@ def test_post2nfa_invalid_input():
     assert post2nfa('a*b') is None  # Invalid postfix
     # assert post2nfa('a.b') is None  # Invalid postfix  # TODO add exception handling
     assert post2nfa('(ab)') is None  # Infix not supported
+    assert post2nfa('{2}') is None  # Nothing to repeat
+    assert post2nfa('a{2') is None  # Unterminated repetition
+    assert post2nfa('a{3,2}') is None  # Invalid repetition
 
 
 # TODO test complex cases
@@ -0,0 +1,81 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.prefilter import required_prefixes, next_candidate, extract_literals
+
+
+def compile_nfa(regex):
+    return post2nfa(re2post(regex))
+
+
+@pytest.mark.parametrize("regex,expected", [
+    ('abc', ['abc']),
+    ('ab*c', ['ab', 'ac']),
+    ('ab+c', ['abb', 'abc']),
+    ('foo|bar', ['bar', 'foo']),
+    ('ab(c|d)e', ['abce', 'abde']),
+    ('a|ab', ['a']),  # 'ab' is covered by 'a'
+    ('a*b', ['a', 'b']),
+    ('(a|b)*c', ['a', 'b', 'c']),
+    ('a?', None),  # accepts the empty string
+])
+def test_required_prefixes(regex, expected):
+    assert required_prefixes(compile_nfa(regex)) == expected
+
+
+def test_required_prefixes_limits():
+    assert required_prefixes(compile_nfa('abcdef'), max_len=3) == ['abc']
+
+    # growing past the third character would need 9 prefixes
+    regex = '(a|b|c)(a|b|c)(a|b|c)'
+    assert len(required_prefixes(compile_nfa(regex), max_prefixes=8)) == 3
+
+
+def test_next_candidate():
+    text = 'xxfooxbarxfoo'
+    assert next_candidate(text, ['foo', 'bar'], 0) == 2
+    assert next_candidate(text, ['foo', 'bar'], 3) == 6
+    assert next_candidate(text, ['bar', 'foo'], 7) == 10
+    assert next_candidate(text, ['qux'], 0) == -1
+
+
+@pytest.mark.parametrize("regex,exact,required", [
+    ('abc', {'abc'}, {'abc'}),
+    ('foo|bar|baz', {'foo', 'bar', 'baz'}, {'foo', 'bar', 'baz'}),
+    ('ab(c|d)', {'abc', 'abd'}, {'abc', 'abd'}),
+    ('ab?', {'a', 'ab'}, {'a', 'ab'}),
+    ('a?', {'', 'a'}, None),
+    ('x*foo', None, {'foo'}),
+    ('(ab)+c*', None, {'ab'}),
+    ('a*(foo|bar)b*', None, {'foo', 'bar'}),
+    ('(a|b)*', None, None),
+    ('foo|x*', None, None),
+    ('(ab){2}', {'abab'}, {'abab'}),
+    ('ab{0,2}', {'a', 'ab', 'abb'}, {'a', 'ab', 'abb'}),
+    ('x{2,}y', None, {'xx'}),
+    ('(a|b)*c{0}', None, None),
+    ('ab[cd]', {'abc', 'abd'}, {'abc', 'abd'}),
+    ('foo.bar', None, {'foo'}),
+])
+def test_extract_literals(regex, exact, required):
+    literals = extract_literals(re2post(regex))
+    assert literals.exact == (frozenset(exact) if exact is not None else None)
+    assert literals.required == (frozenset(required) if required is not None else None)
+
+
+def test_extract_literals_cross_product_limit():
+    postfix = re2post('(a|b|c)(a|b|c)')
+    assert len(extract_literals(postfix).exact) == 9
+    literals = extract_literals(postfix, max_cross_product=8)
+    assert literals.exact is None
+    assert literals.required == frozenset('abc')
+
+
+def test_extract_literals_invalid():
+    assert extract_literals(None) is None
+    assert extract_literals('') is None
+    assert extract_literals('a*b') is None
+    assert extract_literals('.') is None
+    assert extract_literals('{2}') is None
+    assert extract_literals('a{3,2}') is None
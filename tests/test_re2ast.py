@@ -0,0 +1,115 @@
+import pytest
+
+from src.nfa_state import CharSet
+from src.re2post import re2post
+from src.re2ast import (re2ast, post2ast, count_groups, postorder, Literal, CharClass, Concat, Alternate, Repeat, Group,
+                        DOT, MAX_NESTING_DEPTH)
+
+
+def test_literals_and_concatenation():
+    assert re2ast('a') == Literal('a')
+    assert re2ast('abc') == Concat((Literal('a'), Literal('b'), Literal('c')))
+    assert re2ast('(?:ab)c') == re2ast('a(?:bc)') == re2ast('abc')
+
+
+def test_alternation():
+    assert re2ast('a|b|c') == Alternate((Literal('a'), Literal('b'), Literal('c')))
+    assert re2ast('ab|c') == Alternate((Concat((Literal('a'), Literal('b'))), Literal('c')))
+    assert re2ast('(?:a|b)|c') == re2ast('a|b|c')
+
+
+def test_repetition():
+    a = Literal('a')
+    assert re2ast('a*') == Repeat(a, 0, None)
+    assert re2ast('a+') == Repeat(a, 1, None)
+    assert re2ast('a?') == Repeat(a, 0, 1)
+    assert re2ast('a{2,5}') == Repeat(a, 2, 5)
+    assert re2ast('a*?') == Repeat(Repeat(a, 0, None), 0, 1)
+    assert re2ast('(?:ab)*') == Repeat(Concat((a, Literal('b'))), 0, None)
+
+
+def test_groups():
+    a, b = Literal('a'), Literal('b')
+    assert re2ast('(a)') == Group(a, 1)
+    assert re2ast('(ab)*') == Repeat(Group(Concat((a, b)), 1), 0, None)
+    assert re2ast('((a)|(b))') == Group(Alternate((Group(a, 2), Group(b, 3))), 1)
+    assert re2ast('(a)(?:b)') == Concat((Group(a, 1), b))
+    assert re2ast('(a|b)|c') == Alternate((Group(Alternate((a, b)), 1), Literal('c')))
+    assert count_groups(re2ast('(a)(?:b(c))*')) == 2
+    assert count_groups(re2ast('abc')) == 0
+
+
+def test_character_classes():
+    assert re2ast('[a-c]') == CharClass(CharSet([(ord('a'), ord('c'))]))
+    assert re2ast('[^\n]') == re2ast('.') == CharClass(DOT)
+    assert re2ast('[]-]') == CharClass(CharSet([(ord('-'), ord('-')), (ord(']'), ord(']'))]))
+    assert re2ast('[\\]\\\\]') == CharClass(CharSet([(ord('\\'), ord(']'))]))
+    assert re2ast('[\\d_]') == CharClass(CharSet([(ord('0'), ord('9')), (ord('_'), ord('_'))]))
+
+
+def test_literal_brace():
+    assert re2ast('{') == Literal('{')
+    assert re2ast('a{2') == Concat((Literal('a'), Literal('{'), Literal('2')))
+    assert re2ast('a{x}') == Concat((Literal('a'), Literal('{'), Literal('x'), Literal('}')))
+    assert re2ast('a{2}{') == Concat((Repeat(Literal('a'), 2, 2), Literal('{')))
+
+
+def test_escapes():
+    assert re2ast('\\*') == Literal('*')
+    assert re2ast('a\\.b') == Concat((Literal('a'), Literal('.'), Literal('b')))
+    assert re2ast('\\(\\)\\|\\\\') == Concat((Literal('('), Literal(')'), Literal('|'), Literal('\\')))
+    assert re2ast('\\n\\t') == Concat((Literal('\n'), Literal('\t')))
+    assert re2ast('\\d') == CharClass(CharSet([(ord('0'), ord('9'))]))
+
+    w = re2ast('\\w').chars
+    assert all(c in w for c in 'azAZ09_')
+    assert not any(c in w for c in '-é ')
+
+    not_s = re2ast('\\S').chars
+    assert 'x' in not_s
+    assert not any(c in not_s for c in ' \t\n\r\f\v')
+
+
+@pytest.mark.parametrize("regex", ['', '(', ')', 'a)', '(a', '|a', 'a|', '()', '(|)', '*', 'a|*', '{2}', 'a{3,2}',
+                                   '[', '[]', '[^]', '[z-a]', '\\', 'a\\', '\\q', '\\1', '(?:', '(?:)'])
+def test_invalid(regex):
+    with pytest.raises(ValueError):
+        re2ast(regex)
+
+
+def test_error_position():
+    with pytest.raises(ValueError, match="position 2"):
+        re2ast('ab)c')
+
+
+def test_deep_nesting():
+    node = re2ast('(' * MAX_NESTING_DEPTH + 'a' + ')' * MAX_NESTING_DEPTH)
+    assert count_groups(node) == MAX_NESTING_DEPTH
+
+    # too deep for the recursive-descent parser: a clean error, not a RecursionError
+    with pytest.raises(ValueError, match="nested deeper"):
+        re2ast('(' * 300 + 'a' + ')' * 300)
+
+    # stacked quantifiers nest the AST without nesting groups
+    node = re2ast('a' + '?' * 3000)
+    assert len(list(postorder(node))) == 3001
+    assert count_groups(node) == 0
+
+
+def test_postorder():
+    a, b = Literal('a'), Literal('b')
+    assert list(postorder(re2ast('(a|b)*'))) == [a, b, Alternate((a, b)), Group(Alternate((a, b)), 1),
+                                                 Repeat(Group(Alternate((a, b)), 1), 0, None)]
+
+
+@pytest.mark.parametrize("regex", ['a', 'abc', 'a|b|c', 'ab|cd', '(a|b)*c+', 'a{2,}b?', '[a-z]x.', '((a)(b))*'])
+def test_post2ast_agrees_with_re2ast(regex):
+    assert post2ast(re2post(regex, capture=True)) == re2ast(regex)
+
+
+def test_post2ast_invalid():
+    assert post2ast(None) is None
+    assert post2ast('') is None
+    assert post2ast('a*b') is None
+    assert post2ast('.') is None
+    assert post2ast('a{3,2}') is None
@@ -1,8 +1,10 @@
 # pytest test_re2post.py -v
 #   -v flag gives verbose output so you can see which tests pass or fail
 
+import sys
+
 import pytest
-from src.re2post import re2post
+from src.re2post import re2post, parse_class
 
 
 def test_basic_literals():
@@ -25,6 +27,47 @@ def test_repetition_operators():
     assert re2post("a|b*") == "ab*|"
 
 
+def test_counted_repetition():
+    assert re2post("a{3}") == "a{3}"
+    assert re2post("a{2,}") == "a{2,}"
+    assert re2post("a{2,5}") == "a{2,5}"
+    assert re2post("(ab){2}c") == "ab.{2}c."
+    assert re2post("a|b{0,1}") == "ab{0,1}|"
+
+    for regex in ["{2}", "a{3,2}", "a{1001}"]:
+        with pytest.raises(ValueError):
+            re2post(regex)
+
+
+def test_literal_brace():
+    # a '{' that does not start a bound stands for itself, as it did before counted repetition
+    assert re2post("{") == "[{]"
+    assert re2post("a{") == "a[{]."
+    assert re2post("a{2") == "a[{].2."
+    assert re2post("a{x}") == "a[{].x.}."
+    assert re2post("a{,2}") == "a[{].,.2.}."
+    assert re2post("a{2}{") == "a{2}[{]."
+
+
+def test_character_classes():
+    assert re2post("[a-z0-9]") == "[a-z0-9]"
+    assert re2post("x[^,]+y") == "x[^,]+.y."
+    assert re2post("a.b") == "a[^\n].b."
+    assert re2post("[]|]|[(]") == "[]|][(]|"
+
+    for regex in ["[", "[ab", "[]", "[^]", "[z-a]"]:
+        with pytest.raises(ValueError):
+            re2post(regex)
+
+
+def test_parse_class():
+    assert parse_class("[abc]") == [(ord('a'), ord('c'))]
+    assert parse_class("[0-9a-fA-F]") == [(ord('0'), ord('9')), (ord('A'), ord('F')), (ord('a'), ord('f'))]
+    assert parse_class("[-a]") == parse_class("[a-]") == [(ord('-'), ord('-')), (ord('a'), ord('a'))]
+    assert parse_class("[]]") == [(ord(']'), ord(']'))]
+    assert parse_class("[^b-y]") == [(0, ord('a')), (ord('z'), sys.maxunicode)]
+
+
 def test_parentheses():
     assert re2post("(a)") == "a"
     assert re2post("(a|b)c") == "ab|c."
@@ -33,6 +76,13 @@ def test_parentheses():
     assert re2post("(a|b)(c|d)") == "ab|cd|."
 
 
+def test_capture_groups():
+    assert re2post("a(b|c)", capture=True) == "abc|(1)."
+    assert re2post("ab(c)", capture=True) == "ab.c(1)."
+    assert re2post("((a)(b))*", capture=True) == "a(2)b(3).(1)*"
+    assert re2post("((a)(b))*") == "ab.*"
+
+
 def test_complex_expressions():
     assert re2post("a(b|c)*d") == "abc|*.d."
     assert re2post("(a|b)*c(d|e)?") == "ab|*c.de|?."
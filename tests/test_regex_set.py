@@ -0,0 +1,56 @@
+import pytest
+
+from src.nfa_state import AcceptState, epsilon_closure
+from src.pattern import compile
+from src.regex_set import RegexSet
+
+PATTERNS = ['a', 'ab', 'a*', 'a(b|c)*', 'b+', '(a|b)*c']
+
+
+@pytest.mark.parametrize("use_dfa", [True, False])
+@pytest.mark.parametrize("string", ['', 'a', 'ab', 'abc', 'abcb', 'bbb', 'aaa', 'bac', 'd'])
+def test_regex_set_agrees_with_single_patterns(use_dfa, string):
+    regex_set = RegexSet(PATTERNS, use_dfa=use_dfa)
+    expected = [i for i, p in enumerate(PATTERNS) if compile(p).match(string)]
+    assert regex_set.matches(string) == expected
+    assert regex_set.is_match(string) == bool(expected)
+
+
+def test_regex_set_keeps_one_accept_state_per_pattern():
+    regex_set = RegexSet(['a', 'b', 'c'])
+    assert len(regex_set) == 3
+
+    closure = epsilon_closure([regex_set.start_state])
+    assert sum(isinstance(s, AcceptState) for s in closure) == 0
+    assert len(regex_set._accept_index) == 3
+
+
+def test_regex_set_small_dfa_cache():
+    regex_set = RegexSet(PATTERNS, cache_size=2)
+    assert regex_set.matches('abcb') == [3]
+    assert regex_set.matches('aaa') == [2]
+
+
+def test_regex_set_invalid():
+    with pytest.raises(ValueError):
+        RegexSet([])
+
+    with pytest.raises(ValueError):
+        RegexSet(['a', '(b'])
+
+
+@pytest.mark.parametrize("string", ['', 'xx', 'a foo here', 'bazbar', 'qqq', 'abcd', 'x bbbb y', 'car'])
+def test_regex_set_search_agrees_with_single_patterns(string):
+    patterns = ['foo|bar', 'baz', 'a(b|c)+d', 'b+', 'q?', '(a|b)*c', 'ca*r']
+    regex_set = RegexSet(patterns)
+    expected = [i for i, p in enumerate(patterns) if compile(p).search(string) is not None]
+    assert regex_set.search(string) == expected
+
+
+def test_regex_set_search_blocklist():
+    words = ['w{}x'.format(i) for i in range(500)]
+    regex_set = RegexSet(['|'.join(words), 'w(1|2)+y'])
+    assert regex_set._always_confirm == []
+    assert regex_set.search('... w42x ...') == [0]
+    assert regex_set.search('... w1212y ...') == [1]
+    assert regex_set.search('... w500x ...') == []
@@ -0,0 +1,130 @@
+import os
+from array import array
+
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.dfa import compile_dfa
+from src.nfa_array import flatten, match_flat
+from src.pike_vm import pike_match
+from src.serialize import (dumps_dfa, dumps_flat_nfa, loads, load_file, dump_file, CompileCache,
+                           FORMAT_VERSION, _HEADER, _NFA_HEADER, _DFA_HEADER)
+
+STRINGS = ['a', 'ab', 'abd', 'acbd', 'é', 'éé', 'x']
+
+
+def compile_nfa(regex):
+    return post2nfa(re2post(regex))
+
+
+@pytest.mark.parametrize("regex", ['a', 'a(b|c)*d', 'é+', '(a|b)*a(a|b)', '[a-c]+d|.x'])
+def test_dfa_round_trip(regex):
+    dfa = compile_dfa(compile_nfa(regex))
+    loaded = loads(dumps_dfa(dfa))
+
+    assert list(loaded.table) == list(dfa.table)
+    assert loaded.accepting == dfa.accepting
+    assert (loaded.start, loaded.dead, loaded.n_columns) == (dfa.start, dfa.dead, dfa.n_columns)
+    for s in STRINGS:
+        assert loaded.match(s) == dfa.match(s)
+
+
+@pytest.mark.parametrize("regex", ['a', 'a(b|c)*d', 'é+', '(a|b)*a(a|b)', '[a-c]+d|x', '.[^b]'])
+def test_flat_nfa_round_trip(regex):
+    nfa = flatten(compile_nfa(regex))
+    loaded = loads(dumps_flat_nfa(nfa))
+
+    assert len(loaded) == len(nfa)
+    assert loaded.start == nfa.start
+    assert loaded.char_sets == nfa.char_sets
+    for s in STRINGS:
+        assert match_flat(loaded, s) == match_flat(nfa, s)
+        assert pike_match(loaded, s) == match_flat(nfa, s)
+
+
+def test_flat_nfa_round_trip_with_counters():
+    nfa = flatten(post2nfa(re2post('[a-c]{1,20}d|x{10,}'), counters=True))
+    loaded = loads(dumps_flat_nfa(nfa))
+
+    assert loaded.counters == nfa.counters
+    assert sorted(nfa.counters, key=str) == [(1, 20), (10, None)]
+    for s in STRINGS + ['a' * 20 + 'd', 'a' * 21 + 'd', 'x' * 9, 'x' * 30]:
+        assert pike_match(loaded, s) == match_flat(nfa, s)
+
+    # a bound larger than any repetition is corrupted data
+    data = bytearray(dumps_flat_nfa(nfa))
+    data[-4:] = array('i', [10 ** 9]).tobytes()
+    with pytest.raises(ValueError):
+        loads(bytes(data))
+
+
+def test_load_file_is_zero_copy(tmp_path):
+    path = str(tmp_path / 'a.rxa')
+    dump_file(dumps_dfa(compile_dfa(compile_nfa('a(b|c)*d'))), path)
+
+    dfa = load_file(path)
+    assert isinstance(dfa.table, memoryview)
+    assert dfa.match('abcbd')
+    assert not dfa.match('abcb')
+
+
+def test_loads_rejects_bad_data():
+    data = dumps_dfa(compile_dfa(compile_nfa('ab')))
+
+    with pytest.raises(ValueError):
+        loads(b'XXXX' + data[4:])
+    with pytest.raises(ValueError):
+        loads(_HEADER.pack(b'RXAU', FORMAT_VERSION + 1, 2, 0) + data[_HEADER.size:])
+    with pytest.raises(ValueError):
+        loads(data[:len(data) // 2])
+    with pytest.raises(ValueError):
+        loads(b'RX')
+    with pytest.raises(ValueError):
+        loads(_HEADER.pack(b'RXAU', FORMAT_VERSION, 2, 0))  # truncated right after the header
+    with pytest.raises(ValueError):
+        loads(_HEADER.pack(b'RXAU', FORMAT_VERSION, 1, 0) + b'\0\0')
+
+
+def test_loads_rejects_out_of_range_entries():
+    dfa = compile_dfa(compile_nfa('ab'))
+    data = bytearray(dumps_dfa(dfa))
+    table_offset = _HEADER.size + _DFA_HEADER.size
+    data[table_offset:table_offset + 4] = array('i', [dfa.n_states]).tobytes()
+    with pytest.raises(ValueError):
+        loads(bytes(data))
+
+    nfa = flatten(compile_nfa('ab'))
+    data = bytearray(dumps_flat_nfa(nfa))
+    out1_offset = _HEADER.size + _NFA_HEADER.size + 2 * 4 * len(nfa)
+    data[out1_offset:out1_offset + 4] = array('i', [len(nfa)]).tobytes()
+    with pytest.raises(ValueError):
+        loads(bytes(data))
+
+
+def test_compile_cache(tmp_path):
+    cache = CompileCache(str(tmp_path / 'cache'))
+
+    dfa = cache.get_dfa('a(b|c)*d')
+    assert dfa.match('abcd')
+    path = cache.path('a(b|c)*d', 2)
+    assert os.path.exists(path)
+
+    mtime = os.stat(path).st_mtime_ns
+    assert cache.get_dfa('a(b|c)*d').match('abd')
+    assert os.stat(path).st_mtime_ns == mtime  # served from disk, not rebuilt
+
+    nfa = cache.get_flat_nfa('a(b|c)*d')
+    assert pike_match(nfa, 'acd')
+    assert cache.path('a(b|c)*d', 1) != path
+
+    # a corrupted entry is rebuilt
+    with open(path, 'wb') as f:
+        f.write(b'garbage')
+    assert cache.get_dfa('a(b|c)*d').match('abcd')
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(b'RXAU', FORMAT_VERSION, 2, 0))
+    assert cache.get_dfa('a(b|c)*d').match('abcd')
+
+    with pytest.raises(ValueError):
+        cache.get_dfa('(')
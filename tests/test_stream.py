@@ -0,0 +1,92 @@
+import pytest
+
+from src.re2post import re2post
+from src.post2nfa import post2nfa
+from src.nfa_simulation import match
+from src.lazy_dfa import LazyDfa
+from src.stream import StreamMatcher
+
+
+def compile_nfa(regex):
+    return post2nfa(re2post(regex))
+
+
+@pytest.mark.parametrize("regex,chunks,expected", [
+    ('abc', ['a', 'b', 'c'], True),
+    ('abc', ['ab', 'cd'], False),
+    ('a(b|c)*d', ['abc', '', 'bcb', 'd'], True),
+    ('a*', [], True),
+    ('a+', [''], False),
+])
+def test_stream_matching(regex, chunks, expected):
+    m = StreamMatcher(compile_nfa(regex))
+    for chunk in chunks:
+        m.feed(chunk)
+    assert m.finish() == expected
+
+
+def test_stream_early_exit_signals():
+    m = StreamMatcher(compile_nfa('ab+'))
+    assert m.feed('a') is True
+    assert not m.is_accepting
+    assert m.feed('bb') is True
+    assert m.is_accepting
+    assert m.feed('c') is False
+    assert m.is_dead
+    assert m.finish() is False
+
+    with pytest.raises(ValueError):
+        m.feed('b')
+
+    m.reset()
+    assert m.feed('ab') is True
+    assert m.finish() is True
+
+
+def test_stream_is_accepted():
+    m = StreamMatcher(compile_nfa('ab(.|\n)*'))
+    m.feed('a')
+    assert not m.is_accepted
+    m.feed('b')
+    assert m.is_accepted  # every continuation matches: the caller can stop reading
+    m.feed('anything\n')
+    assert m.is_accepted
+    assert m.finish() is True
+
+    # accepting so far, but a later chunk can still make the match fail
+    m = StreamMatcher(compile_nfa('ab.*'))
+    m.feed('ab')
+    assert m.is_accepting
+    assert not m.is_accepted
+    m.feed('\n')
+    assert m.finish() is False
+
+    # the same answers once the stream has fallen back to NFA simulation
+    m = StreamMatcher(LazyDfa(compile_nfa('(a|b)*a(a|b)c(.|\n)*'), cache_size=2, max_flushes=0))
+    m.feed('babab')
+    assert not m.is_accepted
+    m.feed('c')
+    assert m.is_accepted
+
+
+def test_stream_bytes_split_inside_a_character():
+    m = StreamMatcher(compile_nfa('é+'))
+    data = 'ééé'.encode('utf-8')
+    for i in range(len(data)):
+        m.feed(data[i:i + 1])
+    assert m.finish() is True
+
+
+@pytest.mark.parametrize("string", ['abab', 'aabba', 'bbbbab', 'abbbbbbbbbaab'])
+def test_stream_falls_back_to_nfa(string):
+    regex = '(a|b)*a(a|b)(a|b)'
+    dfa = LazyDfa(compile_nfa(regex), cache_size=2, max_flushes=0)
+    m = StreamMatcher(dfa)
+    for i in range(0, len(string), 3):
+        m.feed(string[i:i + 3])
+    assert m.finish() == match(compile_nfa(regex), string)
+
+
+def test_stream_invalid():
+    with pytest.raises(ValueError):
+        StreamMatcher(None)